@@ -1,11 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
+import threading
+import time
 
+from core.config import get_cfg
+from core.nli import configure_api_threads, get_scheduler, warmup_nli
 from .routes import router as api_router
 
-app = FastAPI()
+
+def _warmup() -> None:
+    t0 = time.perf_counter()
+    try:
+        timings = warmup_nli()
+    except Exception as e:
+        print(f"[STARTUP] NLI warm-up failed after {time.perf_counter() - t0:.1f}s: {e}")
+        return
+    for phase, sec in timings.items():
+        print(f"[STARTUP] nli {phase}: {sec:.2f}s")
+    print(f"[STARTUP] NLI ready in {time.perf_counter() - t0:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cfg = get_cfg()
+    threads, processes = configure_api_threads()
+    print(f"[STARTUP] torch threads={threads} (api processes={processes})")
+    sched = get_scheduler()
+    if sched is not None:
+        sched.start()
+    # warm up in the background so /api/health/live answers right away;
+    # /api/health/ready flips once the model is loaded and warm
+    if bool(cfg.get("NLI_WARMUP_ON_STARTUP", True)):
+        threading.Thread(target=_warmup, name="nli-warmup", daemon=True).start()
+    yield
+    if sched is not None:
+        sched.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(api_router, prefix="/api")
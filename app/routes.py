@@ -1,14 +1,23 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from app.schemas import (
-    VerifyRequest, VerifyResponse
+    VerifyRequest, VerifyResponse, BatchVerifyRequest
 )
-from core.search import search_serper, SearchError
-from core.scrape import fetch_page
-from core.verify import verify_claim_pipeline
+from core.search import search_serper, SearchError, search_cache_stats
+from core.scrape import failed_page_cache_stats, fetch_page, page_cache_stats
+from core.domain_health import domain_health_report
+from core.claim_cache import aiter_verify_claim_cached, averify_claim_cached, claim_cache_stats
+from core.batch import iter_verify_batch
+from core.config import get_cfg
+from core import metrics
+from core.nli import scheduler_stats, memo_stats, is_ready, warmup_error
 
 
 router = APIRouter()
 
+_PIPELINE_PARAMS = {"search_k": 20, "fetch_k": 10, "chunks_per_page": 6}
+
 # @router.get("/hello")
 # def say_hello():
 #     return {"message": "Hello from FactCheck!"}
@@ -27,10 +36,76 @@ router = APIRouter()
 #     page = fetch_page(body.url)
 #     return FetchResponse(**page)
 
+@router.get("/health/live")
+def api_health_live():
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+def api_health_ready():
+    if is_ready() or not bool(get_cfg().get("NLI_WARMUP_ON_STARTUP", True)):
+        return {"status": "ready"}
+    err = warmup_error()
+    body = {"status": "failed", "detail": err} if err else {"status": "warming_up"}
+    return JSONResponse(status_code=503, content=body)
+
 @router.post("/verify", response_model=VerifyResponse)
-def api_verify(body: VerifyRequest):
+async def api_verify(body: VerifyRequest):
     try:
-        result = verify_claim_pipeline(body.claim, search_k=20, fetch_k=10, chunks_per_page=6)
+        result = await averify_claim_cached(body.claim, **_PIPELINE_PARAMS)
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
     return VerifyResponse(**result)
+
+@router.post("/verify/stream")
+async def api_verify_stream(body: VerifyRequest):
+    """
+    NDJSON stream of pipeline stage events from the async pipeline; the last
+    line is either {"event": "result", "result": <VerifyResponse>} or
+    {"event": "error", ...}.
+    """
+    async def events():
+        try:
+            async for event in aiter_verify_claim_cached(body.claim, **_PIPELINE_PARAMS):
+                if event["event"] == "result":
+                    event = {"event": "result", "result": VerifyResponse(**event["result"]).model_dump()}
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/verify/batch")
+def api_verify_batch(body: BatchVerifyRequest):
+    """
+    NDJSON stream with one line per claim, in request order:
+    {"id", **VerifyResponse} or {"id", "claim", "error"}.
+    """
+    items = [(c.id if c.id is not None else str(i), c.claim) for i, c in enumerate(body.claims)]
+
+    def lines():
+        try:
+            for rec in iter_verify_batch(items, **_PIPELINE_PARAMS):
+                if "error" not in rec:
+                    rec = {"id": rec["id"], **VerifyResponse(**rec).model_dump()}
+                yield json.dumps(rec, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/nli/stats")
+def api_nli_stats():
+    return scheduler_stats()
+
+@router.get("/cache/stats")
+def api_cache_stats():
+    return {"search": search_cache_stats(), "pages": page_cache_stats(),
+            "pages_failed": failed_page_cache_stats(), "nli": memo_stats(), "claims": claim_cache_stats()}
+
+@router.get("/health/domains")
+def api_health_domains(limit: int = 100):
+    return domain_health_report(limit)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def api_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
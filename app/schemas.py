@@ -4,6 +4,13 @@ from typing import Optional, List
 class VerifyRequest(BaseModel):
     claim: str = Field(..., description="Claim to verify")
 
+class BatchClaim(BaseModel):
+    id: Optional[str] = None
+    claim: str
+
+class BatchVerifyRequest(BaseModel):
+    claims: List[BatchClaim] = Field(..., description="Claims to verify; id defaults to the list index")
+
 class EvidenceItem(BaseModel):
     url: str
     domain: str
@@ -25,3 +32,9 @@ class VerifyResponse(BaseModel):
     coverage_bucket: Optional[str] = None
     sources: List[EvidenceItem]
     notes: Optional[str] = None
+    nli_chunks_evaluated: Optional[int] = None
+    nli_chunks_skipped: Optional[int] = None
+    verified_at: Optional[str] = None
+    cached: Optional[bool] = None
+    coalesced: Optional[bool] = None
+    cache_age_sec: Optional[float] = None
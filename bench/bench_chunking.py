@@ -0,0 +1,104 @@
+"""
+Microbenchmarks for chunking and keyword scoring: the previous string-based
+split / score / sort implementation against core/chunking.py, on page texts
+built by repeating the fixture pages up to --kb kilobytes. Reports time and
+peak traced memory per call and checks both give the same output.
+
+    python -m bench.bench_chunking [--kb 16,128,512] [--repeat 10]
+"""
+import argparse
+import glob
+import os
+import re
+import time
+import tracemalloc
+
+from core.utils import keywords_from_claim, score_chunk_by_keywords, select_top_chunks, split_to_chunks
+
+CLAIMS = [
+    "The flu vaccine reduces hospital admissions for adults over 65.",
+    "Drinking coffee dehydrates you.",
+    "מספר מקרי החצבת ירד לאחר מבצע החיסונים.",
+]
+
+def legacy_split_to_chunks(text, max_chars=500):
+    sents = re.split(r'(?<=[.!?])\s+|\n+', text)
+    chunks, buf = [], ""
+    for s in sents:
+        s = s.strip()
+        if not s:
+            continue
+        if len(buf) + len(s) <= max_chars:
+            buf = (buf + " " + s).strip()
+        else:
+            if buf:
+                chunks.append(buf)
+            buf = s
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+def legacy_score_chunk_by_keywords(chunk, keywords):
+    c = chunk.lower()
+    return sum(1 for kw in keywords if kw in c)
+
+def legacy_select_top_chunks(text, claim, top_n=8):
+    chunks = legacy_split_to_chunks(text, max_chars=500)
+    kws = keywords_from_claim(claim)
+    scored = [(legacy_score_chunk_by_keywords(ch, kws), ch) for ch in chunks]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    filtered = [ch for sc, ch in scored if sc > 0]
+    return filtered[:top_n] if filtered else chunks[:top_n]
+
+def _page_texts():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "html", "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            html = re.sub(r"<script.*?</script>|<style.*?</style>", "", f.read(), flags=re.S)
+        # tag-stripped text is enough here; trafilatura output has the same shape
+        lines = [ln.strip() for ln in re.sub(r"<[^>]+>", "\n", html).splitlines()]
+        texts.append("\n".join(ln for ln in lines if ln))
+    return "\n\n".join(texts)
+
+def _measure(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    ms = (time.perf_counter() - t0) * 1000.0 / repeat
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, peak / 1024.0
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--kb", default="16,128,512")
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    base = _page_texts()
+    print(f"{'case':<26}{'KB':>6}{'old ms':>10}{'new ms':>10}{'old KiB':>10}{'new KiB':>10}  same")
+    for kb in (int(x) for x in args.kb.split(",")):
+        text = (base + "\n") * (kb * 1024 // (len(base.encode("utf-8")) + 1) + 1)
+        chunks = split_to_chunks(text)
+        cases = [
+            ("split_to_chunks", lambda: legacy_split_to_chunks(text), lambda: split_to_chunks(text)),
+        ]
+        for claim in CLAIMS:
+            kws = keywords_from_claim(claim)
+            cases.append((f"score[{kws[0]}]",
+                          lambda kws=kws: [legacy_score_chunk_by_keywords(c, kws) for c in chunks],
+                          lambda kws=kws: [score_chunk_by_keywords(c, kws) for c in chunks]))
+            cases.append((f"select_top_chunks[{kws[0]}]",
+                          lambda claim=claim: legacy_select_top_chunks(text, claim, 6),
+                          lambda claim=claim: select_top_chunks(text, claim, 6)))
+        for name, old, new in cases:
+            old_ms, old_kib = _measure(old, args.repeat)
+            new_ms, new_kib = _measure(new, args.repeat)
+            same = old() == new()
+            print(f"{name:<26}{kb:>6}{old_ms:>10.2f}{new_ms:>10.2f}{old_kib:>10.0f}{new_kib:>10.0f}  {'yes' if same else 'NO'}")
+
+if __name__ == "__main__":
+    main()
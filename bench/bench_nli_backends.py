@@ -0,0 +1,98 @@
+"""
+Accuracy and throughput check for the NLI backends (see core/nli_backends.py).
+Every backend scores the same fixed claim/chunk pairs; accuracy is measured
+against the fp32 "torch" backend (max |delta prob| and argmax agreement),
+throughput as pairs/sec over repeated batched runs on CPU.
+
+    python -m bench.bench_nli_backends [--backends torch,torch_int8,onnx,onnx_int8] [--repeat 5]
+"""
+import argparse
+import time
+
+from transformers import AutoTokenizer
+
+from core.config import get_cfg
+from core.nli import DEFAULT_MODEL_NAME
+from core.nli_backends import BACKENDS, make_backend
+
+# (chunk, claim) pairs: supporting, contradicting and unrelated, English and Hebrew
+PAIRS = [
+    ("People aged 65 and over who received the flu vaccine were far less likely to be hospitalised "
+     "with severe influenza than unvaccinated people of the same age.",
+     "The flu vaccine reduces severe illness in adults over 65."),
+    ("Controlled trials show that moderate coffee intake hydrates about as well as the same volume of water.",
+     "Drinking coffee dehydrates you."),
+    ("The Great Wall of China is not visible to the naked eye from low Earth orbit, astronauts report.",
+     "The Great Wall of China can be seen from space with the naked eye."),
+    ("The city council approved a new budget for road maintenance on Tuesday evening.",
+     "Vitamin C cures the common cold."),
+    ("Measles is one of the most contagious diseases known, and high vaccination coverage is needed "
+     "to prevent outbreaks.",
+     "Measles is highly contagious."),
+    ("Studies have found no link between the MMR vaccine and autism in large population cohorts.",
+     "The MMR vaccine causes autism."),
+    ("Lightning can and often does strike the same place more than once, especially tall structures.",
+     "Lightning never strikes the same place twice."),
+    ("משרד הבריאות מדווח על ירידה במספר מקרי החצבת לאחר מבצע חיסונים נרחב.",
+     "מספר מקרי החצבת ירד לאחר מבצע החיסונים."),
+    ("לפי נתוני הלשכה המרכזית לסטטיסטיקה, האבטלה עלתה ברבעון האחרון.",
+     "שיעור האבטלה ירד ברבעון האחרון."),
+    ("מחקרים רבים מצאו שפעילות גופנית סדירה מפחיתה את הסיכון למחלות לב.",
+     "פעילות גופנית מפחיתה סיכון למחלות לב."),
+]
+
+def _features(tokenizer, pairs):
+    enc = tokenizer([p for p, _ in pairs], [h for _, h in pairs], truncation=True, max_length=512)
+    keys = list(enc.keys())
+    return [{k: enc[k][i] for k in keys} for i in range(len(pairs))]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", default=",".join(BACKENDS))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--batch-size", type=int, default=16)
+    args = ap.parse_args()
+
+    cfg = get_cfg()
+    name = cfg.get("NLI_MODEL_NAME", DEFAULT_MODEL_NAME)
+    onnx_dir = str(cfg.get("NLI_ONNX_DIR", ".cache/onnx"))
+    tokenizer = AutoTokenizer.from_pretrained(cfg.get("NLI_TOKENIZER_NAME") or name)
+    feats = _features(tokenizer, PAIRS)
+    # throughput workload: the fixed pairs tiled up to several batches
+    workload = (feats * (4 * args.batch_size // len(feats) + 1))[: 4 * args.batch_size]
+
+    kinds = [k.strip() for k in args.backends.split(",") if k.strip()]
+    if "torch" not in kinds:
+        kinds.insert(0, "torch")
+
+    reference = None
+    print(f"{'backend':<12}{'load s':>8}{'pairs/s':>10}{'max |dp|':>10}{'argmax agree':>14}")
+    for kind in kinds:
+        t0 = time.perf_counter()
+        try:
+            backend = make_backend(kind, name, tokenizer, device="cpu", onnx_dir=onnx_dir)
+        except Exception as e:
+            print(f"{kind:<12}  unavailable: {e}")
+            continue
+        load_s = time.perf_counter() - t0
+
+        probs = backend.predict(feats)
+        if reference is None:
+            reference = probs
+        max_dp = max(abs(a - b) for row, ref in zip(probs, reference) for a, b in zip(row, ref))
+        agree = sum(
+            max(range(len(row)), key=row.__getitem__) == max(range(len(ref)), key=ref.__getitem__)
+            for row, ref in zip(probs, reference)
+        )
+
+        backend.predict(workload[: args.batch_size])  # warm-up
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for start in range(0, len(workload), args.batch_size):
+                backend.predict(workload[start:start + args.batch_size])
+        pps = args.repeat * len(workload) / (time.perf_counter() - t0)
+
+        print(f"{kind:<12}{load_s:>8.1f}{pps:>10.1f}{max_dp:>10.4f}{f'{agree}/{len(PAIRS)}':>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Per-page parse benchmark for fetch_page: the old double parse (BeautifulSoup
+tree + trafilatura reparsing the raw HTML) against the single-parse path in
+core.scrape. Both sides do the same work, parse plus title / date / text
+extraction; language detection and metric spans are left out of both.
+Reports mean parse time and peak traced memory per fixture and checks that
+both paths extract the same title / date / text. news_large / news_xlarge
+are full-size news pages (head scripts and styles, menus, comments, related
+links); the small fixtures cover the metadata edge cases.
+
+    python -m bench.bench_parse [--html-dir bench/fixtures/html] [--repeat 20]
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from trafilatura.utils import load_html
+
+from core.scrape import extract_head_metadata, extract_readable_text
+
+_LEGACY_DATE_CANDIDATES = [
+    ('meta', {'property': 'article:published_time'}, 'content'),
+    ('meta', {'property': 'og:updated_time'}, 'content'),
+    ('meta', {'name': 'date'}, 'content'),
+    ('meta', {'itemprop': 'datePublished'}, 'content'),
+    ('meta', {'property': 'article:modified_time'}, 'content'),
+    ('meta', {'name': 'DC.date.issued'}, 'content'),
+    ('time', {}, 'datetime'),
+]
+
+def legacy_parse(html: str) -> tuple[str, str | None, str]:
+    soup = BeautifulSoup(html, "lxml")
+    title = ""
+    if soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    ogt = soup.find("meta", {"property": "og:title"})
+    if ogt and ogt.get("content"):
+        title = ogt["content"].strip() or title
+    published_at = None
+    for tag, attrs, attr_name in _LEGACY_DATE_CANDIDATES:
+        el = soup.find(tag, attrs=attrs)
+        if el and el.get(attr_name):
+            published_at = el.get(attr_name)
+            break
+    text = extract_readable_text(html)
+    return title, published_at, text
+
+def single_parse(html: str) -> tuple[str, str | None, str]:
+    # the parse/extract part of core.scrape._parse_page, without its spans and langdetect
+    tree = load_html(html)
+    if tree is None:
+        return "", None, ""
+    title, published_at = extract_head_metadata(tree)
+    return title, published_at, extract_readable_text(tree)
+
+def _measure(fn, html: str, repeat: int) -> tuple[float, float]:
+    fn(html)  # warm caches/imports
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    per_page_ms = (time.perf_counter() - t0) * 1000.0 / repeat
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_page_ms, peak / 1024.0
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--html-dir", default=os.path.join(os.path.dirname(__file__), "fixtures", "html"))
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.html_dir, "*.html")))
+    if not paths:
+        raise SystemExit(f"no *.html fixtures in {args.html_dir}")
+
+    print(f"{'fixture':<28}{'KB':>8}{'old ms':>10}{'new ms':>10}{'old KiB':>10}{'new KiB':>10}  same")
+    tot_old = tot_new = 0.0
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        old_ms, old_kib = _measure(legacy_parse, html, args.repeat)
+        new_ms, new_kib = _measure(single_parse, html, args.repeat)
+        tot_old += old_ms
+        tot_new += new_ms
+
+        old, new = legacy_parse(html), single_parse(html)
+        same = old == new
+        print(f"{os.path.basename(path):<28}{len(html) / 1024:>8.1f}{old_ms:>10.2f}{new_ms:>10.2f}"
+              f"{old_kib:>10.0f}{new_kib:>10.0f}  {'yes' if same else 'NO'}")
+
+    n = len(paths)
+    print(f"{'mean':<28}{'':>8}{tot_old / n:>10.2f}{tot_new / n:>10.2f}")
+
+if __name__ == "__main__":
+    main()
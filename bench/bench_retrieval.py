@@ -0,0 +1,88 @@
+"""
+First-stage chunk selection benchmark: keyword counting (select_top_chunks +
+NLI_MIN_KEYWORD_MATCH gate) against BM25 retrieval (core/retrieval.py). Every
+claim is checked against all fixture pages (pages of other claims act as
+distractors). Reports NLI candidates per claim, recall of labelled relevant
+chunks among the candidates and selection time.
+
+    python -m bench.bench_retrieval [--claims bench/fixtures/retrieval.jsonl] [--html-dir bench/fixtures/html]
+                                    [--top-k 8] [--min-score 1.0] [--chunks-per-page 6] [--repeat 20]
+
+Claims are {"claim": str, "relevant": [substring, ...]} lines; a chunk is
+relevant when it contains one of the substrings.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from core.config import Config, get_cfg
+from core.scrape import extract_readable_text
+from core.utils import keywords_from_claim, select_top_chunks, split_to_chunks
+from core.verify import _page_evidence, _plan_nli, _retrieve_evidence
+
+def _keyword_candidates(pages, claim, chunks_per_page, cfg):
+    kws = keywords_from_claim(claim)
+    kw_min = int(cfg.get("NLI_MIN_KEYWORD_MATCH", 2))
+    out = []
+    for page in pages:
+        _, eligible = _page_evidence(page, select_top_chunks(page["text"], claim, top_n=chunks_per_page), kws, kw_min)
+        out.extend(eligible)
+    return _plan_nli(out, cfg)
+
+def _bm25_candidates(pages, claim, chunks_per_page, cfg):
+    _, eligible = _retrieve_evidence(pages, claim, chunks_per_page, cfg)
+    return _plan_nli(eligible, cfg)
+
+def main() -> None:
+    here = os.path.dirname(__file__)
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--claims", default=os.path.join(here, "fixtures", "retrieval.jsonl"))
+    ap.add_argument("--html-dir", default=os.path.join(here, "fixtures", "html"))
+    ap.add_argument("--top-k", type=int, default=None, help="default: RETRIEVER_TOP_K")
+    ap.add_argument("--min-score", type=float, default=None, help="default: RETRIEVER_MIN_SCORE")
+    ap.add_argument("--chunks-per-page", type=int, default=6)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    overrides = {"NLI_ADAPTIVE": False}
+    if args.top_k is not None:
+        overrides["RETRIEVER_TOP_K"] = args.top_k
+    if args.min_score is not None:
+        overrides["RETRIEVER_MIN_SCORE"] = args.min_score
+    cfg = Config({**get_cfg(), **overrides})
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.html_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = extract_readable_text(f.read())
+        name = os.path.basename(path)
+        pages.append({"url": f"http://bench.local/{name}", "domain": "bench.local", "title": name,
+                      "published_at": None, "language": None, "text": text})
+    with open(args.claims, "r", encoding="utf-8") as f:
+        claims = [json.loads(line) for line in f if line.strip()]
+    all_chunks = [ch for page in pages for ch in split_to_chunks(page["text"], max_chars=500)]
+    print(f"pages={len(pages)} chunks={len(all_chunks)} claims={len(claims)} top_k={cfg.get('RETRIEVER_TOP_K', 8)} "
+          f"min_score={cfg.get('RETRIEVER_MIN_SCORE', 1.0)}")
+
+    print(f"{'retriever':<10}{'nli/claim':>11}{'recall':>9}{'precision':>11}{'ms/claim':>10}")
+    for name, fn in (("keyword", _keyword_candidates), ("bm25", _bm25_candidates)):
+        sent = found = relevant = 0
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for c in claims:
+                fn(pages, c["claim"], args.chunks_per_page, cfg)
+        ms = (time.perf_counter() - t0) * 1000.0 / (args.repeat * len(claims))
+
+        for c in claims:
+            is_rel = lambda ch: any(s in ch for s in c["relevant"])
+            picked = {item["chunk"] for item in fn(pages, c["claim"], args.chunks_per_page, cfg)}
+            sent += len(picked)
+            found += sum(1 for ch in picked if is_rel(ch))
+            relevant += sum(1 for ch in all_chunks if is_rel(ch))
+        n = len(claims)
+        print(f"{name:<10}{sent / n:>11.2f}{found / max(1, relevant):>9.2f}{found / max(1, sent):>11.2f}{ms:>10.3f}")
+
+if __name__ == "__main__":
+    main()
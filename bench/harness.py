@@ -0,0 +1,415 @@
+"""
+Offline replay harness for the whole verify pipeline. Claims of a recorded
+corpus run end to end with search (core.search._serper_request) and page
+downloads (core.scrape._http_get) answered from the corpus, so nothing goes
+over the network and runs are repeatable. Reports end-to-end and per-stage
+latency percentiles, throughput, peak RSS, NLI work per claim and score
+drift against a golden file; exits 1 on drift beyond --tolerance, on failed
+claims or on a slowdown against --baseline, so it can gate a deploy.
+
+    python -m bench.harness [--corpus bench/corpus] [--mode sync|async|batch] [--concurrency 4]
+                            [--repeat 1] [--tolerance 1.0] [--baseline report.json] [--out report.json]
+                            [--set KEY=VALUE ...] [--update-golden] [--require-golden]
+
+The drift check only runs once the corpus has a golden.jsonl. The bundled
+bench/corpus is a small synthetic smoke corpus (example.org pages) and
+ships without one, since its scores must come from a reviewed run with the
+pinned NLI model: run with --update-golden, review and commit the file, and
+gate with --require-golden so a missing golden file fails the run.
+
+Record a corpus from the live services (needs network and SERPER_API_KEY):
+
+    python -m bench.harness --record claims.txt --corpus bench/my_corpus
+
+Corpus layout:
+    claims.jsonl                 {"id": str, "claim": str}
+    serper/<sha1(query)>.json    raw Serper response
+    pages/<sha1(url)>.json       {"url", "status", "headers"}; body in pages/<sha1(url)>.html
+                                 ({"url", "rejected", "detail"} for a body _http_get refused)
+    golden.jsonl                 {"id", "claim", "score", "unique_domains"} (written by --update-golden
+                                 from a reviewed run with the configured NLI model)
+URLs missing from the corpus fail like an unreachable host.
+
+Search, page, claim and NLI memo caches, the evidence store and domain
+health are switched off so every run does the full work (--memo keeps the
+NLI memo), and the model runs in-process; --set overrides any config key
+afterwards.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import core.scrape as scrape
+import core.search as search
+from core.batch import iter_verify_batch
+from core.config import get_cfg
+from core.metrics import STAGE_SECONDS
+from core.nli import FORWARD_BATCH, warmup_nli
+from core.rescore import _parse_value
+from core.verify import NLI_REQUEST_BATCH, averify_claim_pipeline, verify_claim_pipeline
+
+# same parameters as the /api/verify routes
+PIPELINE_PARAMS = {"search_k": 20, "fetch_k": 10, "chunks_per_page": 6}
+
+_OVERRIDES = {
+    "SEARCH_CACHE_ENABLED": False,
+    "PAGE_CACHE_ENABLED": False,
+    "CLAIM_CACHE_ENABLED": False,
+    "NLI_MEMO_ENABLED": False,
+    "EVIDENCE_STORE_ENABLED": False,
+    "DOMAIN_HEALTH_ENABLED": False,
+    "NLI_SERVER_ADDRESS": "",
+    "DEBUG_NUMERIC_ONLY": False,
+}
+
+def _key(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+def _percentiles(values: List[float]) -> Dict[str, float | None]:
+    vals = sorted(values)
+    pick = lambda q: vals[min(len(vals) - 1, int(q * len(vals)))] if vals else None
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": vals[-1] if vals else None}
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+# ---- corpus ----
+
+class Corpus:
+    def __init__(self, root: str):
+        self.root = root
+
+    def claims(self) -> List[Tuple[str, str]]:
+        with open(os.path.join(self.root, "claims.jsonl"), "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [(str(r.get("id", i)), r["claim"]) for i, r in enumerate(rows)]
+
+    def serper(self, query: str) -> dict:
+        path = os.path.join(self.root, "serper", f"{_key(query)}.json")
+        if not os.path.exists(path):
+            raise search.SearchError(f"query not in corpus: {query!r}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def page(self, url: str, timeout: float = 15, headers: dict | None = None) -> scrape.Download:
+        base = os.path.join(self.root, "pages", _key(url))
+        if not os.path.exists(base + ".json"):
+            raise requests.ConnectionError(f"url not in corpus: {url}")
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("rejected"):
+            raise scrape.PageRejected(meta["rejected"], meta.get("detail", ""))
+        status = int(meta.get("status", 200))
+        if status >= 400:
+            r = requests.Response()
+            r.url, r.status_code = meta.get("url", url), status
+            r.raise_for_status()
+        with open(base + ".html", "rb") as f:
+            content = f.read()
+        return scrape.Download(meta.get("url", url), status, CaseInsensitiveDict(meta.get("headers") or {}), content)
+
+    def save_serper(self, query: str, data: dict) -> None:
+        os.makedirs(os.path.join(self.root, "serper"), exist_ok=True)
+        with open(os.path.join(self.root, "serper", f"{_key(query)}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def save_page(self, url: str, d: scrape.Download) -> None:
+        os.makedirs(os.path.join(self.root, "pages"), exist_ok=True)
+        base = os.path.join(self.root, "pages", _key(url))
+        keep = {k: v for k, v in d.headers.items() if k.lower() in ("content-type", "last-modified", "etag")}
+        with open(base + ".html", "wb") as f:
+            f.write(d.content)
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "status": d.status_code, "headers": keep}, f)
+
+    def save_rejected(self, url: str, e: scrape.PageRejected) -> None:
+        os.makedirs(os.path.join(self.root, "pages"), exist_ok=True)
+        with open(os.path.join(self.root, "pages", f"{_key(url)}.json"), "w", encoding="utf-8") as f:
+            json.dump({"url": url, "rejected": e.reason, "detail": str(e).partition(": ")[2]}, f)
+
+    def golden(self) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(self.root, "golden.jsonl")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return {r["id"]: r for r in (json.loads(line) for line in f if line.strip())}
+
+    def save_golden(self, results: Dict[str, Dict[str, Any]]) -> None:
+        with open(os.path.join(self.root, "golden.jsonl"), "w", encoding="utf-8") as f:
+            for cid, res in results.items():
+                f.write(json.dumps({"id": cid, "claim": res["claim"], "score": res["score"],
+                                    "unique_domains": res["unique_domains"]}, ensure_ascii=False) + "\n")
+
+def _record_hooks(corpus: Corpus) -> None:
+    serper_request, http_get = search._serper_request, scrape._http_get
+
+    def recording_serper(query: str) -> dict:
+        data = serper_request(query)
+        corpus.save_serper(query, data)
+        return data
+
+    def recording_get(url: str, timeout: float = 15, headers: dict | None = None) -> scrape.Download:
+        try:
+            d = http_get(url, timeout=timeout, headers=headers)
+        except requests.HTTPError as e:
+            if e.response is not None:
+                # _http_get never reads an error body
+                corpus.save_page(url, scrape.Download(url, e.response.status_code, e.response.headers, b""))
+            raise
+        except scrape.PageRejected as e:
+            corpus.save_rejected(url, e)
+            raise
+        corpus.save_page(url, d)
+        return d
+
+    search._serper_request = recording_serper
+    scrape._http_get = recording_get
+
+def _replay_hooks(corpus: Corpus) -> None:
+    search._serper_request = corpus.serper
+    scrape._http_get = corpus.page
+
+# ---- measurement ----
+
+class Probe:
+    """
+    Raw samples of the pipeline's own metrics (stage spans, NLI forward
+    batches, per-request NLI batches) for percentiles instead of buckets.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.forward_pairs = 0
+        self.forward_passes = 0
+        self.nli_requests = 0
+        self._lock = threading.Lock()
+        self._hook(STAGE_SECONDS, self._stage)
+        self._hook(FORWARD_BATCH, self._forward)
+        self._hook(NLI_REQUEST_BATCH, self._request)
+
+    @staticmethod
+    def _hook(metric, fn) -> None:
+        orig = metric.observe
+
+        def observe(value: float, **labels) -> None:
+            fn(value, labels)
+            orig(value, **labels)
+        metric.observe = observe
+
+    def _stage(self, value: float, labels: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stages.setdefault(str(labels.get("stage")), []).append(value)
+
+    def _forward(self, value: float, labels: Dict[str, Any]) -> None:
+        with self._lock:
+            self.forward_pairs += int(value)
+            self.forward_passes += 1
+
+    def _request(self, value: float, labels: Dict[str, Any]) -> None:
+        with self._lock:
+            self.nli_requests += 1
+
+def _run(claims: List[Tuple[str, str]], mode: str, concurrency: int) -> Tuple[Dict[str, Dict[str, Any]], List[float], List[str]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def one(item: Tuple[str, str]) -> None:
+        cid, claim = item
+        t0 = time.perf_counter()
+        try:
+            results[cid] = verify_claim_pipeline(claim, **PIPELINE_PARAMS)
+            latencies.append(time.perf_counter() - t0)
+        except Exception as e:
+            errors.append(f"{cid}: {e}")
+
+    async def run_async() -> None:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def aone(cid: str, claim: str) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    results[cid] = await averify_claim_pipeline(claim, **PIPELINE_PARAMS)
+                    latencies.append(time.perf_counter() - t0)
+                except Exception as e:
+                    errors.append(f"{cid}: {e}")
+        await asyncio.gather(*(aone(cid, claim) for cid, claim in claims))
+
+    if mode == "sync":
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            list(pool.map(one, claims))
+    elif mode == "async":
+        asyncio.run(run_async())
+    else:
+        # one window per BATCH_WINDOW_CLAIMS; per-claim latency is not defined
+        for rec in iter_verify_batch(claims, **PIPELINE_PARAMS):
+            if "error" in rec:
+                errors.append(f"{rec['id']}: {rec['error']}")
+            else:
+                results[rec["id"]] = rec
+    return results, latencies, errors
+
+def _drift(results: Dict[str, Dict[str, Any]], golden: Dict[str, Dict[str, Any]], tolerance: float) -> Dict[str, Any]:
+    deltas = []
+    for cid, gold in golden.items():
+        res = results.get(cid)
+        if res is not None:
+            deltas.append((abs(res["score"] - gold["score"]), cid, gold["score"], res["score"],
+                           res["unique_domains"] != gold.get("unique_domains")))
+    deltas.sort(reverse=True)
+    n = max(1, len(deltas))
+    return {
+        "compared": len(deltas),
+        "missing": sorted(set(golden) - set(results)),
+        "mean_abs": sum(d[0] for d in deltas) / n,
+        "max_abs": deltas[0][0] if deltas else 0.0,
+        "over_tolerance": [{"id": cid, "golden": g, "score": s} for d, cid, g, s, _ in deltas if d > tolerance],
+        "domains_changed": sum(1 for d in deltas if d[4]),
+    }
+
+def main() -> None:
+    here = os.path.dirname(__file__)
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=os.path.join(here, "corpus"))
+    ap.add_argument("--mode", choices=("sync", "async", "batch"), default="sync")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=1, help="passes over the corpus (latencies of all passes)")
+    ap.add_argument("--tolerance", type=float, default=1.0, help="max |score - golden| before failing")
+    ap.add_argument("--baseline", default=None, help="earlier --out report to compare latency against")
+    ap.add_argument("--max-slowdown", type=float, default=1.25, help="allowed e2e p50 ratio (throughput ratio in batch mode) against --baseline")
+    ap.add_argument("--out", default=None, help="write the report as JSON")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override one key (JSON value)")
+    ap.add_argument("--memo", action="store_true", help="keep the NLI memo on")
+    ap.add_argument("--update-golden", action="store_true", help="write this run's scores as the golden file")
+    ap.add_argument("--require-golden", action="store_true", help="fail when the corpus has no golden file")
+    ap.add_argument("--record", default=None, metavar="CLAIMS_TXT",
+                    help="run claims (one per line) against the live services and store the corpus")
+    args = ap.parse_args()
+
+    corpus = Corpus(args.corpus)
+    overrides = dict(_OVERRIDES)
+    if args.memo:
+        overrides.pop("NLI_MEMO_ENABLED")
+    for item in args.set:
+        key, _, raw = item.partition("=")
+        overrides[key] = _parse_value(raw)
+    # every core module reads the config through get_cfg, so a temp file is enough
+    cfg_path = os.path.join(tempfile.mkdtemp(prefix="factcheck-bench-"), "config.json")
+    with open(cfg_path, "w", encoding="utf-8") as f:
+        json.dump({**get_cfg(), **overrides}, f, ensure_ascii=False)
+    os.environ["FACTCHECK_CONFIG"] = cfg_path
+
+    if args.record:
+        with open(args.record, "r", encoding="utf-8") as f:
+            claims = [(str(i), line.strip()) for i, line in enumerate(f) if line.strip()]
+        os.makedirs(corpus.root, exist_ok=True)
+        with open(os.path.join(corpus.root, "claims.jsonl"), "w", encoding="utf-8") as f:
+            for cid, claim in claims:
+                f.write(json.dumps({"id": cid, "claim": claim}, ensure_ascii=False) + "\n")
+        _record_hooks(corpus)
+    else:
+        claims = corpus.claims()
+        _replay_hooks(corpus)
+
+    t0 = time.perf_counter()
+    warmup_nli()
+    load_sec = time.perf_counter() - t0
+    rss_loaded = _rss_mb()
+
+    probe = Probe()
+    latencies: List[float] = []
+    errors: List[str] = []
+    results: Dict[str, Dict[str, Any]] = {}
+    t0 = time.perf_counter()
+    for _ in range(max(1, args.repeat)):
+        results, lat, err = _run(claims, args.mode, args.concurrency)
+        latencies.extend(lat)
+        errors.extend(err)
+    wall = time.perf_counter() - t0
+    runs = len(claims) * max(1, args.repeat)
+
+    report: Dict[str, Any] = {
+        "corpus": corpus.root,
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "claims": len(claims),
+        "runs": runs,
+        "errors": errors,
+        "nli_load_sec": round(load_sec, 3),
+        "wall_sec": round(wall, 3),
+        "claims_per_min": round(60.0 * runs / max(1e-9, wall), 2),
+        "e2e_sec": _percentiles(latencies),
+        "stages_sec": {stage: {"n": len(v), **_percentiles(v)} for stage, v in sorted(probe.stages.items())},
+        "nli_pairs_per_claim": round(probe.forward_pairs / max(1, runs), 2),
+        "nli_forward_passes_per_claim": round(probe.forward_passes / max(1, runs), 2),
+        "nli_requests_per_claim": round(probe.nli_requests / max(1, runs), 2),
+        "rss_after_load_mb": round(rss_loaded, 1),
+        "rss_peak_mb": round(_rss_mb(), 1),
+    }
+
+    failed = bool(errors)
+    if args.record or args.update_golden:
+        corpus.save_golden(results)
+        print(f"[HARNESS] golden written for {len(results)} claims", file=sys.stderr)
+    else:
+        golden = corpus.golden()
+        if golden:
+            report["drift"] = _drift(results, golden, args.tolerance)
+            failed = failed or bool(report["drift"]["over_tolerance"] or report["drift"]["missing"])
+        else:
+            print("[HARNESS] no golden.jsonl in the corpus, drift not checked; review a run and record it "
+                  "with --update-golden", file=sys.stderr)
+            failed = failed or args.require_golden
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        slowdown = None
+        base_p50, p50 = (base.get("e2e_sec") or {}).get("p50"), report["e2e_sec"]["p50"]
+        base_rate, rate = base.get("claims_per_min"), report["claims_per_min"]
+        if base_p50 and p50:
+            slowdown = p50 / base_p50
+        elif base_rate and rate:
+            # batch mode has no per-claim latency: compare throughput instead
+            slowdown = base_rate / rate
+        if slowdown is not None:
+            report["slowdown_vs_baseline"] = round(slowdown, 3)
+            failed = failed or slowdown > args.max_slowdown
+
+    fmt = lambda v: "-" if v is None else f"{v * 1000:.1f}"
+    print(f"{'stage':<22}{'n':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, st in [("e2e", {"n": len(latencies), **report["e2e_sec"]})] + list(report["stages_sec"].items()):
+        print(f"{stage:<22}{st['n']:>7}{fmt(st['p50']):>10}{fmt(st['p90']):>10}{fmt(st['p99']):>10}{fmt(st['max']):>10}")
+    print(f"claims={runs} wall={report['wall_sec']:.2f}s claims/min={report['claims_per_min']:.1f} "
+          f"nli_pairs/claim={report['nli_pairs_per_claim']} forward_passes/claim={report['nli_forward_passes_per_claim']} "
+          f"rss_peak={report['rss_peak_mb']:.0f}MB errors={len(errors)}")
+    if "drift" in report:
+        d = report["drift"]
+        print(f"drift: compared={d['compared']} mean|d|={d['mean_abs']:.2f} max|d|={d['max_abs']:.2f} "
+              f"over_tolerance={len(d['over_tolerance'])} missing={len(d['missing'])} domains_changed={d['domains_changed']}")
+        for row in d["over_tolerance"][:10]:
+            print(f"  {row['id']}: golden={row['golden']} now={row['score']}")
+    if "slowdown_vs_baseline" in report:
+        print(f"slowdown vs baseline: x{report['slowdown_vs_baseline']}")
+    for err in errors[:10]:
+        print(f"  error {err}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
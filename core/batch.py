@@ -0,0 +1,257 @@
+"""
+Bulk claim verification for offline jobs (e.g. re-scoring after a
+DOMAIN_WEIGHTS change). Claims are processed in windows of
+BATCH_WINDOW_CLAIMS: searches run concurrently, every URL planned by any claim
+in the window is fetched once (failed pages are replaced from each claim's
+fetch plan in further rounds), and the NLI pairs of all claims are packed into
+one length-sorted run of BATCH_NLI_BATCH_SIZE batches. Search, page and NLI
+caches are the same ones the API uses. NLI_ADAPTIVE only changes the chunk
+order before the NLI_MAX_CHUNKS_TOTAL cap here; there is no early exit.
+
+    python -m core.batch claims.jsonl [-o results.jsonl] [--search-k 20] [--fetch-k 10] [--chunks-per-page 6]
+
+Input lines are {"id": ..., "claim": "..."} objects (id defaults to the line
+number) or plain text. Results are appended to the output as JSONL after every
+window, and a rerun skips ids that already have a result there, so an
+interrupted job resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from core.config import get_cfg
+from core.metrics import span
+from core.nli import nli_support_contradict_pairs
+from core.fetch_plan import plan_fetches
+from core.scrape import iter_fetch_pages
+from core.search import search_serper
+from core.utils import keywords_from_claim
+from core.verify import CLAIMS, _add_nli_result, _final_result, _page_evidence, _plan_nli, _retrieve_evidence, _select_chunks
+
+def _search_all(claims: List[str], search_k: int, workers: int) -> List[List[Dict[str, Any]] | Exception]:
+    def one(claim: str):
+        try:
+            return search_serper(claim, k=search_k)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(claims))), thread_name_prefix="batch-search") as pool:
+        return list(pool.map(one, claims))
+
+def _verify_window(
+    window: List[Tuple[str, str]],
+    search_k: int,
+    fetch_k: int,
+    chunks_per_page: int,
+    cfg: Dict[str, Any],
+    dbg: bool = False
+) -> List[Dict[str, Any]]:
+    claims = [claim for _, claim in window]
+
+    # 1. search, all claims at once
+    with span("batch_search"):
+        searched = _search_all(claims, search_k, int(cfg.get("BATCH_SEARCH_WORKERS", 8)))
+
+    # 2. fetch in rounds: each claim asks for as many of its next planned
+    # candidates as it still lacks usable pages; every URL is fetched once
+    plans = [[] if isinstance(res, Exception) else plan_fetches(res, claim, fetch_k, cfg)
+             for claim, res in zip(claims, searched)]
+    pages: Dict[str, Dict[str, Any]] = {}
+    tried = [0] * len(plans)
+    deadline_at = time.monotonic() + float(cfg.get("BATCH_FETCH_DEADLINE_SEC", 120.0))
+    rounds = 0
+    with span("batch_fetch"):
+        while time.monotonic() < deadline_at:
+            urls: List[str] = []
+            seen: Set[str] = set()
+            for c, plan in enumerate(plans):
+                usable = sum(1 for r in plan[:tried[c]] if pages.get(r["link"], {}).get("ok"))
+                want = fetch_k - usable
+                while want > 0 and tried[c] < len(plan):
+                    link = plan[tried[c]]["link"]
+                    tried[c] += 1
+                    if link in pages:
+                        want -= bool(pages[link].get("ok"))
+                        continue
+                    want -= 1
+                    if link not in seen:
+                        seen.add(link)
+                        urls.append(link)
+            if not urls:
+                break
+            rounds += 1
+            for idx, page in iter_fetch_pages(
+                urls,
+                max_workers=int(cfg.get("BATCH_FETCH_MAX_WORKERS", 32)),
+                deadline_sec=max(0.0, deadline_at - time.monotonic()),
+                timeout=float(cfg.get("FETCH_TIMEOUT_SEC", 15.0)),
+            ):
+                pages[urls[idx]] = page
+    # the first fetch_k usable pages of each plan, in plan order
+    picked: List[List[Dict[str, Any]]] = []
+    for c, plan in enumerate(plans):
+        links = [r for r in plan[:tried[c]] if pages.get(r["link"], {}).get("ok")]
+        picked.append(links[:fetch_k])
+    if dbg:
+        print(f"[BATCH] claims={len(window)} rounds={rounds} fetched={len(pages)} "
+              f"ok={sum(1 for p in pages.values() if p.get('ok'))}")
+
+    # 3. per-claim evidence and NLI plan, in search-rank order
+    kw_min = int(cfg.get("NLI_MIN_KEYWORD_MATCH", 2))
+    states: List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]] = []
+    bm25 = str(cfg.get("CHUNK_RETRIEVER", "keyword")).lower() == "bm25"
+    for claim, links in zip(claims, picked):
+        fetched = [pages[r["link"]] for r in links]
+        if bm25:
+            evidence, all_chunks = _retrieve_evidence(fetched, claim, chunks_per_page, cfg, dbg)
+        else:
+            kws = keywords_from_claim(claim)
+            evidence, all_chunks = [], []
+            for page in fetched:
+                with span("chunk_select"):
+                    chunks = _select_chunks(page["text"], claim, chunks_per_page, cfg)
+                ev, eligible = _page_evidence(page, chunks, kws, kw_min, dbg)
+                evidence.append(ev)
+                all_chunks.extend(eligible)
+        states.append((evidence, all_chunks, _plan_nli(all_chunks, cfg, dbg)))
+
+    # 4. one packed NLI run over the pairs of every claim
+    pairs = [(item["chunk"], claim) for claim, (_, _, planned) in zip(claims, states) for item in planned]
+    with span("nli"):
+        scores = nli_support_contradict_pairs(pairs, batch_size=int(cfg.get("BATCH_NLI_BATCH_SIZE", 64)))
+    if dbg:
+        print(f"[BATCH] nli_pairs={len(pairs)}")
+
+    # 5-12. per-claim aggregation and scoring
+    out: List[Dict[str, Any]] = []
+    pos = 0
+    for (claim_id, claim), res, (evidence, all_chunks, planned) in zip(window, searched, states):
+        if isinstance(res, Exception):
+            out.append({"id": claim_id, "claim": claim, "error": str(res)})
+            continue
+        per_source: Dict[str, Dict[str, Any]] = {}
+        for item, (ent, contra, neut) in zip(planned, scores[pos:pos + len(planned)]):
+            _add_nli_result(per_source, item, ent, contra, neut, dbg)
+        pos += len(planned)
+        result = _final_result(claim, evidence, per_source, all_chunks, len(planned), cfg, dbg)
+        CLAIMS.inc(mode="batch")
+        out.append({"id": claim_id, **result})
+    return out
+
+def iter_verify_batch(
+    items: Iterable[Tuple[str, str]],
+    search_k: int = 20,
+    fetch_k: int = 10,
+    chunks_per_page: int = 6
+) -> Iterator[Dict[str, Any]]:
+    """
+    Verifies (id, claim) pairs and yields one record per claim, in input order:
+    {"id", **verify_claim_pipeline result} or {"id", "claim", "error"} when the
+    search for that claim failed.
+    """
+    cfg = get_cfg()
+    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
+    size = max(1, int(cfg.get("BATCH_WINDOW_CLAIMS", 32)))
+    window: List[Tuple[str, str]] = []
+    for item in items:
+        window.append(item)
+        if len(window) >= size:
+            yield from _verify_window(window, search_k, fetch_k, chunks_per_page, cfg, dbg)
+            window = []
+    if window:
+        yield from _verify_window(window, search_k, fetch_k, chunks_per_page, cfg, dbg)
+
+def read_claims(path: str) -> List[Tuple[str, str]]:
+    items: List[Tuple[str, str]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                obj = json.loads(line)
+                claim_id, claim = str(obj.get("id", lineno)), str(obj.get("claim", "")).strip()
+            else:
+                claim_id, claim = str(lineno), line
+            if claim:
+                items.append((claim_id, claim))
+    return items
+
+def done_ids(path: str) -> Set[str]:
+    """
+    Ids that already have a successful result in an output file (the checkpoint).
+    """
+    ids: Set[str] = set()
+    if not os.path.exists(path):
+        return ids
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted run
+            if "error" not in rec and "id" in rec:
+                ids.add(str(rec["id"]))
+    return ids
+
+def drop_torn_line(path: str) -> None:
+    """
+    Cuts a torn last line (run interrupted mid-write) off an output file, so
+    appended records start on a line of their own and the claim is redone.
+    Works on bytes: text-mode tell() values are opaque, and a torn multibyte
+    character would not decode.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 65536)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b"\n")
+            if i >= 0:
+                f.truncate(start + i + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("claims")
+    ap.add_argument("-o", "--output", default=None, help="default: <claims>.results.jsonl")
+    ap.add_argument("--search-k", type=int, default=20)
+    ap.add_argument("--fetch-k", type=int, default=10)
+    ap.add_argument("--chunks-per-page", type=int, default=6)
+    args = ap.parse_args()
+
+    output = args.output or os.path.splitext(args.claims)[0] + ".results.jsonl"
+    items = read_claims(args.claims)
+    drop_torn_line(output)
+    skip = done_ids(output)
+    todo = [(i, c) for i, c in items if i not in skip]
+    print(f"[BATCH] claims={len(items)} done={len(items) - len(todo)} todo={len(todo)} -> {output}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    n = errors = 0
+    with open(output, "a", encoding="utf-8") as out:
+        for rec in iter_verify_batch(todo, args.search_k, args.fetch_k, args.chunks_per_page):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            n += 1
+            errors += "error" in rec
+            if n % 10 == 0 or n == len(todo):
+                rate = n * 60.0 / max(1e-9, time.perf_counter() - t0)
+                print(f"[BATCH] {n}/{len(todo)} errors={errors} {rate:.1f} claims/min", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
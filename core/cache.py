@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with an optional TTL and an optional on-disk SQLite tier.
+    ttl_sec None keeps entries until they are evicted; ttl_sec <= 0 disables the
+    cache (set stores nothing, every get is a miss).
+    The memory tier holds at most max_items entries (and, when sizeof is given,
+    at most max_bytes as measured by sizeof); the SQLite tier (enabled by
+    db_path, values must be JSON-serializable) survives restarts and is shared by
+    every process pointing at the same file. It keeps at most db_max_items rows
+    and, with db_max_bytes, at most that many bytes of serialized values; both
+    are enforced every 100 sets, oldest entries first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_items: int = 1024,
+        ttl_sec: float | None = None,
+        db_path: str | None = None,
+        db_max_items: int | None = None,
+        db_max_bytes: int | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
+        self.name = name
+        self.max_items = max(1, int(max_items))
+        self.ttl_sec = None if ttl_sec is None else float(ttl_sec)
+        self.enabled = self.ttl_sec is None or self.ttl_sec > 0
+        self.db_path = db_path or None
+        self.db_max_items = int(db_max_items) if db_max_items else self.max_items * 10
+        self.db_max_bytes = int(db_max_bytes) if db_max_bytes else None
+        self.max_bytes = int(max_bytes) if max_bytes and sizeof else None
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sets = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if self.db_path:
+            self._init_db()
+
+    # ---- sqlite tier ----
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        parent = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(parent, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " name TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " PRIMARY KEY (name, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (name, stored_at)")
+        conn.commit()
+
+    def _db_get(self, key: str) -> Tuple[Any, float] | None:
+        try:
+            row = self._conn().execute(
+                "SELECT value, stored_at FROM cache WHERE name = ? AND key = ?", (self.name, key)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), float(row[1])
+
+    def _db_set(self, items: Sequence[Tuple[str, Any]], stored_at: float, prune: bool) -> None:
+        # one transaction (one commit) for all items
+        try:
+            conn = self._conn()
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (name, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                [(self.name, key, json.dumps(value, ensure_ascii=False), stored_at) for key, value in items],
+            )
+            if prune:
+                self._db_prune(conn)
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _db_prune(self, conn: sqlite3.Connection) -> None:
+        if self.ttl_sec is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE name = ? AND stored_at < ?", (self.name, time.time() - self.ttl_sec)
+            )
+        conn.execute(
+            "DELETE FROM cache WHERE name = ? AND key NOT IN ("
+            " SELECT key FROM cache WHERE name = ? ORDER BY stored_at DESC LIMIT ?)",
+            (self.name, self.name, self.db_max_items),
+        )
+        if self.db_max_bytes:
+            conn.execute(
+                "DELETE FROM cache WHERE name = ? AND key IN ("
+                " SELECT key FROM (SELECT key, SUM(LENGTH(CAST(value AS BLOB))) OVER"
+                "  (ORDER BY stored_at DESC, rowid DESC) AS total FROM cache WHERE name = ?)"
+                " WHERE total > ?)",
+                (self.name, self.name, self.db_max_bytes),
+            )
+
+    def _db_delete(self, key: str | None = None) -> None:
+        try:
+            conn = self._conn()
+            if key is None:
+                conn.execute("DELETE FROM cache WHERE name = ?", (self.name,))
+            else:
+                conn.execute("DELETE FROM cache WHERE name = ? AND key = ?", (self.name, key))
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    # ---- public api ----
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl_sec is None or (time.time() - stored_at) <= self.ttl_sec
+
+    def _size(self, value: Any) -> int:
+        return self._sizeof(value) if self.max_bytes else 0
+
+    def _remember(self, key: str, value: Any, stored_at: float) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= self._size(old[0])
+        self._data[key] = (value, stored_at)
+        self._bytes += self._size(value)
+        while len(self._data) > self.max_items or (
+            self.max_bytes and self._bytes > self.max_bytes and len(self._data) > 1
+        ):
+            _, (evicted, _) = self._data.popitem(last=False)
+            self._bytes -= self._size(evicted)
+            self._evictions += 1
+
+    def get_stale(self, key: str) -> Tuple[Any, float] | None:
+        """
+        Returns (value, age_sec) ignoring the TTL, or None. Does not touch counters.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None and self.db_path:
+            entry = self._db_get(key)
+        if entry is None:
+            return None
+        return entry[0], time.time() - entry[1]
+
+    def get_with_age(self, key: str) -> Tuple[Any, float] | None:
+        """
+        Returns (value, age_sec) for a fresh entry, or None on a miss.
+        """
+        with self._lock:
+            entry = self._data.get(key) if self.enabled else None
+            if entry is not None and self._fresh(entry[1]):
+                self._data.move_to_end(key)
+                self._hits += 1
+                return entry[0], time.time() - entry[1]
+        if self.db_path and self.enabled:
+            entry = self._db_get(key)
+            if entry is not None and self._fresh(entry[1]):
+                with self._lock:
+                    self._remember(key, entry[0], entry[1])
+                    self._disk_hits += 1
+                return entry[0], time.time() - entry[1]
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        hit = self.get_with_age(key)
+        return default if hit is None else hit[0]
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Sequence[Tuple[str, Any]]) -> None:
+        """
+        Stores several entries; the SQLite tier writes them in one transaction.
+        """
+        if not self.enabled or not items:
+            return
+        stored_at = time.time()
+        with self._lock:
+            before = self._sets
+            for key, value in items:
+                self._remember(key, value, stored_at)
+            self._sets += len(items)
+            prune = before // 100 != self._sets // 100
+        if self.db_path:
+            self._db_set(items, stored_at, prune)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(old[0])
+        if self.db_path:
+            self._db_delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self.db_path:
+            self._db_delete()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "size": len(self._data),
+                "max_items": self.max_items,
+                "bytes": self._bytes if self.max_bytes else None,
+                "max_bytes": self.max_bytes,
+                "ttl_sec": self.ttl_sec,
+                "enabled": self.enabled,
+                "persistent": bool(self.db_path),
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,161 @@
+"""
+Offset-based chunking and keyword scoring for long page texts.
+
+Sentences and chunks are (start, end) spans into the original string; chunk
+text is only built for the chunks that are returned, and top chunks are
+picked with a heap instead of sorting every chunk.
+Output is identical to the previous split/score/sort implementation: a chunk
+is its sentences joined by single spaces, its score is the number of distinct
+keywords it contains (case-insensitive substrings), ties keep page order.
+"""
+import heapq
+import re
+from bisect import bisect_left
+from typing import Iterator, List, Sequence, Tuple
+
+Span = Tuple[int, int]
+
+# Candidate sentence ends. A leading character class lets the regex engine
+# skip ahead quickly; the separator rules of the old
+# re.split(r'(?<=[.!?])\s+|\n+') + strip() are applied per candidate:
+# a newline always splits, . ! ? only when whitespace follows.
+_SENT_END = re.compile(r"[.!?\n]\s*")
+
+def _bounds(text: str, lo: int, hi: int) -> Span:
+    while lo < hi and text[lo].isspace():
+        lo += 1
+    while hi > lo and text[hi - 1].isspace():
+        hi -= 1
+    return lo, hi
+
+def _iter_sentences(text: str, lo: int = 0, hi: int | None = None) -> Iterator[Span]:
+    lo, hi = _bounds(text, lo, len(text) if hi is None else hi)
+    if lo == hi:
+        return
+    pos = lo
+    for m in _SENT_END.finditer(text, lo, hi):
+        start, stop = m.span()
+        if text[start] == "\n":
+            end = start
+            while text[end - 1].isspace():
+                end -= 1
+        elif stop > start + 1:
+            end = start + 1
+        else:
+            continue  # "3.5", "who.int": no whitespace after the mark
+        yield pos, end
+        pos = stop
+    yield pos, hi
+
+def sentence_spans(text: str) -> List[Span]:
+    """
+    Non-empty, whitespace-trimmed sentences as (start, end) offsets.
+    """
+    return list(_iter_sentences(text))
+
+def chunk_spans(text: str, max_chars: int = 500) -> List[Span]:
+    """
+    Greedy packing of consecutive sentences into chunks whose space-joined
+    length is at most max_chars (a longer sentence is a chunk on its own), as
+    (start of first sentence, end of last sentence) offsets.
+    """
+    spans: List[Span] = []
+    start = end = 0
+    size = 0
+    for s, e in _iter_sentences(text):
+        n = e - s
+        if size + n <= max_chars:
+            if size == 0:
+                start, size = s, n
+            else:
+                size += 1 + n
+        else:
+            if size:
+                spans.append((start, end))
+            start, size = s, n
+        end = e
+    if size:
+        spans.append((start, end))
+    return spans
+
+def chunk_text(text: str, span: Span) -> str:
+    """
+    The chunk at span with its sentences joined by single spaces.
+    """
+    return " ".join(text[s:e] for s, e in _iter_sentences(text, span[0], span[1]))
+
+def token_windows(text: str, starts: Sequence[int], ends: Sequence[int], max_tokens: int) -> List[Tuple[Span, Span]]:
+    """
+    Greedy packing of consecutive sentences into windows of at most
+    max_tokens tokens, given the (sorted) character offsets of the page's
+    tokens; a longer sentence is cut at max_tokens. Returns (token range,
+    trimmed character span) per window; every token belongs to one window.
+    """
+    n = len(starts)
+    if n == 0 or max_tokens <= 0:
+        return []
+    # sentence k owns the tokens from its first one up to the next sentence's
+    bounds = sorted({bisect_left(starts, s) for s, _ in _iter_sentences(text)} | {0})
+    bounds = [b for b in bounds if b < n] + [n]
+    out: List[Tuple[Span, Span]] = []
+
+    def emit(lo: int, hi: int) -> None:
+        cs, ce = _bounds(text, starts[lo], ends[hi - 1])
+        if cs < ce:
+            out.append(((lo, hi), (cs, ce)))
+
+    lo = 0
+    for b0, b1 in zip(bounds, bounds[1:]):
+        if b1 - lo <= max_tokens:
+            continue
+        if b0 > lo:
+            emit(lo, b0)
+            lo = b0
+        while b1 - lo > max_tokens:
+            emit(lo, lo + max_tokens)
+            lo += max_tokens
+    if lo < n:
+        emit(lo, n)
+    return out
+
+class KeywordMatcher:
+    """
+    Distinct-keyword counts over regions of one text. Each region is lowercased
+    on its own (a 500-char slice), which keeps the peak allocation small even
+    for long non-ASCII pages where lowercasing the whole text at once is not.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = [k for k in keywords if k]
+
+    def score(self, text: str) -> int:
+        lc = text.lower()
+        return sum(1 for kw in self.keywords if kw in lc)
+
+    def score_regions(self, text: str, spans: Sequence[Span]) -> List[int]:
+        if not self.keywords:
+            return [0] * len(spans)
+        kws = self.keywords
+        return [sum(1 for kw in kws if kw in lc) for lc in (text[s:e].lower() for s, e in spans)]
+
+def top_chunks(text: str, keywords: Sequence[str], top_n: int = 8, max_chars: int = 500,
+               spans: Sequence[Span] | None = None) -> List[str]:
+    """
+    The top_n chunks by distinct keyword count (ties in page order), only
+    chunks with at least one keyword; the first top_n chunks if none has any.
+    With precomputed spans (e.g. token windows) chunks are the raw slices.
+    """
+    raw = spans is not None
+    if spans is None:
+        spans = chunk_spans(text, max_chars)
+    if not spans or top_n <= 0:
+        return []
+    scores = KeywordMatcher(keywords).score_regions(text, spans)
+    hits = [i for i, sc in enumerate(scores) if sc > 0]
+    if hits:
+        picked = heapq.nlargest(top_n, hits, key=lambda i: (scores[i], -i))
+    else:
+        picked = range(min(top_n, len(spans)))
+    if raw:
+        return [text[spans[i][0]:spans[i][1]] for i in picked]
+    return [chunk_text(text, spans[i]) for i in picked]
@@ -0,0 +1,229 @@
+"""
+Claim-level result cache with single-flight coalescing.
+
+Finished verify results are cached on (config fingerprint, pipeline params,
+normalized claim) for CLAIM_CACHE_TTL_SEC, in memory and in SQLite
+(CLAIM_CACHE_DB_PATH) so every worker process shares them; a TTL of 0 turns
+the cache off. While a claim is being verified, identical requests in the
+same process wait for that run instead of starting their own. Results come
+back with "cached" (served from the cache), "coalesced" (shared a run in
+progress), "cache_age_sec" and "verified_at" so clients can show their age.
+A waiter gives up after CLAIM_COALESCE_TIMEOUT_SEC (the leader's client may
+have stalled) and verifies the claim itself.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Tuple
+
+from core.cache import TTLCache
+from core.config import get_cfg
+from core.metrics import cache_samples, counter, register_collector
+from core.utils import normalize_text_key
+from core.verify import averify_claim_pipeline, iter_verify_claim_pipeline
+
+_cache: TTLCache | None = None
+_cache_lock = threading.Lock()
+
+# key -> Future of the run in progress
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+COALESCED = counter("factcheck_claims_coalesced_total", "Verify requests that waited on an identical run in progress")
+COALESCE_TIMEOUTS = counter("factcheck_claims_coalesce_timeouts_total", "Coalesced requests that stopped waiting and ran the pipeline themselves")
+
+def _get_cache() -> TTLCache | None:
+    global _cache
+    cfg = get_cfg()
+    if not bool(cfg.get("CLAIM_CACHE_ENABLED", True)):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTLCache(
+                    "claims",
+                    max_items=int(cfg.get("CLAIM_CACHE_MAX_ITEMS", 1024)),
+                    ttl_sec=float(cfg.get("CLAIM_CACHE_TTL_SEC", 900)),
+                    db_path=cfg.get("CLAIM_CACHE_DB_PATH") or None,
+                )
+    return _cache
+
+def claim_cache_stats() -> dict:
+    return _cache.stats() if _cache is not None else {"enabled": False}
+
+register_collector(lambda: cache_samples("claims", claim_cache_stats()))
+
+def _coalesce_timeout() -> float:
+    return float(get_cfg().get("CLAIM_COALESCE_TIMEOUT_SEC", 120))
+
+def claim_key(claim: str, search_k: int, fetch_k: int, chunks_per_page: int) -> str:
+    return f"{get_cfg().fingerprint()}:{search_k}:{fetch_k}:{chunks_per_page}:{normalize_text_key(claim)}"
+
+def _tagged(result: Dict[str, Any], cached: bool, age: float = 0.0, coalesced: bool = False) -> Dict[str, Any]:
+    return {**result, "cached": cached, "coalesced": coalesced, "cache_age_sec": round(age, 1)}
+
+def _store(key: str, result: Dict[str, Any]) -> None:
+    # an empty result is usually a transient search/fetch failure: don't pin it
+    cache = _get_cache()
+    if cache is not None and result.get("sources"):
+        cache.set(key, result)
+
+def _cached(key: str) -> Dict[str, Any] | None:
+    cache = _get_cache()
+    if cache is not None:
+        hit = cache.get_with_age(key)
+        if hit is not None:
+            return _tagged(hit[0], True, hit[1])
+    return None
+
+def _join(key: str) -> Tuple[Future, bool]:
+    """
+    The in-flight future for key and whether the caller is its leader (and
+    must run the pipeline and resolve it).
+    """
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        if fut is not None:
+            COALESCED.inc()
+            return fut, False
+        fut = _inflight[key] = Future()
+        return fut, True
+
+def _lookup(key: str) -> Tuple[Dict[str, Any] | None, Future | None, bool]:
+    """
+    (cached result, None, False) on a hit; otherwise (None, *_join(key)).
+    """
+    hit = _cached(key)
+    if hit is not None:
+        return hit, None, False
+    return (None, *_join(key))
+
+def _release(key: str, fut: Future, result: Dict[str, Any] | None, error: BaseException | None) -> None:
+    with _inflight_lock:
+        if _inflight.get(key) is fut:
+            del _inflight[key]
+    if not fut.done():
+        if result is not None:
+            fut.set_result(result)
+        else:
+            # cancellation / GeneratorExit of the leader must not cancel the waiters
+            fut.set_exception(error if isinstance(error, Exception) else RuntimeError("verification was abandoned"))
+
+def _finish(key: str, fut: Future, result: Dict[str, Any] | None, error: BaseException | None) -> None:
+    try:
+        if result is not None:
+            _store(key, result)
+    finally:
+        # the waiters are released even when storing the result fails
+        _release(key, fut, result, error)
+
+def _tagged_events(claim: str, search_k: int, fetch_k: int, chunks_per_page: int,
+                   progress: bool) -> Iterator[Dict[str, Any]]:
+    # uncoalesced run outside the single-flight (a waiter that timed out)
+    for event in iter_verify_claim_pipeline(claim, search_k, fetch_k, chunks_per_page, progress):
+        if event["event"] == "result":
+            event = {"event": "result", "result": _tagged(event["result"], False)}
+        yield event
+
+async def averify_claim_cached(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3,
+    on_event: Callable[[Dict[str, Any]], None] | None = None
+) -> Dict[str, Any]:
+    """
+    averify_claim_pipeline behind the claim cache and single-flight. on_event
+    gets the stage events of a run this request makes itself (see
+    aiter_verify_claim_cached). Cache reads and writes (SQLite when
+    CLAIM_CACHE_DB_PATH is set) run on the default executor, off the loop.
+    """
+    loop = asyncio.get_running_loop()
+    key = claim_key(claim, search_k, fetch_k, chunks_per_page)
+    hit = await loop.run_in_executor(None, _cached, key)
+    if hit is not None:
+        return hit
+    fut, leader = _join(key)
+    if not leader:
+        try:
+            # shield: a timed-out waiter must not cancel the leader's future
+            shared = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), _coalesce_timeout())
+            return _tagged(shared, False, coalesced=True)
+        except asyncio.TimeoutError:
+            COALESCE_TIMEOUTS.inc()
+            return _tagged(await averify_claim_pipeline(claim, search_k, fetch_k, chunks_per_page, on_event), False)
+    result = error = None
+    try:
+        result = await averify_claim_pipeline(claim, search_k, fetch_k, chunks_per_page, on_event)
+        return _tagged(result, False)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        try:
+            if result is not None:
+                await loop.run_in_executor(None, _store, key, result)
+        finally:
+            _release(key, fut, result, error)
+
+async def aiter_verify_claim_cached(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    averify_claim_cached as a stream of the events iter_verify_claim_cached
+    yields with progress: stage events as the async pipeline produces them,
+    then "result". A hit or a coalesced request yields only the result.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(averify_claim_cached(claim, search_k, fetch_k, chunks_per_page, events.put_nowait))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        yield {"event": "result", "result": task.result()}
+    finally:
+        # a client that disconnects mid-stream abandons the run; waiters get an error
+        task.cancel()
+
+def iter_verify_claim_cached(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3,
+    progress: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    iter_verify_claim_pipeline behind the claim cache and single-flight. A hit
+    or a coalesced request yields only the final "result" event; a waiter that
+    times out streams its own run.
+    """
+    key = claim_key(claim, search_k, fetch_k, chunks_per_page)
+    hit, fut, leader = _lookup(key)
+    if hit is not None:
+        yield {"event": "result", "result": hit}
+        return
+    if not leader:
+        try:
+            shared = fut.result(timeout=_coalesce_timeout())
+        except FuturesTimeout:
+            COALESCE_TIMEOUTS.inc()
+            yield from _tagged_events(claim, search_k, fetch_k, chunks_per_page, progress)
+            return
+        yield {"event": "result", "result": _tagged(shared, False, coalesced=True)}
+        return
+    result = error = None
+    try:
+        for event in iter_verify_claim_pipeline(claim, search_k, fetch_k, chunks_per_page, progress):
+            if event["event"] == "result":
+                result = event["result"]
+                event = {"event": "result", "result": _tagged(result, False)}
+            yield event
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        # a client that disconnects mid-stream abandons the run; waiters get an error
+        _finish(key, fut, result, error)
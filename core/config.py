@@ -1,6 +1,9 @@
+import hashlib
 import json
 import os
-from typing import Any, Dict
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
 
 _DEFAULTS: Dict[str, Any] = {
     "BASE_SCORE": 60.0,
@@ -20,20 +23,209 @@ _DEFAULTS: Dict[str, Any] = {
     "DOMAIN_WEIGHTS": {}
 }
 
-def _load_from_disk(path: str) -> Dict[str, Any]:
+# expected types of known scalar keys; values are coerced on load
+_TYPES: Dict[str, type] = {
+    "BASE_SCORE": float,
+    "COVERAGE_LOW_THRESHOLD": int,
+    "COVERAGE_HIGH_THRESHOLD": int,
+    "COVERAGE_LOW_FACTOR": float,
+    "COVERAGE_MID_FACTOR": float,
+    "COVERAGE_HIGH_FACTOR": float,
+    "BONUS_DOMAIN_SCALE": float,
+    "BONUS_RECENCY_SCALE": float,
+    "NLI_MAX_CHUNKS_TOTAL": int,
+    "FETCH_MAX_BYTES": int,
+    "FETCH_STOP_MIN_ARTICLE_BYTES": int,
+    "FETCH_PLAN_MAX_FETCHES": int,
+    "FETCH_PLAN_SPARE": int,
+    "DOMAIN_HEALTH_WINDOW": int,
+    "DOMAIN_TIMEOUT_MIN_SAMPLES": int,
+    "DOMAIN_TIMEOUT_MULTIPLIER": float,
+    "DOMAIN_TIMEOUT_MIN_SEC": float,
+    "DOMAIN_BREAKER_FAILURES": int,
+    "DOMAIN_BREAKER_COOLDOWN_SEC": float,
+    "CLAIM_COALESCE_TIMEOUT_SEC": float,
+    "EVIDENCE_STORE_MAX_MB": float,
+    "EVIDENCE_STORE_BACKUPS": int,
+    "NLI_MIN_KEYWORD_MATCH": int,
+    "CHUNK_MAX_TOKENS": int,
+    "RETRIEVER_TOP_K": int,
+    "RETRIEVER_MIN_SCORE": float,
+    "NLI_BATCH_SIZE": int,
+    "NLI_TORCH_THREADS": int,
+    "API_WORKERS": int,
+    "NLI_SCHEDULER_TIMEOUT_SEC": float,
+    "NLI_SERVER_WORKERS": int,
+    "NLI_SERVER_TIMEOUT_SEC": float,
+    "NLI_SERVER_RECV_TIMEOUT_SEC": float,
+    "BATCH_WINDOW_CLAIMS": int,
+    "BATCH_NLI_BATCH_SIZE": int,
+    "NLI_SUPPORT_SCALE": float,
+    "NLI_CONTRADICT_PENALTY": float,
+    "INCLUDE_NEUTRAL_AS": float,
+    "FINAL_BLEND_ALPHA": float,
+    "NLI_EXCERPT_THRESHOLD": float,
+    "NLI_MIN_SOURCE_CONF": float,
+    "NLI_SOURCE_MIN_IMPORTANCE": float,
+}
+
+class ConfigError(ValueError):
+    pass
+
+class Config(dict):
+    """
+    Validated configuration. Still a plain dict for cfg.get(...) callers, plus
+    lookups precomputed once per load for the scoring hot path:
+    exact + suffix domain weights and sorted recency thresholds.
+    Shared between requests, so treat it as read-only.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        super().__init__(data)
+        self._validate()
+        self._build_domain_index()
+        self._build_recency_index()
+
+    def _validate(self) -> None:
+        for key, typ in _TYPES.items():
+            if key not in self or self[key] is None:
+                continue
+            try:
+                self[key] = typ(self[key])
+            except (TypeError, ValueError) as e:
+                raise ConfigError(f"{key}: expected {typ.__name__}, got {self[key]!r}") from e
+        for key in ("DOMAIN_WEIGHTS", "SUFFIX_DEFAULTS"):
+            val = self.get(key) or {}
+            if not isinstance(val, dict):
+                raise ConfigError(f"{key}: expected an object")
+            try:
+                self[key] = {str(k): float(v) for k, v in val.items()}
+            except (TypeError, ValueError) as e:
+                raise ConfigError(f"{key}: weights must be numbers") from e
+        if not isinstance(self.get("RECENCY_BUCKETS", []), list):
+            raise ConfigError("RECENCY_BUCKETS: expected a list of [days, weight]")
+
+    def _build_domain_index(self) -> None:
+        self._domain_weights: Dict[str, float] = self.get("DOMAIN_WEIGHTS", {})
+        # suffix rules in config order; ".a.b" rules go into a reversed-label trie,
+        # anything else (no leading dot) is checked with endswith
+        self._suffix_trie: Dict[str, Any] = {}
+        self._suffix_other: List[Tuple[int, str, float]] = []
+        for order, (suffix, val) in enumerate(self.get("SUFFIX_DEFAULTS", {}).items()):
+            labels = suffix[1:].split(".") if suffix.startswith(".") else []
+            if not labels or not all(labels):
+                self._suffix_other.append((order, suffix, val))
+                continue
+            node = self._suffix_trie
+            for label in reversed(labels):
+                node = node.setdefault(label, {})
+            node[""] = (order, val)
+
+    def _build_recency_index(self) -> None:
+        # a bucket listed after a larger limit can never be reached first, so
+        # dropping it leaves strictly increasing limits with the same semantics
+        self._recency_limits: List[int] = []
+        self._recency_weights: List[float] = []
+        buckets = self.get("RECENCY_BUCKETS", []) or []
+        for item in buckets:
+            try:
+                limit, w = int(item[0]), float(item[1])
+            except Exception:
+                continue
+            if not self._recency_limits or limit > self._recency_limits[-1]:
+                self._recency_limits.append(limit)
+                self._recency_weights.append(w)
+        try:
+            self._recency_fallback = float(buckets[-1][1]) if buckets else 1.0
+        except Exception:
+            self._recency_fallback = 1.0
+
+    def fingerprint(self) -> str:
+        """
+        Short hash of every setting, for cache keys of results that depend on
+        the configuration; computed once per load.
+        """
+        fp = getattr(self, "_fingerprint", None)
+        if fp is None:
+            blob = json.dumps(self, sort_keys=True, ensure_ascii=False, default=str)
+            fp = self._fingerprint = hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+        return fp
+
+    def domain_weight(self, domain: str) -> float:
+        """
+        DOMAIN_WEIGHTS exact match, else the first SUFFIX_DEFAULTS entry (config
+        order) the domain ends with, else 1.0.
+        """
+        if not domain:
+            return 1.0
+        w = self._domain_weights.get(domain)
+        if w is not None:
+            return w
+
+        best: Tuple[int, float] | None = None
+        labels = domain.split(".")
+        node = self._suffix_trie
+        # a ".x.y" suffix needs at least one label in front of it
+        for label in reversed(labels[1:]):
+            node = node.get(label)
+            if node is None:
+                break
+            hit = node.get("")
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        for order, suffix, val in self._suffix_other:
+            if (best is None or order < best[0]) and domain.endswith(suffix):
+                best = (order, val)
+        return best[1] if best is not None else 1.0
+
+    def recency_weight_for_days(self, days: int) -> float:
+        i = bisect_left(self._recency_limits, days)
+        if i < len(self._recency_limits):
+            return self._recency_weights[i]
+        return self._recency_fallback
+
+def as_config(cfg: Dict[str, Any]) -> Config:
+    return cfg if isinstance(cfg, Config) else Config(cfg)
+
+def _load_from_disk(path: str) -> Config:
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     out = dict(_DEFAULTS)
     out.update(data or {})
-    return out
+    return Config(out)
 
-def get_cfg() -> Dict[str, Any]:
+_cached: Config | None = None
+_cached_key: Tuple[str, int | None, int | None] | None = None
+_lock = threading.Lock()
+
+def get_cfg() -> Config:
     """
-    Loads configuration from JSON file each call.
-    Path is taken from env FACTCHECK_CONFIG or defaults to ./config.json
+    Returns the current configuration, loaded once and re-read only when the
+    file's mtime/size changes (so scoring weights hot-reload without a restart).
+    Path is taken from env FACTCHECK_CONFIG or defaults to ./config.json.
+    A file that fails to parse or validate keeps the last good config.
     """
+    global _cached, _cached_key
     path = os.getenv("FACTCHECK_CONFIG", "config.json")
     try:
-        return _load_from_disk(path)
-    except Exception:
-        return dict(_DEFAULTS)
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = (path, None, None)
+    if _cached is not None and key == _cached_key:
+        return _cached
+
+    with _lock:
+        if _cached is not None and key == _cached_key:
+            return _cached
+        try:
+            cfg = _load_from_disk(path)
+        except Exception as e:
+            keep = _cached is not None and _cached_key is not None and _cached_key[0] == path and key[1] is not None
+            if keep:
+                print(f"[CONFIG] reload of {path} failed, keeping previous: {e}")
+                cfg = _cached
+            else:
+                cfg = Config(dict(_DEFAULTS))
+        _cached, _cached_key = cfg, key
+        return cfg
@@ -0,0 +1,365 @@
+"""
+Per-domain fetch health: success rate, latency percentiles and failure
+reasons of recent network fetches, an adaptive per-domain timeout and a
+circuit breaker.
+
+State lives in SQLite (DOMAIN_HEALTH_DB_PATH, WAL mode) so every request and
+every worker process pointing at the same file shares it; with an empty path
+it is kept in a per-process in-memory database. Reads are served from a
+per-domain snapshot refreshed every DOMAIN_HEALTH_REFRESH_SEC.
+
+Breaker: DOMAIN_BREAKER_FAILURES unusable fetches in a row open it for
+DOMAIN_BREAKER_COOLDOWN_SEC, during which fetch_page skips the domain
+(reason "circuit_open"). After the cooldown a single probe fetch is let
+through (half-open); success closes the breaker, failure reopens it.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+from core.config import get_cfg
+from core.metrics import register_collector
+
+def _percentile(sorted_vals: List[float], q: float) -> float | None:
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+def _round(v: float | None) -> float | None:
+    return None if v is None else round(v, 3)
+
+class DomainHealth:
+    """
+    Shared per-domain fetch registry. All methods are thread-safe and never
+    raise on database errors (health tracking must not break fetching).
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        window: int = 50,
+        max_age_sec: float = 7 * 86400,
+        refresh_sec: float = 5.0,
+        breaker_failures: int = 5,
+        cooldown_sec: float = 600.0,
+        timeout_min_samples: int = 5,
+        timeout_multiplier: float = 2.0,
+        timeout_min_sec: float = 3.0,
+    ):
+        self.db_path = db_path or None
+        self.window = max(1, int(window))
+        self.max_age_sec = float(max_age_sec)
+        self.refresh_sec = float(refresh_sec)
+        self.breaker_failures = max(1, int(breaker_failures))
+        self.cooldown_sec = float(cooldown_sec)
+        self.timeout_min_samples = max(1, int(timeout_min_samples))
+        self.timeout_multiplier = float(timeout_multiplier)
+        self.timeout_min_sec = float(timeout_min_sec)
+        self._uri = None if self.db_path else f"file:domain_health_{id(self)}?mode=memory&cache=shared"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._writes = 0
+        self._init_db()
+
+    # ---- sqlite ----
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._uri:
+                conn = sqlite3.connect(self._uri, uri=True, timeout=5.0)
+            else:
+                conn = sqlite3.connect(self.db_path, timeout=5.0)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        else:
+            # keeps the shared in-memory database alive for the registry's lifetime
+            self._keepalive = self._conn()
+        conn = self._conn()
+        if self.db_path:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS domain_fetches ("
+            " domain TEXT NOT NULL, ts REAL NOT NULL, ok INTEGER NOT NULL, latency REAL, reason TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS domain_fetches_domain_ts ON domain_fetches (domain, ts)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS domain_breakers ("
+            " domain TEXT PRIMARY KEY, failures INTEGER NOT NULL, open_until REAL NOT NULL,"
+            " opened_total INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.commit()
+
+    # ---- writes ----
+
+    def record(self, domain: str, ok: bool, reason: str | None = None,
+               latency: float | None = None, breaker: bool = True) -> None:
+        """
+        One network fetch outcome. ok means the page was usable; latency is
+        the network time of a fetch that got a response. breaker=False keeps
+        the outcome out of the breaker (e.g. our own deadline cut it short).
+        """
+        if not domain:
+            return
+        now = time.time()
+        th = self.breaker_failures
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT INTO domain_fetches (domain, ts, ok, latency, reason) VALUES (?, ?, ?, ?, ?)",
+                (domain, now, int(ok), latency, None if ok else (reason or "unknown").split(":")[0]),
+            )
+            if ok:
+                conn.execute(
+                    "INSERT INTO domain_breakers (domain, failures, open_until) VALUES (?, 0, 0)"
+                    " ON CONFLICT(domain) DO UPDATE SET failures = 0, open_until = 0",
+                    (domain,),
+                )
+            elif breaker:
+                conn.execute(
+                    "INSERT INTO domain_breakers (domain, failures, open_until, opened_total)"
+                    " VALUES (?, 1, CASE WHEN 1 >= ? THEN ? ELSE 0 END, CASE WHEN 1 >= ? THEN 1 ELSE 0 END)"
+                    " ON CONFLICT(domain) DO UPDATE SET"
+                    "  open_until = CASE WHEN failures + 1 >= ? THEN ? ELSE open_until END,"
+                    "  opened_total = opened_total + (CASE WHEN failures + 1 = ? THEN 1 ELSE 0 END),"
+                    "  failures = failures + 1",
+                    (domain, th, now + self.cooldown_sec, th, th, now + self.cooldown_sec, th),
+                )
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % 200 == 0
+                self._snapshots.pop(domain, None)
+            if prune:
+                conn.execute("DELETE FROM domain_fetches WHERE ts < ?", (now - self.max_age_sec,))
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def allow(self, domain: str, probe_sec: float = 15.0) -> bool:
+        """
+        False while the domain's breaker is open. Once the cooldown is over,
+        exactly one caller (across processes) gets True as the probe; the
+        breaker stays blocked for others for probe_sec or until it reports.
+        """
+        if not domain:
+            return True
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT failures, open_until FROM domain_breakers WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row is None or row[0] < self.breaker_failures:
+                return True
+            if row[1] > now:
+                return False
+            cur = conn.execute(
+                "UPDATE domain_breakers SET open_until = ? WHERE domain = ? AND open_until <= ?",
+                (now + probe_sec, domain, now),
+            )
+            conn.commit()
+            return cur.rowcount == 1
+        except sqlite3.Error:
+            return True
+
+    # ---- reads ----
+
+    def _load(self, domain: str) -> Dict[str, Any]:
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT ok, latency, reason FROM domain_fetches WHERE domain = ? AND ts >= ?"
+            " ORDER BY ts DESC LIMIT ?",
+            (domain, time.time() - self.max_age_sec, self.window),
+        ).fetchall()
+        brk = conn.execute(
+            "SELECT failures, open_until, opened_total FROM domain_breakers WHERE domain = ?", (domain,)
+        ).fetchone() or (0, 0.0, 0)
+        lat = sorted(r[1] for r in rows if r[1] is not None)
+        reasons: Dict[str, int] = {}
+        for r in rows:
+            if not r[0]:
+                reasons[r[2] or "unknown"] = reasons.get(r[2] or "unknown", 0) + 1
+        return {
+            "domain": domain,
+            "fetches": len(rows),
+            "ok": sum(r[0] for r in rows),
+            "latencies": lat,
+            "reasons": reasons,
+            "consecutive_failures": int(brk[0]),
+            "open_until": float(brk[1]),
+            "opened_total": int(brk[2]),
+        }
+
+    def _snapshot(self, domain: str) -> Dict[str, Any] | None:
+        now = time.monotonic()
+        with self._lock:
+            snap = self._snapshots.get(domain)
+        if snap is not None and now - snap["_loaded"] < self.refresh_sec:
+            return snap
+        try:
+            snap = self._load(domain)
+        except sqlite3.Error:
+            return snap
+        snap["_loaded"] = now
+        with self._lock:
+            if len(self._snapshots) > 4096:
+                self._snapshots.clear()
+            self._snapshots[domain] = snap
+        return snap
+
+    def success_rate(self, domain: str, prior: float = 0.8, prior_weight: float = 2.0) -> float:
+        """
+        Smoothed share of recent fetches that produced a usable page; unseen
+        domains get the prior.
+        """
+        snap = self._snapshot(domain)
+        ok, total = (snap["ok"], snap["fetches"]) if snap else (0, 0)
+        return (ok + prior * prior_weight) / (total + prior_weight)
+
+    def timeout(self, domain: str, cap: float) -> float:
+        """
+        DOMAIN_TIMEOUT_MULTIPLIER x the domain's p90 latency, clamped to
+        [DOMAIN_TIMEOUT_MIN_SEC, cap]; cap until enough samples exist.
+        """
+        snap = self._snapshot(domain)
+        if not snap or len(snap["latencies"]) < self.timeout_min_samples:
+            return cap
+        p90 = _percentile(snap["latencies"], 0.9)
+        return min(cap, max(self.timeout_min_sec, p90 * self.timeout_multiplier))
+
+    def is_open(self, domain: str) -> bool:
+        snap = self._snapshot(domain)
+        return bool(snap) and snap["consecutive_failures"] >= self.breaker_failures and snap["open_until"] > time.time()
+
+    def state(self, domain: str, cap: float = 15.0) -> Dict[str, Any]:
+        snap = self._snapshot(domain) or self._empty(domain)
+        now = time.time()
+        lat = snap["latencies"]
+        if snap["consecutive_failures"] < self.breaker_failures:
+            breaker = "closed"
+        elif snap["open_until"] > now:
+            breaker = "open"
+        else:
+            breaker = "half_open"
+        return {
+            "domain": domain,
+            "fetches": snap["fetches"],
+            "ok": snap["ok"],
+            "success_rate": round(self.success_rate(domain), 3),
+            "latency_p50": _round(_percentile(lat, 0.5)),
+            "latency_p90": _round(_percentile(lat, 0.9)),
+            "latency_p99": _round(_percentile(lat, 0.99)),
+            "timeout_sec": round(self.timeout(domain, cap), 2),
+            "failure_reasons": snap["reasons"],
+            "consecutive_failures": snap["consecutive_failures"],
+            "breaker": breaker,
+            "open_for_sec": round(max(0.0, snap["open_until"] - now), 1) if breaker == "open" else 0.0,
+            "opened_total": snap["opened_total"],
+        }
+
+    @staticmethod
+    def _empty(domain: str) -> Dict[str, Any]:
+        return {"domain": domain, "fetches": 0, "ok": 0, "latencies": [], "reasons": {},
+                "consecutive_failures": 0, "open_until": 0.0, "opened_total": 0}
+
+    def report(self, limit: int = 100, cap: float = 15.0) -> List[Dict[str, Any]]:
+        """
+        state() of the most fetched domains plus every open breaker, open
+        breakers first, then by ascending success rate.
+        """
+        try:
+            conn = self._conn()
+            busy = conn.execute(
+                "SELECT domain FROM domain_fetches WHERE ts >= ? GROUP BY domain ORDER BY COUNT(*) DESC LIMIT ?",
+                (time.time() - self.max_age_sec, int(limit)),
+            ).fetchall()
+            broken = conn.execute(
+                "SELECT domain FROM domain_breakers WHERE failures >= ?", (self.breaker_failures,)
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        domains = list(dict.fromkeys([r[0] for r in broken] + [r[0] for r in busy]))
+        states = [self.state(d, cap) for d in domains]
+        states.sort(key=lambda s: (s["breaker"] == "closed", s["success_rate"]))
+        return states
+
+    def open_count(self) -> int:
+        try:
+            row = self._conn().execute(
+                "SELECT COUNT(*) FROM domain_breakers WHERE failures >= ? AND open_until > ?",
+                (self.breaker_failures, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return 0
+        return int(row[0])
+
+_registry: DomainHealth | None = None
+_registry_lock = threading.Lock()
+
+def get_domain_health() -> DomainHealth | None:
+    global _registry
+    cfg = get_cfg()
+    if not bool(cfg.get("DOMAIN_HEALTH_ENABLED", True)):
+        return None
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = DomainHealth(
+                    db_path=cfg.get("DOMAIN_HEALTH_DB_PATH") or None,
+                    window=int(cfg.get("DOMAIN_HEALTH_WINDOW", 50)),
+                    max_age_sec=float(cfg.get("DOMAIN_HEALTH_MAX_AGE_SEC", 7 * 86400)),
+                    refresh_sec=float(cfg.get("DOMAIN_HEALTH_REFRESH_SEC", 5.0)),
+                    breaker_failures=int(cfg.get("DOMAIN_BREAKER_FAILURES", 5)),
+                    cooldown_sec=float(cfg.get("DOMAIN_BREAKER_COOLDOWN_SEC", 600.0)),
+                    timeout_min_samples=int(cfg.get("DOMAIN_TIMEOUT_MIN_SAMPLES", 5)),
+                    timeout_multiplier=float(cfg.get("DOMAIN_TIMEOUT_MULTIPLIER", 2.0)),
+                    timeout_min_sec=float(cfg.get("DOMAIN_TIMEOUT_MIN_SEC", 3.0)),
+                )
+    return _registry
+
+def record_fetch(domain: str, ok: bool, reason: str | None = None,
+                 latency: float | None = None, breaker: bool = True) -> None:
+    health = get_domain_health()
+    if health is not None:
+        health.record(domain, ok, reason, latency, breaker)
+
+def domain_success_rate(domain: str) -> float:
+    health = get_domain_health()
+    return health.success_rate(domain) if health is not None else 0.8
+
+def domain_timeout(domain: str, cap: float) -> float:
+    health = get_domain_health()
+    if health is None or not bool(get_cfg().get("DOMAIN_TIMEOUT_ADAPTIVE", True)):
+        return cap
+    return health.timeout(domain, cap)
+
+def domain_allowed(domain: str, probe_sec: float = 15.0) -> bool:
+    health = get_domain_health()
+    return health.allow(domain, probe_sec) if health is not None else True
+
+def domain_open(domain: str) -> bool:
+    health = get_domain_health()
+    return health.is_open(domain) if health is not None else False
+
+def domain_health_report(limit: int = 100) -> Dict[str, Any]:
+    health = get_domain_health()
+    if health is None:
+        return {"enabled": False}
+    cap = float(get_cfg().get("FETCH_TIMEOUT_SEC", 15.0))
+    return {"enabled": True, "persistent": bool(health.db_path), "domains": health.report(limit, cap)}
+
+def _health_samples():
+    health = _registry
+    if health is None:
+        return []
+    return [("factcheck_domain_breakers_open", "gauge", "Domains whose fetch circuit breaker is open", {},
+             health.open_count())]
+
+register_collector(_health_samples)
@@ -0,0 +1,162 @@
+"""
+Compact per-claim evidence records: everything steps 6-12 of the pipeline
+need (sources, their chunks, per-chunk NLI probabilities) so a verdict can be
+recomputed under another config without search, fetch or NLI (core/rescore.py).
+
+Record layout (one JSON object per line in EVIDENCE_STORE_PATH):
+
+    {"v": 1, "claim": str, "verified_at": ISO-8601 UTC, "score": float,
+     "eligible": int,                      # chunks that passed the keyword gate
+     "evidence": [{url, domain, title, published_at, language, chunks}, ...],
+     "nli": [[evidence_idx, chunk_idx, entail, contra, neutral], ...]}
+
+"nli" rows are grouped by source in first-evaluated order and keep the
+evaluation order within a source, which is what the aggregation depends on.
+
+Records are appended by a background writer thread, so request handlers never
+wait on the disk. The file is rotated once it would grow past
+EVIDENCE_STORE_MAX_MB (path -> path.1 -> ... -> path.N, N =
+EVIDENCE_STORE_BACKUPS); readers go through the backups oldest first.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+from core.utils import normalize_text_key
+
+RECORD_VERSION = 1
+
+# (path, line, max_bytes, backups, debug) waiting for the writer thread
+_pending: "queue.Queue[Tuple[str, str, int, int, bool]]" = queue.Queue(maxsize=10000)
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+def build_evidence_record(
+    claim: str,
+    evidence: List[Dict[str, Any]],
+    per_source: Dict[str, Dict[str, Any]],
+    eligible: int,
+    now: datetime | None = None
+) -> Dict[str, Any]:
+    ev_index = {ev["url"]: i for i, ev in enumerate(evidence)}
+    rows: List[List[Any]] = []
+    for url, rec in per_source.items():
+        i = ev_index.get(url)
+        if i is None:
+            continue
+        chunks = evidence[i]["chunks"]
+        for chunk, ent, contra, neut in rec.get("chunk_probs", []):
+            rows.append([i, chunks.index(chunk), ent, contra, neut])
+    return {
+        "v": RECORD_VERSION,
+        "claim": claim,
+        "verified_at": (now or datetime.now(timezone.utc)).isoformat(),
+        "eligible": eligible,
+        "evidence": [
+            {k: ev.get(k) for k in ("url", "domain", "title", "published_at", "language", "chunks")}
+            for ev in evidence
+        ],
+        "nli": rows,
+    }
+
+def _rotate(path: str, backups: int) -> None:
+    if backups <= 0:
+        os.remove(path)
+        return
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def _write(path: str, line: str, max_bytes: int, backups: int) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if max_bytes and size and size + len(line.encode("utf-8")) > max_bytes:
+        _rotate(path, backups)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+def _writer_loop() -> None:
+    while True:
+        path, line, max_bytes, backups, dbg = _pending.get()
+        try:
+            _write(path, line, max_bytes, backups)
+        except OSError as e:
+            if dbg:
+                print(f"[EVIDENCE] store write failed: {e}")
+        finally:
+            _pending.task_done()
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_writer_loop, name="evidence-writer", daemon=True)
+                _writer.start()
+
+def save_evidence_record(record: Dict[str, Any], cfg: Dict[str, Any]) -> None:
+    """
+    Queues the record for the writer thread; drops it (the store is a
+    best-effort log) when the writer is too far behind.
+    """
+    if not bool(cfg.get("EVIDENCE_STORE_ENABLED", False)):
+        return
+    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
+    item = (
+        str(cfg.get("EVIDENCE_STORE_PATH", ".cache/evidence.jsonl")),
+        json.dumps(record, ensure_ascii=False) + "\n",
+        int(float(cfg.get("EVIDENCE_STORE_MAX_MB", 100)) * 1024 * 1024),
+        int(cfg.get("EVIDENCE_STORE_BACKUPS", 3)),
+        dbg,
+    )
+    _ensure_writer()
+    try:
+        _pending.put_nowait(item)
+    except queue.Full:
+        if dbg:
+            print("[EVIDENCE] writer behind, record dropped")
+
+def flush_evidence_store() -> None:
+    """
+    Blocks until every queued record is on disk.
+    """
+    if _writer is not None:
+        _pending.join()
+
+atexit.register(flush_evidence_store)
+
+def _store_files(path: str) -> List[str]:
+    backups = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+def iter_evidence_records(path: str, latest_only: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Records from a store file and its rotated backups (oldest first); with
+    latest_only, one per normalized claim (the last one written), in order of
+    first appearance.
+    """
+    records: Dict[str, Dict[str, Any]] = {}
+    for file in _store_files(path):
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("v") != RECORD_VERSION:
+                    continue
+                if not latest_only:
+                    yield rec
+                    continue
+                # re-assigning keeps the key's original position
+                records[normalize_text_key(rec["claim"])] = rec
+    yield from records.values()
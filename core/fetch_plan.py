@@ -0,0 +1,190 @@
+"""
+Fetch planning: which search results to download and in what order.
+
+Every search result gets a priority from its rank, its domain weight
+(DOMAIN_WEIGHTS / SUFFIX_DEFAULTS), how many claim keywords its title+snippet
+contain and how often its domain produced a usable page recently (see
+core/domain_health.py; domains with an open circuit breaker are left out of
+the plan). Candidates are
+picked greedily with a penalty for domains already picked, so a trusted source
+ranked 15th can be fetched ahead of a weak one ranked 3rd, and coverage stays
+spread over domains.
+
+iter_fetch_planned then downloads candidates in plan order, only as many at a
+time as are still needed (plus FETCH_PLAN_SPARE hedges), and replaces failures
+with the next candidate until fetch_k pages are usable. The pages used for
+scoring are always the first fetch_k usable ones in plan order, so the result
+does not depend on which download happened to finish first.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterator, List, Sequence, Tuple
+
+from core.config import as_config
+from core.domain_health import domain_open, domain_success_rate, record_fetch
+from core.scrape import _failed_page, count_page_failure, domain_of, fetch_page
+from core.utils import keywords_from_claim, score_chunk_by_keywords
+
+def plan_fetches(results: List[Dict[str, Any]], claim: str, fetch_k: int, cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Search results to fetch, best first. With FETCH_PLAN_ENABLED off this is
+    the first fetch_k results in search rank order (no replacements).
+    """
+    if not bool(cfg.get("FETCH_PLAN_ENABLED", True)):
+        return results[:fetch_k]
+
+    cfg = as_config(cfg)
+    w_rank = float(cfg.get("FETCH_PLAN_W_RANK", 1.0))
+    w_domain = float(cfg.get("FETCH_PLAN_W_DOMAIN", 2.0))
+    w_snippet = float(cfg.get("FETCH_PLAN_W_SNIPPET", 1.0))
+    w_success = float(cfg.get("FETCH_PLAN_W_SUCCESS", 1.0))
+    repeat_pen = float(cfg.get("FETCH_PLAN_REPEAT_PENALTY", 0.3))
+    max_fetches = max(fetch_k, int(cfg.get("FETCH_PLAN_MAX_FETCHES", 16)))
+
+    kws = keywords_from_claim(claim)
+    n = max(1, len(results))
+    scored: List[Tuple[float, int, Dict[str, Any]]] = []
+    for i, res in enumerate(results):
+        if domain_open(res["domain"]):
+            continue  # breaker open: fetch_page would skip it anyway
+        rank_score = 1.0 - i / n
+        overlap = score_chunk_by_keywords(f"{res.get('title', '')} {res.get('snippet', '')}", kws) / max(1, len(kws))
+        priority = (
+            w_rank * rank_score
+            + w_domain * (cfg.domain_weight(res["domain"]) - 1.0)
+            + w_snippet * overlap
+            + w_success * domain_success_rate(res["domain"])
+        )
+        scored.append((priority, i, res))
+
+    planned: List[Dict[str, Any]] = []
+    picked_domains: Dict[str, int] = {}
+    remaining = scored
+    while remaining and len(planned) < max_fetches:
+        best = max(remaining, key=lambda t: (t[0] - repeat_pen * picked_domains.get(t[2]["domain"], 0), -t[1]))
+        remaining = [t for t in remaining if t is not best]
+        picked_domains[best[2]["domain"]] = picked_domains.get(best[2]["domain"], 0) + 1
+        planned.append({**best[2], "priority": round(best[0], 3)})
+    return planned
+
+def _usable_prefix(resolved: Dict[int, bool], n: int) -> int:
+    ok = 0
+    for i in range(n):
+        if i not in resolved:
+            break
+        ok += resolved[i]
+    return ok
+
+def iter_fetch_planned(
+    urls: Sequence[str],
+    need: int,
+    max_workers: int = 8,
+    deadline_sec: float | None = None,
+    timeout: float = 15,
+    spare: int = 0
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Fetches urls (in plan order) until the first need usable pages in that
+    order are known, yielding (index, page) as downloads finish. Downloads
+    still running at the deadline are yielded last as deadline_exceeded;
+    spares still running once enough pages are in are dropped.
+    """
+    if not urls or need <= 0:
+        return
+    if deadline_sec is not None:
+        timeout = min(timeout, deadline_sec)
+    t_end = None if deadline_sec is None else time.monotonic() + deadline_sec
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))), thread_name_prefix="fetch")
+    running: Dict[Any, int] = {}
+    resolved: Dict[int, bool] = {}
+    nxt = 0
+    usable = 0
+    enough = False
+    try:
+        while True:
+            while nxt < len(urls) and len(running) < max_workers and len(running) < need - usable + spare:
+                running[pool.submit(fetch_page, urls[nxt], timeout)] = nxt
+                nxt += 1
+            if not running:
+                break
+            remaining = None if t_end is None else t_end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in sorted(done, key=running.__getitem__):
+                i = running.pop(fut)
+                try:
+                    page = fut.result()
+                except Exception as e:
+                    count_page_failure("error")
+                    page = _failed_page(urls[i], f"error: {e}")
+                resolved[i] = bool(page.get("ok"))
+                usable += resolved[i]
+                yield i, page
+            if _usable_prefix(resolved, len(urls)) >= need:
+                enough = True
+                break
+        if not enough:
+            for fut in sorted(running, key=running.__getitem__):
+                i = running[fut]
+                count_page_failure("deadline_exceeded")
+                record_fetch(domain_of(urls[i]), False, "deadline_exceeded", breaker=False)
+                yield i, _failed_page(urls[i], "deadline_exceeded")
+    finally:
+        # don't block on stragglers; their own socket timeout ends them
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def aiter_fetch_planned(
+    urls: Sequence[str],
+    need: int,
+    max_workers: int = 8,
+    deadline_sec: float | None = None,
+    timeout: float = 15,
+    spare: int = 0,
+    executor: Executor | None = None
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    iter_fetch_planned for asyncio callers: the planner runs on a thread of
+    executor and its (index, page) events are handed over as they happen.
+    Leaving the loop early stops the planner at its next event.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce() -> None:
+        try:
+            for event in iter_fetch_planned(urls, need, max_workers, deadline_sec, timeout, spare):
+                loop.call_soon_threadsafe(events.put_nowait, event)
+                if stop.is_set():
+                    break
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, done)
+
+    producer = loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            event = await events.get()
+            if event is done:
+                break
+            yield event
+    finally:
+        stop.set()
+    await producer  # re-raises a planner error
+
+def select_planned(pages: Dict[int, Dict[str, Any]], need: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    The first need usable pages in plan order, as (index, page).
+    """
+    out: List[Tuple[int, Dict[str, Any]]] = []
+    for i in sorted(pages):
+        if pages[i].get("ok"):
+            out.append((i, pages[i]))
+            if len(out) >= need:
+                break
+    return out
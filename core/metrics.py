@@ -0,0 +1,150 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# seconds; covers sub-ms cache hits up to slow fetches
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, str, str, Dict[str, str], float]  # name, type, help, labels, value
+
+_lock = threading.Lock()
+_metrics: Dict[str, "Counter | Histogram"] = {}
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+def _key(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + body + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = _key(labels)
+        with _lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for k, v in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_fmt_labels(k)} {v:g}")
+        return lines
+
+    def snapshot(self) -> Dict[Labels, float]:
+        with _lock:
+            return dict(self._values)
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Labels, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels) -> None:
+        k = _key(labels)
+        with _lock:
+            row = self._values.get(k)
+            if row is None:
+                row = self._values[k] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        # copy under the lock: a first observe() of new labels resizes the dict
+        for k, row in sorted(self.snapshot().items()):
+            for b, c in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{_fmt_labels(k, (('le', f'{b:g}'),))} {c:g}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(k, (('le', '+Inf'),))} {row[-1]:g}")
+            lines.append(f"{self.name}_sum{_fmt_labels(k)} {row[-2]:.6f}")
+            lines.append(f"{self.name}_count{_fmt_labels(k)} {row[-1]:g}")
+        return lines
+
+    def snapshot(self) -> Dict[Labels, List[float]]:
+        with _lock:
+            return {k: list(v) for k, v in self._values.items()}
+
+def counter(name: str, help: str) -> Counter:
+    with _lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = Counter(name, help)
+    return m
+
+def histogram(name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    with _lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = Histogram(name, help, buckets)
+    return m
+
+STAGE_SECONDS = histogram("factcheck_stage_seconds", "Latency of verify pipeline stages")
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    """
+    Times the block into factcheck_stage_seconds{stage=...}.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage, **labels)
+
+def register_collector(fn: Callable[[], Iterable[Sample]]) -> None:
+    """
+    fn is called on every scrape and returns point-in-time samples
+    (name, type, help, labels, value), e.g. cache or queue stats.
+    """
+    with _lock:
+        _collectors.append(fn)
+
+def cache_samples(cache: str, stats: Dict) -> List[Sample]:
+    if "hits" not in stats:
+        return []
+    labels = {"cache": cache}
+    return [
+        ("factcheck_cache_hits_total", "counter", "Cache hits (memory + disk)", labels,
+         stats["hits"] + stats.get("disk_hits", 0)),
+        ("factcheck_cache_misses_total", "counter", "Cache misses", labels, stats["misses"]),
+        ("factcheck_cache_evictions_total", "counter", "Cache LRU evictions", labels, stats["evictions"]),
+        ("factcheck_cache_entries", "gauge", "Entries in the memory tier", labels, stats["size"]),
+    ]
+
+def render() -> str:
+    with _lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+    lines: List[str] = []
+    for m in metrics:
+        lines.extend(m.render())
+
+    grouped: Dict[str, Tuple[str, str, List[Tuple[Dict[str, str], float]]]] = {}
+    for fn in collectors:
+        try:
+            samples = list(fn())
+        except Exception:
+            continue
+        for name, typ, help, labels, value in samples:
+            grouped.setdefault(name, (typ, help, []))[2].append((labels, value))
+    for name, (typ, help, rows) in grouped.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {typ}")
+        for labels, value in rows:
+            lines.append(f"{name}{_fmt_labels(_key(labels))} {float(value):g}")
+    return "\n".join(lines) + "\n"
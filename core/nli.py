@@ -1,15 +1,49 @@
 from __future__ import annotations
 import os
 import math
-from typing import Dict, Tuple
+import hashlib
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoTokenizer
+from core.cache import TTLCache
+from core.chunking import Span, token_windows
 from core.config import get_cfg
+from core.metrics import SIZE_BUCKETS, cache_samples, histogram, register_collector, span
+from core.nli_backends import make_backend
+from core.nli_server import ping_server, remote_scores_pairs
+from core.nli_scheduler import NLIScheduler
+from core.utils import normalize_text_key
 
-_model = None
+_backend = None
 _tokenizer = None
 _label_map = None
 _device = "cpu"
+_load_lock = threading.Lock()
+_ready = threading.Event()
+_warmup_error: str | None = None
+_scheduler: NLIScheduler | None = None
+_scheduler_lock = threading.Lock()
+_memo: TTLCache | None = None
+_memo_lock = threading.Lock()
+_local_only = False
+_tokenizer_lock = threading.Lock()
+_tokenizer_name: str | None = None
+_model_name: str | None = None
+_threads: int | None = None
+# token ids of the windows premise_windows cut, keyed on (model, tokenizer, window text)
+_premise_ids = TTLCache("premise_ids", max_items=4096)
+
+DEFAULT_MODEL_NAME = "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli"
+MAX_SEQ_LEN = 512
+
+FORWARD_BATCH = histogram("factcheck_nli_forward_batch_size", "Pairs per model forward pass", SIZE_BUCKETS)
+FORWARD_TOKENS = histogram(
+    "factcheck_nli_forward_seq_len", "Padded sequence length per forward pass", (32, 64, 128, 256, 384, 512)
+)
 
 def _pick_device(cfg: Dict) -> str:
     pref = str(cfg.get("NLI_DEVICE", "auto")).lower()
@@ -21,18 +55,207 @@ def _pick_device(cfg: Dict) -> str:
         return "mps"
     return "cpu"
 
+def use_local_model() -> None:
+    """
+    Run the model in this process even when NLI_SERVER_ADDRESS is set (used
+    by the NLI server itself).
+    """
+    global _local_only
+    _local_only = True
+
+def _remote_address() -> str | None:
+    if _local_only:
+        return None
+    return get_cfg().get("NLI_SERVER_ADDRESS") or None
+
+def per_process_threads(threads: int, processes: int) -> int:
+    """
+    Intra-op threads for one of `processes` model processes on this node:
+    threads when > 0, else the cores split evenly between them (torch's own
+    default of one thread per core in every process oversubscribes the CPU).
+    """
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+def set_threads(threads: int) -> None:
+    """
+    torch intra-op threads for this process; also used by backends loaded
+    afterwards.
+    """
+    global _threads
+    _threads = max(1, threads)
+    torch.set_num_threads(_threads)
+
+def _api_processes() -> int:
+    # uvicorn/gunicorn --workers read WEB_CONCURRENCY; API_WORKERS when passed on the command line
+    return int(os.getenv("WEB_CONCURRENCY") or get_cfg().get("API_WORKERS", 1))
+
+def configure_api_threads() -> Tuple[int, int]:
+    """
+    Gives this API process its share of the cores (NLI_TORCH_THREADS, or
+    cores / API processes when 0). Returns (threads, processes).
+    """
+    processes = _api_processes()
+    set_threads(per_process_threads(int(get_cfg().get("NLI_TORCH_THREADS", 0)), processes))
+    return _threads, processes
+
+def _names(cfg: Dict) -> Tuple[str, str]:
+    # (model, tokenizer); the tokenizer defaults to the model's own
+    model = str(cfg.get("NLI_MODEL_NAME", DEFAULT_MODEL_NAME))
+    return model, str(cfg.get("NLI_TOKENIZER_NAME") or model)
+
+def get_tokenizer():
+    """
+    The NLI tokenizer alone (API processes need it for token-aware chunking
+    even when the model runs on the NLI server).
+    """
+    global _tokenizer, _tokenizer_name
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                name = _names(get_cfg())[1]
+                _tokenizer = AutoTokenizer.from_pretrained(name)
+                _tokenizer_name = name
+    return _tokenizer
+
+@lru_cache(maxsize=1024)
+def _hypothesis_ids(hypothesis: str, tokenizer_name: str) -> Tuple[int, ...]:
+    # tokenizer_name keys the cache; get_tokenizer() is the tokenizer of that name
+    return tuple(get_tokenizer()(hypothesis, add_special_tokens=False)["input_ids"])
+
+def _ids_key(premise: str, model: str, tokenizer: str) -> str:
+    return f"{model}:{tokenizer}:{hashlib.sha1(premise.encode('utf-8')).hexdigest()}"
+
+def _cached_premise_ids(premises: Sequence[str], model: str | None) -> List[array | None]:
+    if model is None or _tokenizer_name is None:
+        return [None] * len(premises)
+    return [_premise_ids.get(_ids_key(p, model, _tokenizer_name)) for p in premises]
+
+def _fit_windows(tok, text: str, spans: List[Span], budget: int) -> List[Tuple[Span, List[int]]]:
+    """
+    Tokenizes each window's text on its own (those ids are what NLI sees, so a
+    chunk scores the same whichever page it was cut from). A window that comes
+    out longer than budget on its own is cut again on its own tokens.
+    """
+    out: List[Tuple[Span, List[int]]] = []
+    while spans:
+        enc = tok([text[s:e] for s, e in spans], add_special_tokens=False, return_offsets_mapping=True)
+        recut: List[Span] = []
+        for (s, e), ids, offsets in zip(spans, enc["input_ids"], enc["offset_mapping"]):
+            if len(ids) <= budget:
+                out.append(((s, e), ids))
+                continue
+            sub = token_windows(text[s:e], [a for a, _ in offsets], [b for _, b in offsets], budget)
+            recut.extend((s + a, s + b) for _, (a, b) in sub)
+        spans = recut
+    out.sort()
+    return out
+
+def premise_windows(text: str, hypothesis: str, max_tokens: int = 0) -> List[Span]:
+    """
+    Character spans of token windows over text (CHUNKING_MODE="tokens"):
+    the page is tokenized once and cut at sentence starts into windows that,
+    together with the hypothesis and special tokens, fit MAX_SEQ_LEN (or at
+    most max_tokens tokens when > 0). Each window's own token ids are kept
+    for the NLI path (_local_scores_pairs here or on the NLI server), which
+    then doesn't tokenize that premise again.
+    """
+    tok = get_tokenizer()
+    budget = MAX_SEQ_LEN - tok.num_special_tokens_to_add(pair=True) - len(_hypothesis_ids(hypothesis, _tokenizer_name))
+    budget = max(16, min(budget, max_tokens) if max_tokens > 0 else budget)
+    enc = tok(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = enc["offset_mapping"]
+    spans = [span for _, span in token_windows(text, [a for a, _ in offsets], [b for _, b in offsets], budget)]
+    model = _names(get_cfg())[0]
+    out: List[Span] = []
+    for (s, e), ids in _fit_windows(tok, text, spans, budget):
+        _premise_ids.set(_ids_key(text[s:e], model, _tokenizer_name), array("i", ids))
+        out.append((s, e))
+    return out
+
 def load_nli() -> None:
-    global _model, _tokenizer, _label_map, _device
-    if _model is not None:
+    global _backend, _tokenizer, _label_map, _device, _model_name
+    if _backend is not None:
         return
-    cfg = get_cfg()
-    name = cfg.get("NLI_MODEL_NAME", "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli")
-    _device = _pick_device(cfg)
-    _tokenizer = AutoTokenizer.from_pretrained(name)
-    _model = AutoModelForSequenceClassification.from_pretrained(name)
-    _model.to(_device)
+    with _load_lock:
+        if _backend is not None:
+            return
+        cfg = get_cfg()
+        if _threads is None:
+            # not set at startup (scripts, batch runs): same share as an API process
+            configure_api_threads()
+        name = _names(cfg)[0]
+        tokenizer = get_tokenizer()
+        backend = make_backend(
+            str(cfg.get("NLI_BACKEND", "torch")),
+            name,
+            tokenizer,
+            device=_pick_device(cfg),
+            onnx_dir=str(cfg.get("NLI_ONNX_DIR", ".cache/onnx")),
+            intra_op_threads=_threads,
+        )
+        _label_map = _build_label_map(backend.id2label)
+        _device = backend.device
+        _tokenizer = tokenizer
+        _model_name = name
+        _backend = backend
+
+def warmup_nli(seq_lengths: Sequence[int] = (64, 128, 256, 512), batch_size: int | None = None) -> Dict[str, float]:
+    """
+    Loads tokenizer + model and runs one dummy batch per sequence length so the
+    first real request doesn't pay for lazy init or cold kernels. Marks the
+    model ready when done. Returns per-phase durations in seconds.
+    """
+    global _warmup_error
+    timings: Dict[str, float] = {}
+    address = _remote_address()
+    if address:
+        return _wait_for_server(address)
+    try:
+        t0 = time.perf_counter()
+        load_nli()
+        timings["load"] = time.perf_counter() - t0
+
+        if batch_size is None:
+            batch_size = int(get_cfg().get("NLI_BATCH_SIZE", 16))
+        for n in seq_lengths:
+            t0 = time.perf_counter()
+            feat = dict(_tokenizer("warm up " * n, "warm up claim", truncation=True, max_length=n))
+            _backend.predict([feat] * max(1, batch_size))
+            timings[f"seq_{n}"] = time.perf_counter() - t0
+    except Exception as e:
+        _warmup_error = str(e)
+        raise
+    _warmup_error = None
+    _ready.set()
+    return timings
+
+def _wait_for_server(address: str, wait_sec: float = 120.0) -> Dict[str, float]:
+    # the server may still be loading; its workers answer pings once warm
+    global _warmup_error
+    t0 = time.perf_counter()
+    while True:
+        try:
+            ping_server(address)
+            break
+        except Exception as e:
+            if time.perf_counter() - t0 > wait_sec:
+                _warmup_error = str(e)
+                raise
+            time.sleep(1.0)
+    _warmup_error = None
+    _ready.set()
+    return {"server": time.perf_counter() - t0}
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+def warmup_error() -> str | None:
+    return _warmup_error
+
+def _build_label_map(id2label: Dict[int, str]) -> Dict[str, int]:
     # build label map dynamically
-    id2label = _model.config.id2label
     label2id = {v.lower(): k for k, v in id2label.items()}
     # normalize keys
     def find(key: str) -> int:
@@ -41,35 +264,232 @@ def load_nli() -> None:
             if cand in label2id:
                 return label2id[cand]
         raise RuntimeError(f"Label {key} not found in model labels: {list(label2id.keys())}")
-    _label_map = {
+    return {
         "entailment": find("entailment"),
         "neutral": find("neutral"),
         "contradiction": find("contradiction"),
     }
 
+def _label_probs(row) -> Dict[str, float]:
+    out = {}
+    for name, idx in _label_map.items():
+        out[name] = float(row[idx])
+    return out
+
+def nli_scores_pairs(
+    pairs: Sequence[Tuple[str, str]],
+    batch_size: int | None = None,
+) -> List[Dict[str, float]]:
+    """
+    Batched NLI over (premise, hypothesis) pairs, results in input order.
+    Runs on the NLI server when NLI_SERVER_ADDRESS is set, else in process.
+    Called on the scheduler's worker thread too: the premise ids kept by
+    premise_windows are looked up here, in the process that cut the windows,
+    and sent along to the server.
+    """
+    if not pairs:
+        return []
+    address = _remote_address()
+    if address:
+        model = _names(get_cfg())[0]
+        ids = _cached_premise_ids([p for p, _ in pairs], model)
+        with span("nli_remote"):
+            return remote_scores_pairs(address, pairs, batch_size,
+                                       timeout=float(get_cfg().get("NLI_SERVER_TIMEOUT_SEC", 60.0)),
+                                       premise_ids=[None if x is None else list(x) for x in ids],
+                                       model=model, tokenizer=_tokenizer_name)
+    return _local_scores_pairs(pairs, batch_size)
+
+def _local_scores_pairs(
+    pairs: Sequence[Tuple[str, str]],
+    batch_size: int | None = None,
+    premise_ids: Sequence[Sequence[int] | None] | None = None,
+) -> List[Dict[str, float]]:
+    """
+    Premises with token ids (premise_ids, else the ones premise_windows kept
+    for the loaded model and tokenizer) are joined with the hypothesis ids
+    without tokenizing them again; the rest are tokenized in one call. The
+    pairs are then sorted by token length and run in micro-batches padded
+    only to the longest pair of each batch.
+    """
+    if not pairs:
+        return []
+    load_nli()
+    if batch_size is None:
+        batch_size = int(get_cfg().get("NLI_BATCH_SIZE", 16))
+    batch_size = max(1, batch_size)
+
+    if premise_ids is None:
+        premise_ids = _cached_premise_ids([p for p, _ in pairs], _model_name)
+    feats: List[Dict[str, List[int]]] = [{} for _ in pairs]
+    todo: List[int] = []
+    for i, ((_, h), ids) in enumerate(zip(pairs, premise_ids)):
+        if ids is None:
+            todo.append(i)
+        else:
+            feats[i] = dict(_tokenizer.prepare_for_model(
+                list(ids), list(_hypothesis_ids(h, _tokenizer_name)), truncation="only_first", max_length=MAX_SEQ_LEN
+            ))
+    if todo:
+        enc = _tokenizer(
+            [pairs[i][0] for i in todo],
+            [pairs[i][1] for i in todo],
+            truncation=True,
+            padding=False,
+            max_length=MAX_SEQ_LEN,
+        )
+        keys = list(enc.keys())
+        for j, i in enumerate(todo):
+            feats[i] = {k: enc[k][j] for k in keys}
+    lengths = [len(f["input_ids"]) for f in feats]
+    order = sorted(range(len(pairs)), key=lengths.__getitem__)
+
+    out: List[Dict[str, float]] = [{} for _ in pairs]
+    for start in range(0, len(order), batch_size):
+        idxs = order[start:start + batch_size]
+        FORWARD_BATCH.observe(len(idxs))
+        FORWARD_TOKENS.observe(max(lengths[i] for i in idxs))
+        with span("nli_forward"):
+            probs = _backend.predict([feats[i] for i in idxs])
+        for i, row in zip(idxs, probs):
+            out[i] = _label_probs(row)
+    return out
+
+def get_scheduler() -> NLIScheduler | None:
+    """
+    Shared cross-request batching worker, or None when NLI_SCHEDULER_ENABLED is off.
+    """
+    global _scheduler
+    cfg = get_cfg()
+    if not bool(cfg.get("NLI_SCHEDULER_ENABLED", False)):
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = NLIScheduler(
+                    nli_scores_pairs,
+                    max_batch=int(cfg.get("NLI_SCHEDULER_MAX_BATCH", 32)),
+                    max_wait_ms=float(cfg.get("NLI_SCHEDULER_MAX_WAIT_MS", 5.0)),
+                )
+    return _scheduler
+
+def scheduler_stats() -> Dict:
+    if _scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **_scheduler.stats()}
+
+def _get_memo() -> TTLCache | None:
+    global _memo
+    cfg = get_cfg()
+    if not bool(cfg.get("NLI_MEMO_ENABLED", True)):
+        return None
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = TTLCache(
+                    "nli",
+                    max_items=int(cfg.get("NLI_MEMO_MAX_ITEMS", 50000)),
+                    ttl_sec=None,
+                    db_path=cfg.get("NLI_MEMO_DB_PATH") or None,
+                )
+    return _memo
+
+def memo_stats() -> Dict:
+    return _memo.stats() if _memo is not None else {"enabled": False}
+
+def _scheduler_samples():
+    st = scheduler_stats()
+    if not st.get("enabled"):
+        return []
+    return [
+        ("factcheck_nli_scheduler_queue_depth", "gauge", "Pairs waiting for a shared batch", {}, st["queue_depth"]),
+        ("factcheck_nli_scheduler_batches_total", "counter", "Shared batches run", {}, st["batches"]),
+        ("factcheck_nli_scheduler_pairs_total", "counter", "Pairs scored via the scheduler", {}, st["pairs"]),
+        ("factcheck_nli_scheduler_avg_wait_ms", "gauge", "Mean queue wait per pair", {}, st["avg_wait_ms"]),
+    ]
+
+register_collector(lambda: cache_samples("nli", memo_stats()))
+register_collector(_scheduler_samples)
+
+def _memo_key(premise: str, hypothesis: str, model_name: str, tokenizer_name: str, backend: str) -> str:
+    # int8 / onnx backends score slightly differently: never serve one's scores for another
+    p = hashlib.sha1(premise.encode("utf-8")).hexdigest()
+    h = hashlib.sha1(normalize_text_key(hypothesis).encode("utf-8")).hexdigest()
+    return f"{backend}:{model_name}:{tokenizer_name}:{p}:{h}"
+
+def _run_pairs(pairs: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+    sched = get_scheduler()
+    if sched is None:
+        return nli_scores_pairs(pairs)
+    if _remote_address() is None:
+        load_nli()
+    # bounded wait: a stopped or dead worker must not hang the request
+    deadline = time.monotonic() + float(get_cfg().get("NLI_SCHEDULER_TIMEOUT_SEC", 60))
+    return [f.result(timeout=max(0.0, deadline - time.monotonic())) for f in sched.submit(pairs)]
+
+def nli_scores_pairs_cached(pairs: Sequence[Tuple[str, str]], batch_size: int | None = None) -> List[Dict[str, float]]:
+    """
+    nli_scores for (premise, hypothesis) pairs, memoized by (chunk hash,
+    normalized claim hash, model name, tokenizer name, backend). Misses go through the shared scheduler
+    when enabled so concurrent requests share batches; bulk callers pass
+    batch_size to run the misses directly as length-sorted batches of that size.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    def run(todo_pairs: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+        if batch_size is not None:
+            return nli_scores_pairs(todo_pairs, batch_size=batch_size)
+        return _run_pairs(todo_pairs)
+
+    memo = _get_memo()
+    if memo is None:
+        return run(pairs)
+
+    cfg = get_cfg()
+    model_name, tokenizer_name = _names(cfg)
+    backend = str(cfg.get("NLI_BACKEND", "torch")).lower()
+    keys = [_memo_key(p, h, model_name, tokenizer_name, backend) for p, h in pairs]
+    out: List[Dict[str, float] | None] = [memo.get(k) for k in keys]
+    todo = [i for i, r in enumerate(out) if r is None]
+    if todo:
+        fresh = run([pairs[i] for i in todo])
+        for i, res in zip(todo, fresh):
+            out[i] = res
+        memo.set_many([(keys[i], res) for i, res in zip(todo, fresh)])
+    return out
+
+def nli_scores_batch(premises: Sequence[str], hypothesis: str) -> List[Dict[str, float]]:
+    """
+    nli_scores for many premises against one hypothesis (e.g. all chunks of a claim).
+    """
+    return nli_scores_pairs_cached([(p, hypothesis) for p in premises])
+
 def nli_scores(premise: str, hypothesis: str) -> Dict[str, float]:
     """
     Returns probabilities for entailment/neutral/contradiction in [0,1].
     Premise = evidence chunk; Hypothesis = user claim.
     """
-    load_nli()
-    inputs = _tokenizer(
-        premise,
-        hypothesis,
-        truncation=True,
-        padding=False,
-        max_length=512,
-        return_tensors="pt",
-    )
-    inputs = {k: v.to(_device) for k, v in inputs.items()}
-    with torch.no_grad():
-        logits = _model(**inputs).logits[0]
-    probs = torch.softmax(logits, dim=-1).detach().cpu().numpy().tolist()
-    out = {}
-    for name, idx in _label_map.items():
-        out[name] = float(probs[idx])
-    return out
+    return nli_scores_batch([premise], hypothesis)[0]
 
 def nli_support_contradict(premise: str, hypothesis: str) -> Tuple[float, float, float]:
     s = nli_scores(premise, hypothesis)
     return s.get("entailment", 0.0), s.get("contradiction", 0.0), s.get("neutral", 0.0)
+
+def nli_support_contradict_batch(premises: Sequence[str], hypothesis: str) -> List[Tuple[float, float, float]]:
+    return [
+        (s.get("entailment", 0.0), s.get("contradiction", 0.0), s.get("neutral", 0.0))
+        for s in nli_scores_batch(premises, hypothesis)
+    ]
+
+def nli_support_contradict_pairs(pairs: Sequence[Tuple[str, str]],
+                                 batch_size: int | None = None) -> List[Tuple[float, float, float]]:
+    """
+    (entail, contra, neutral) per (premise, hypothesis) pair, for callers that
+    pack chunks of many claims into one call (see core/batch.py).
+    """
+    return [
+        (s.get("entailment", 0.0), s.get("contradiction", 0.0), s.get("neutral", 0.0))
+        for s in nli_scores_pairs_cached(pairs, batch_size=batch_size)
+    ]
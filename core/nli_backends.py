@@ -0,0 +1,122 @@
+"""
+Inference backends for the NLI cross-encoder, selected with NLI_BACKEND:
+
+  "torch"       full-precision HF model on cpu / cuda / mps (default)
+  "torch_int8"  HF model with nn.Linear weights dynamically quantized to int8 (CPU)
+  "onnx"        exported ONNX graph run by onnxruntime (CPU)
+  "onnx_int8"   the same graph with weights dynamically quantized to int8
+
+Each backend takes a list of unpadded tokenizer features and returns one
+softmax row per feature. onnxruntime is only imported when an ONNX backend
+is chosen.
+"""
+from __future__ import annotations
+import os
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification
+
+BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+class TorchBackend:
+    def __init__(self, model_name: str, tokenizer, device: str = "cpu", quantize: bool = False):
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            # dynamic int8 kernels are CPU only
+            device = "cpu"
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.to(device)
+        self.name = "torch_int8" if quantize else "torch"
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.id2label = dict(model.config.id2label)
+
+    def predict(self, feats: List[Dict[str, Any]]) -> List[List[float]]:
+        inputs = self.tokenizer.pad(feats, padding=True, return_tensors="pt")
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+        return torch.softmax(logits, dim=-1).detach().cpu().numpy().tolist()
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *tensors):
+        return self.model(**dict(zip(self.input_names, tensors))).logits
+
+def _export_onnx(model_name: str, tokenizer, path: str) -> None:
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    dummy = tokenizer("a premise", "a hypothesis", return_tensors="pt")
+    names = ["input_ids", "attention_mask"]
+    if "token_type_ids" in dummy and getattr(model.config, "type_vocab_size", 0) > 0:
+        names.append("token_type_ids")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    torch.onnx.export(
+        _LogitsOnly(model, names),
+        tuple(dummy[n] for n in names),
+        path,
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes={**{n: {0: "batch", 1: "seq"} for n in names}, "logits": {0: "batch"}},
+        opset_version=14,
+    )
+
+class OnnxBackend:
+    def __init__(self, model_name: str, tokenizer, onnx_dir: str, quantize: bool = False,
+                 intra_op_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("NLI_BACKEND=onnx requires the onnxruntime package") from e
+
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        fp32_path = os.path.join(onnx_dir, f"{slug}.onnx")
+        path = os.path.join(onnx_dir, f"{slug}-int8.onnx") if quantize else fp32_path
+        if not os.path.exists(fp32_path):
+            _export_onnx(model_name, tokenizer, fp32_path)
+        if quantize and not os.path.exists(path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+
+        opts = ort.SessionOptions()
+        if intra_op_threads > 0:
+            opts.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.name = "onnx_int8" if quantize else "onnx"
+        self.tokenizer = tokenizer
+        self.device = "cpu"
+        from transformers import AutoConfig
+        self.id2label = dict(AutoConfig.from_pretrained(model_name).id2label)
+
+    def predict(self, feats: List[Dict[str, Any]]) -> List[List[float]]:
+        batch = self.tokenizer.pad(feats, padding=True, return_tensors="np")
+        inputs = {n: batch[n].astype(np.int64) for n in self.input_names}
+        logits = self.session.run(None, inputs)[0]
+        return _softmax(logits).tolist()
+
+def make_backend(kind: str, model_name: str, tokenizer, device: str = "cpu",
+                 onnx_dir: str = ".cache/onnx", intra_op_threads: int = 0):
+    kind = (kind or "torch").lower()
+    if kind == "torch":
+        return TorchBackend(model_name, tokenizer, device=device)
+    if kind == "torch_int8":
+        return TorchBackend(model_name, tokenizer, quantize=True)
+    if kind in ("onnx", "onnx_int8"):
+        return OnnxBackend(model_name, tokenizer, onnx_dir, quantize=kind == "onnx_int8",
+                           intra_op_threads=intra_op_threads)
+    raise ValueError(f"Unknown NLI_BACKEND {kind!r}, expected one of {BACKENDS}")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+Pair = Tuple[str, str]
+
+class NLIScheduler:
+    """
+    Background worker that gathers NLI pairs from all in-flight requests into
+    shared batches. A batch is flushed when it reaches max_batch pairs or when
+    the oldest queued pair has waited max_wait_ms. Callers get one Future per pair.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Pair]], List[Dict[str, float]]],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self._run_batch = run_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self._queue: "queue.Queue[Tuple[Pair, Future, float]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._pairs = 0
+        self._last_batch_size = 0
+        self._max_batch_seen = 0
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._errors = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                if self._stop.is_set():
+                    # a second worker on the same queue would race the first one
+                    raise RuntimeError("NLI scheduler is still stopping")
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="nli-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)  # not under _lock: the worker takes it for its stats
+            with self._lock:
+                # a worker still finishing its batch stays registered until it exits
+                if not thread.is_alive() and self._thread is thread:
+                    self._thread = None
+        # nobody will run what is still queued: fail it instead of leaving callers blocked
+        while True:
+            try:
+                _, fut, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if fut.set_running_or_notify_cancel():
+                fut.set_exception(RuntimeError("NLI scheduler stopped"))
+
+    def submit(self, pairs: Sequence[Pair]) -> List[Future]:
+        self.start()
+        now = time.monotonic()
+        futures = []
+        for pair in pairs:
+            fut: Future = Future()
+            self._queue.put((pair, fut, now))
+            futures.append(fut)
+        return futures
+
+    def _collect(self) -> List[Tuple[Pair, Future, float]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.monotonic()
+            waits = [(started - t) * 1000.0 for _, _, t in batch]
+            with self._lock:
+                self._batches += 1
+                self._pairs += len(batch)
+                self._last_batch_size = len(batch)
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+                self._wait_total_ms += sum(waits)
+                self._wait_max_ms = max(self._wait_max_ms, max(waits))
+
+            live = [(pair, fut) for pair, fut, _ in batch if fut.set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                results = self._run_batch([pair for pair, _ in live])
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                for _, fut in live:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), res in zip(live, results):
+                fut.set_result(res)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "queue_depth": self._queue.qsize(),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self._batches,
+                "pairs": self._pairs,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_batch_seen,
+                "avg_batch_size": round(self._pairs / self._batches, 2) if self._batches else 0.0,
+                "avg_wait_ms": round(self._wait_total_ms / self._pairs, 3) if self._pairs else 0.0,
+                "max_wait_ms_seen": round(self._wait_max_ms, 3),
+                "errors": self._errors,
+            }
@@ -0,0 +1,246 @@
+"""
+Dedicated NLI inference server, so API workers don't each load the model.
+
+    python -m core.nli_server [--address /tmp/factcheck-nli.sock] [--workers 2] [--threads 4]
+
+The server loads the model once and forks NLI_SERVER_WORKERS processes that
+share the weights copy-on-write (torch on CPU; with ONNX backends or a GPU
+each worker loads its own copy, and GPU serving uses a single process).
+Every worker runs torch / onnxruntime with NLI_TORCH_THREADS intra-op
+threads, so workers x threads can be sized to the cores of the node; with
+0 (the default) each worker gets cores / workers. The
+workers accept connections on one socket; the kernel hands each connection
+to an idle worker.
+
+API processes with NLI_SERVER_ADDRESS set send every model call here instead
+of loading the model (memo and scheduler still run in the API process). One
+request per connection: {"pairs": [[premise, hypothesis], ...],
+"batch_size": int|null, "premise_ids": [[int, ...]|null, ...], "model": str,
+"tokenizer": str} -> {"scores": [{label: prob}, ...]} or {"error": str}, as
+JSON (never pickle). premise_ids (optional) are the token windows the API
+process cut; the worker uses them only when model and tokenizer match its
+own, and tokenizes the text otherwise. NLI_SERVER_AUTHKEY (env) enables the
+HMAC handshake of multiprocessing.connection; set it whenever the address is
+a TCP port. A client that sends nothing (or stalls in the handshake) for
+NLI_SERVER_RECV_TIMEOUT_SEC is dropped so it can't hold a worker.
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+from typing import Any, Dict, List, Sequence, Tuple
+
+from core.config import get_cfg
+
+class NLIServerError(RuntimeError):
+    pass
+
+def parse_address(address: str) -> str | Tuple[str, int]:
+    """
+    "host:port" is a TCP address, anything else a Unix socket path
+    (an optional "unix:" prefix is stripped).
+    """
+    if address.startswith("unix:"):
+        return address[5:]
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit() and not address.startswith("/"):
+        return host, int(port)
+    return address
+
+def _authkey() -> bytes | None:
+    key = os.getenv("NLI_SERVER_AUTHKEY")
+    return key.encode("utf-8") if key else None
+
+# ---- client (API processes) ----
+
+def _call(address: str, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    try:
+        with Client(parse_address(address), authkey=_authkey()) as conn:
+            conn.send_bytes(json.dumps(request, ensure_ascii=False).encode("utf-8"))
+            if not conn.poll(timeout):
+                raise NLIServerError(f"NLI server at {address} did not answer within {timeout:.0f}s")
+            reply = json.loads(conn.recv_bytes())
+    except (OSError, EOFError) as e:
+        raise NLIServerError(f"NLI server at {address} unreachable: {e}") from e
+    if "error" in reply:
+        raise NLIServerError(f"NLI server error: {reply['error']}")
+    return reply
+
+def remote_scores_pairs(
+    address: str,
+    pairs: Sequence[Tuple[str, str]],
+    batch_size: int | None = None,
+    timeout: float = 60.0,
+    premise_ids: Sequence[List[int] | None] | None = None,
+    model: str | None = None,
+    tokenizer: str | None = None
+) -> List[Dict[str, float]]:
+    request = {"pairs": [list(p) for p in pairs], "batch_size": batch_size}
+    if premise_ids is not None and any(ids is not None for ids in premise_ids):
+        request.update(premise_ids=list(premise_ids), model=model, tokenizer=tokenizer)
+    reply = _call(address, request, timeout)
+    return reply["scores"]
+
+def ping_server(address: str, timeout: float = 5.0) -> Dict[str, Any]:
+    return _call(address, {"op": "ping"}, timeout)
+
+# ---- server ----
+
+class _ClientTimeout(Exception):
+    pass
+
+@contextmanager
+def _deadline(seconds: float):
+    """
+    Interrupts a blocking read after seconds (SIGALRM, so main thread only;
+    every worker serves from its main thread).
+    """
+    if seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(*_):
+        raise _ClientTimeout(f"client sent nothing for {seconds:.0f}s")
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _read_request(conn, timeout: float) -> Dict[str, Any]:
+    with _deadline(timeout):
+        key = _authkey()
+        if key:
+            # the handshake Listener.accept would do, but bounded
+            deliver_challenge(conn, key)
+            answer_challenge(conn, key)
+        if not conn.poll(timeout):
+            raise _ClientTimeout(f"client sent nothing for {timeout:.0f}s")
+        return json.loads(conn.recv_bytes())
+
+def _premise_ids(req: Dict[str, Any], n: int) -> List[List[int] | None] | None:
+    # ids from another model's tokenizer would be silently wrong: tokenize instead
+    from core import nli
+    ids = req.get("premise_ids")
+    if not ids or len(ids) != n:
+        return None
+    if (req.get("model"), req.get("tokenizer")) != (nli._model_name, nli._tokenizer_name):
+        return None
+    return [None if x is None else [int(t) for t in x] for x in ids]
+
+def _handle(conn, timeout: float) -> None:
+    from core import nli
+    req = _read_request(conn, timeout)
+    try:
+        if req.get("op") == "ping":
+            reply = {"ok": True, "pid": os.getpid(), "ready": nli.is_ready(),
+                     "model": str(get_cfg().get("NLI_MODEL_NAME", nli.DEFAULT_MODEL_NAME))}
+        else:
+            pairs = [(str(p), str(h)) for p, h in req.get("pairs") or []]
+            reply = {"scores": nli._local_scores_pairs(pairs, req.get("batch_size"), _premise_ids(req, len(pairs)))}
+    except Exception as e:
+        reply = {"error": str(e)}
+    conn.send_bytes(json.dumps(reply).encode("utf-8"))
+
+def _worker(listener: Listener, threads: int, worker_id: int, forked: bool = False) -> None:
+    from core import nli
+    if forked:
+        # the parent stops on Ctrl-C / SIGTERM and terminates its workers;
+        # a single-process server keeps the default handlers
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    t0 = time.perf_counter()
+    nli.set_threads(threads)  # again after fork: thread pools don't carry over
+    nli.load_nli()  # no-op when forked from a loaded parent
+    nli.warmup_nli()
+    timeout = float(get_cfg().get("NLI_SERVER_RECV_TIMEOUT_SEC", 10.0))
+    print(f"[NLI_SERVER] worker={worker_id} pid={os.getpid()} ready in {time.perf_counter() - t0:.2f}s")
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError as e:
+            print(f"[NLI_SERVER] worker={worker_id} accept failed: {e}")
+            continue
+        with conn:
+            try:
+                _handle(conn, timeout)
+            except Exception as e:
+                # failed handshake (wrong authkey), a client that went away or stayed silent
+                print(f"[NLI_SERVER] worker={worker_id} dropped a client: {e}")
+
+def _listen(address: str) -> Listener:
+    addr = parse_address(address)
+    if isinstance(addr, str) and os.path.exists(addr) and stat.S_ISSOCK(os.stat(addr).st_mode):
+        os.unlink(addr)  # stale socket of a previous run
+    # no authkey here: the workers run the handshake themselves under a deadline
+    return Listener(addr, backlog=128)
+
+def serve(address: str, workers: int = 2, threads: int = 0) -> None:
+    from core import nli
+    nli.use_local_model()
+    cfg = get_cfg()
+    listener = _listen(address)
+    backend = str(cfg.get("NLI_BACKEND", "torch")).lower()
+    forked = workers > 1 and backend.startswith("torch") and nli._pick_device(cfg) == "cpu"
+    threads = nli.per_process_threads(threads, workers if forked else 1)
+    nli.set_threads(threads)
+    print(f"[NLI_SERVER] address={address} workers={workers if forked else 1} threads={threads} backend={backend}")
+    if not forked:
+        _worker(listener, threads, 0)
+        return
+
+    # load the weights once before forking so workers share the pages; no
+    # inference in the parent (OpenMP thread pools don't survive fork)
+    t0 = time.perf_counter()
+    nli.load_nli()
+    print(f"[NLI_SERVER] model loaded in {time.perf_counter() - t0:.2f}s")
+    gc.freeze()  # keep the GC from touching (and un-sharing) the loaded objects
+
+    ctx = get_context("fork")
+    procs: Dict[int, Any] = {}
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while not stopping:
+            for i in range(workers):
+                p = procs.get(i)
+                if p is None or not p.is_alive():
+                    if p is not None:
+                        print(f"[NLI_SERVER] worker={i} exited with {p.exitcode}, restarting")
+                    p = ctx.Process(target=_worker, args=(listener, threads, i, True), name=f"nli-worker-{i}", daemon=True)
+                    p.start()
+                    procs[i] = p
+            time.sleep(1.0)
+    finally:
+        for p in procs.values():
+            p.terminate()
+        for p in procs.values():
+            p.join(5)
+        listener.close()
+
+def main() -> None:
+    cfg = get_cfg()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--address", default=cfg.get("NLI_SERVER_ADDRESS") or "/tmp/factcheck-nli.sock")
+    ap.add_argument("--workers", type=int, default=int(cfg.get("NLI_SERVER_WORKERS", 2)))
+    ap.add_argument("--threads", type=int, default=int(cfg.get("NLI_TORCH_THREADS", 0)))
+    args = ap.parse_args()
+    serve(args.address, max(1, args.workers), max(0, args.threads))
+
+if __name__ == "__main__":
+    main()
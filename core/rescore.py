@@ -0,0 +1,102 @@
+"""
+Recomputes verdicts from stored evidence records (core/evidence.py) under a
+different config, without search, fetch or NLI. Only steps 6-12 are replayed
+(aggregation, gating, blend, ranking), so keys that change which chunks reach
+NLI (NLI_MAX_CHUNKS_TOTAL, NLI_MIN_KEYWORD_MATCH, chunking) have no effect here.
+Records are only written while EVIDENCE_STORE_ENABLED is on.
+
+    python -m core.rescore [--evidence .cache/evidence.jsonl] [--config other.json]
+                           [--set FINAL_BLEND_ALPHA=0.6 ...] [--sweep NLI_SUPPORT_SCALE=60,80,100]
+                           [--out rescored.jsonl]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from core.config import Config, _load_from_disk, as_config, get_cfg
+from core.evidence import iter_evidence_records
+from core.verify import _add_nli_result, _score_sources
+
+def rescore(record: Dict[str, Any], cfg: Dict[str, Any], now: datetime | None = None) -> Dict[str, Any]:
+    """
+    verify_claim_pipeline's result for a stored record under cfg. Recency is
+    measured from the record's verified_at unless now is given, so the output
+    depends only on the arguments.
+    """
+    cfg = as_config(cfg)
+    evidence = record["evidence"]
+    per_source: Dict[str, Dict[str, Any]] = {}
+    for i, j, ent, contra, neut in record["nli"]:
+        ev = evidence[i]
+        item = {"url": ev["url"], "domain": ev["domain"], "chunk": ev["chunks"][j]}
+        _add_nli_result(per_source, item, ent, contra, neut)
+    if now is None:
+        now = datetime.fromisoformat(record["verified_at"])
+    result = _score_sources(record["claim"], evidence, per_source, cfg, now=now)
+    result["nli_chunks_evaluated"] = len(record["nli"])
+    result["nli_chunks_skipped"] = record["eligible"] - len(record["nli"])
+    return result
+
+def _parse_value(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+def _summary(records: List[Dict[str, Any]], cfg: Config) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    deltas = [rescore(rec, cfg)["score"] - rec["score"] for rec in records]
+    elapsed = time.perf_counter() - t0
+    n = max(1, len(records))
+    return {
+        "claims": len(records),
+        "mean_score": sum(rec["score"] + d for rec, d in zip(records, deltas)) / n,
+        "mean_abs_delta": sum(abs(d) for d in deltas) / n,
+        "changed_gt_5": sum(1 for d in deltas if abs(d) > 5.0),
+        "claims_per_sec": len(records) / max(1e-9, elapsed),
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--evidence", default=None, help="default: EVIDENCE_STORE_PATH")
+    ap.add_argument("--config", default=None, help="config file to score under (default: current config)")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override one key (JSON value)")
+    ap.add_argument("--sweep", default=None, metavar="KEY=V1,V2,...", help="summary per value of one key")
+    ap.add_argument("--out", default=None, help="write per-claim rescored results as JSONL")
+    args = ap.parse_args()
+
+    base = _load_from_disk(args.config) if args.config else get_cfg()
+    overrides = {}
+    for item in args.set:
+        key, _, raw = item.partition("=")
+        overrides[key] = _parse_value(raw)
+    cfg = Config({**base, **overrides})
+
+    path = args.evidence or str(base.get("EVIDENCE_STORE_PATH", ".cache/evidence.jsonl"))
+    records = list(iter_evidence_records(path))
+    if not records:
+        raise SystemExit(f"no evidence records in {path}")
+
+    if args.sweep:
+        key, _, raw = args.sweep.partition("=")
+        print(f"{key:<28}{'claims':>8}{'mean':>8}{'|delta|':>9}{'>5':>6}{'claims/s':>11}")
+        for val in raw.split(","):
+            s = _summary(records, Config({**cfg, key: _parse_value(val)}))
+            print(f"{val:<28}{s['claims']:>8}{s['mean_score']:>8.1f}{s['mean_abs_delta']:>9.2f}"
+                  f"{s['changed_gt_5']:>6}{s['claims_per_sec']:>11.0f}")
+        return
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for rec in records:
+                res = rescore(rec, cfg)
+                f.write(json.dumps({**res, "score_before": rec["score"]}, ensure_ascii=False) + "\n")
+    s = _summary(records, cfg)
+    print(f"[RESCORE] claims={s['claims']} mean={s['mean_score']:.1f} mean_abs_delta={s['mean_abs_delta']:.2f} "
+          f"changed_gt_5={s['changed_gt_5']} claims_per_sec={s['claims_per_sec']:.0f}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
 import re
+import sys
 import time
+import codecs
 import json
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import Mapping, NamedTuple
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 import trafilatura
+from trafilatura.utils import load_html
 from langdetect import detect, LangDetectException
+from core.cache import TTLCache
+from core.config import get_cfg
+from core.domain_health import domain_allowed, domain_timeout, record_fetch
+from core.metrics import cache_samples, counter, register_collector, span
 
 #user agent for preventing blocking
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0 Safari/537.36"
@@ -16,27 +27,259 @@ def domain_of(url: str) -> str:
     except Exception:
         return ""
 
-def fetch_html(url: str, timeout: int = 15) -> str:
-    r = requests.get(url, headers={"User-Agent": UA}, timeout=timeout, allow_redirects=True)
-    r.raise_for_status()
-    return r.text
-
-def extract_published_time(soup: BeautifulSoup) -> str | None:
-    candidates = [
-        ('meta', {'property': 'article:published_time'}, 'content'),
-        ('meta', {'property': 'og:updated_time'}, 'content'),
-        ('meta', {'name': 'date'}, 'content'),
-        ('meta', {'itemprop': 'datePublished'}, 'content'),
-        ('meta', {'property': 'article:modified_time'}, 'content'),
-        ('meta', {'name': 'DC.date.issued'}, 'content'),
-        ('time', {}, 'datetime'),
-    ]
-    for tag, attrs, attr_name in candidates:
-        el = soup.find(tag, attrs=attrs)
-        if el and el.get(attr_name):
-            return el.get(attr_name)
-
-    return None
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Process-wide session so fetches reuse keep-alive connections.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers.update({"User-Agent": UA})
+                _session = s
+    return _session
+
+_page_cache: TTLCache | None = None
+_failed_cache: TTLCache | None = None
+_page_cache_lock = threading.Lock()
+
+def _page_entry_size(entry: dict) -> int:
+    # memory of the record itself, not just its text
+    page = entry["page"]
+    return sum(map(sys.getsizeof, (entry, page, *page.values(), entry.get("etag"), entry.get("last_modified"))))
+
+def _get_page_cache() -> TTLCache | None:
+    global _page_cache
+    cfg = get_cfg()
+    if not bool(cfg.get("PAGE_CACHE_ENABLED", True)):
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = TTLCache(
+                    "pages",
+                    max_items=int(cfg.get("PAGE_CACHE_MAX_ITEMS", 1000)),
+                    ttl_sec=float(cfg.get("PAGE_CACHE_TTL_SEC", 21600)),
+                    db_path=cfg.get("PAGE_CACHE_DB_PATH") or None,
+                    db_max_bytes=int(float(cfg.get("PAGE_CACHE_DB_MAX_MB", 1000)) * 1024 * 1024),
+                    max_bytes=int(float(cfg.get("PAGE_CACHE_MAX_MB", 200)) * 1024 * 1024),
+                    sizeof=_page_entry_size,
+                )
+    return _page_cache
+
+def _get_failed_cache() -> TTLCache | None:
+    """
+    Negative cache for pages that could not be used (too short, rejected):
+    memory only and kept for PAGE_CACHE_FAILED_TTL_SEC, so one bad fetch
+    doesn't hide the URL for the whole page TTL.
+    """
+    global _failed_cache
+    cfg = get_cfg()
+    if not bool(cfg.get("PAGE_CACHE_ENABLED", True)):
+        return None
+    if _failed_cache is None:
+        with _page_cache_lock:
+            if _failed_cache is None:
+                _failed_cache = TTLCache(
+                    "pages_failed",
+                    max_items=int(cfg.get("PAGE_CACHE_MAX_ITEMS", 1000)),
+                    ttl_sec=float(cfg.get("PAGE_CACHE_FAILED_TTL_SEC", 300)),
+                )
+    return _failed_cache
+
+def page_cache_stats() -> dict:
+    return _page_cache.stats() if _page_cache is not None else {"enabled": False}
+
+def failed_page_cache_stats() -> dict:
+    return _failed_cache.stats() if _failed_cache is not None else {"enabled": False}
+
+register_collector(lambda: cache_samples("pages", page_cache_stats()))
+register_collector(lambda: cache_samples("pages_failed", failed_page_cache_stats()))
+
+PAGES = counter("factcheck_pages_total", "fetch_page outcomes (fetched, cache_hit, revalidated, failed)")
+PAGES_FAILED = counter("factcheck_pages_failed_total", "Pages that could not be used, by reason")
+DOWNLOADS_CUT = counter("factcheck_page_downloads_cut_total", "Downloads stopped before the end of the body, by reason")
+
+def count_page_failure(reason: str, cache_hit: bool = False) -> None:
+    # the label is the reason's prefix only ("network_error: <message>" -> "network_error")
+    PAGES.inc(result="cache_hit" if cache_hit else "failed")
+    PAGES_FAILED.inc(reason=reason.split(":")[0])
+
+def _network_failure(e: requests.RequestException) -> str:
+    # short reason for the domain health registry; the page keeps the full message
+    if isinstance(e, requests.Timeout):
+        return "timeout"
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return f"http_{e.response.status_code}"
+    return "network_error"
+
+class PageRejected(Exception):
+    """
+    Response not worth downloading (reason "content_type" or "too_large").
+    """
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+class Download(NamedTuple):
+    """
+    What _http_get read: final URL, status, response headers (case-insensitive)
+    and the body, at most FETCH_MAX_BYTES (empty for 304).
+    """
+    url: str
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+
+_READ_CHUNK = 64 * 1024
+_CONTENT_TAG = re.compile(rb"<(/?)(article|main)(?=[\s/>])", re.I)  # not <main-nav> etc.
+_MARKUP = re.compile(rb"<[^>]*>|\s+")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.I)
+_HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.I)
+
+def _check_headers(headers: Mapping[str, str], cfg, max_bytes: int) -> None:
+    ctype = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    allowed = [str(t).lower() for t in cfg.get("FETCH_CONTENT_TYPES") or []]
+    if ctype and allowed and ctype not in allowed:
+        raise PageRejected("content_type", ctype)
+    length = headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        raise PageRejected("too_large", f"{length} bytes")
+
+def _read_body(r: requests.Response, max_bytes: int, min_article_bytes: int | None) -> bytes:
+    """
+    Reads up to max_bytes. With min_article_bytes set, stops once the main
+    content is complete: at </main>, or at the close of an outermost <article>
+    holding at least min_article_bytes of text (so a teaser or related-story
+    card ahead of the story doesn't end the download).
+    """
+    buf = bytearray()
+    scan = 0
+    articles: list[int] = []  # start offsets of the open <article> elements
+    for chunk in r.iter_content(chunk_size=_READ_CHUNK):
+        buf += chunk
+        if len(buf) >= max_bytes:
+            del buf[max_bytes:]
+            DOWNLOADS_CUT.inc(reason="max_bytes")
+            break
+        if min_article_bytes is None:
+            continue
+        complete = False
+        for m in _CONTENT_TAG.finditer(buf, scan):
+            scan = m.end()
+            if m.group(2).lower() == b"main":
+                complete = bool(m.group(1))
+            elif not m.group(1):
+                articles.append(m.end())
+            elif articles:
+                begin = articles.pop()
+                complete = not articles and len(_MARKUP.sub(b"", buf[begin:m.start()])) >= min_article_bytes
+            if complete:
+                break
+        if complete:
+            DOWNLOADS_CUT.inc(reason="content_end")
+            break
+        scan = max(scan, len(buf) - 16)  # a tag may straddle two chunks
+    return bytes(buf)
+
+def _http_get(url: str, timeout: float = 15, headers: dict | None = None) -> Download:
+    """
+    Streams the body after checking Content-Type / Content-Length (PageRejected
+    before any body is read), keeps at most FETCH_MAX_BYTES and, with
+    FETCH_STOP_AT_CONTENT_END, stops once the main content is complete (see
+    _read_body). Error statuses raise requests.HTTPError without reading the body.
+    """
+    cfg = get_cfg()
+    max_bytes = int(cfg.get("FETCH_MAX_BYTES", 3_000_000))
+    r = get_session().get(url, timeout=timeout, allow_redirects=True, headers=headers, stream=True)
+    with r:
+        r.raise_for_status()
+        content = b""
+        if r.status_code != 304:
+            _check_headers(r.headers, cfg, max_bytes)
+            min_article = int(cfg.get("FETCH_STOP_MIN_ARTICLE_BYTES", 2000))
+            content = _read_body(r, max_bytes, min_article if bool(cfg.get("FETCH_STOP_AT_CONTENT_END", True)) else None)
+    return Download(r.url, r.status_code, r.headers, content)
+
+def decode_body(d: Download) -> str:
+    """
+    Decodes d.content once: charset of the Content-Type header or of a <meta>
+    tag in the first 4 KB, then UTF-8, then the detected encoding. A multi-byte
+    character cut off by the size cap is dropped, not an error.
+    """
+    body = d.content
+    m = _HEADER_CHARSET.search(d.headers.get("Content-Type", "")) or _META_CHARSET.search(body[:4096])
+    declared = m.group(1) if m else None
+    if isinstance(declared, bytes):
+        declared = declared.decode("ascii", "ignore")
+    for enc in (declared, "utf-8"):
+        if not enc:
+            continue
+        try:
+            return codecs.getincrementaldecoder(enc)().decode(body, final=False)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    enc = chardet.detect(body)["encoding"] or "utf-8"
+    return body.decode(enc, errors="replace")
+
+def fetch_html(url: str, timeout: float = 15) -> str:
+    return decode_body(_http_get(url, timeout=timeout))
+
+# (attribute, value) of the <meta> tags carrying a publish date, in priority order;
+# the first <time datetime=...> element is the last fallback
+_DATE_META = [
+    ("property", "article:published_time"),
+    ("property", "og:updated_time"),
+    ("name", "date"),
+    ("itemprop", "datePublished"),
+    ("property", "article:modified_time"),
+    ("name", "DC.date.issued"),
+]
+
+def extract_head_metadata(tree) -> tuple[str, str | None]:
+    """
+    Returns (title, published_at) from a single walk over <title>/<meta>/<time>.
+    og:title overrides <title>; for every date candidate the first matching
+    element wins, even when its value is empty (same precedence as one
+    soup.find per candidate).
+    """
+    title_el = None
+    og_el = None
+    date_els = [None] * (len(_DATE_META) + 1)
+    for el in tree.iter("title", "meta", "time"):
+        if el.tag == "title":
+            if title_el is None:
+                title_el = el
+        elif el.tag == "time":
+            if date_els[-1] is None:
+                date_els[-1] = el
+        else:
+            if og_el is None and el.get("property") == "og:title":
+                og_el = el
+            for i, (attr, val) in enumerate(_DATE_META):
+                if date_els[i] is None and el.get(attr) == val:
+                    date_els[i] = el
+
+    title = ""
+    if title_el is not None and len(title_el) == 0 and title_el.text:
+        title = title_el.text.strip()
+    if og_el is not None and og_el.get("content"):
+        title = og_el.get("content").strip() or title
+
+    published_at = None
+    for i, el in enumerate(date_els):
+        attr_name = "datetime" if i == len(_DATE_META) else "content"
+        if el is not None and el.get(attr_name):
+            published_at = el.get(attr_name)
+            break
+    return title, published_at
 
 def detect_language(text: str) -> str | None:
     try:
@@ -44,36 +287,32 @@ def detect_language(text: str) -> str | None:
     except LangDetectException:
         return None
 
-def extract_readable_text(html: str) -> str:
-    txt = trafilatura.extract(html, include_comments=False, include_tables=False) or ""
+def extract_readable_text(doc) -> str:
+    """
+    doc is raw HTML or a tree from trafilatura's load_html (reused as-is, no reparse).
+    """
+    txt = trafilatura.extract(doc, include_comments=False, include_tables=False) or ""
     txt = re.sub(r"\s+", " ", txt).strip()
     return txt
 
-def fetch_page(url: str) -> dict:
-    start = time.time()
-    try:
-        html = fetch_html(url)
-    except requests.RequestException as e:
-        return {"url": url, "domain": domain_of(url), "title": "", "published_at": None,
-                "language": None, "text": "", "ok": False, "reason": f"network_error: {e}"}
-
-    soup = BeautifulSoup(html, "lxml")
+def _failed_page(url: str, reason: str) -> dict:
+    return {"url": url, "domain": domain_of(url), "title": "", "published_at": None,
+            "language": None, "text": "", "ok": False, "reason": reason}
 
-    title = ""
-    if soup.title and soup.title.string:
-        title = soup.title.string.strip()
-    ogt = soup.find("meta", {"property": "og:title"})
-    if ogt and ogt.get("content"):
-        title = ogt["content"].strip() or title
-
-    published_at = extract_published_time(soup)
-    text = extract_readable_text(html)
+def _parse_page(url: str, html: str, start: float) -> dict:
+    # parse once with trafilatura's own loader and share the tree
+    with span("fetch_parse"):
+        tree = load_html(html)
+        title, published_at = extract_head_metadata(tree) if tree is not None else ("", None)
+    with span("fetch_trafilatura"):
+        text = extract_readable_text(tree) if tree is not None else ""
 
     if len(text) < 400:  
         return {"url": url, "domain": domain_of(url), "title": title, "published_at": published_at,
                 "language": None, "text": "", "ok": False, "reason": "too_short"}
 
-    language = detect_language(text)
+    with span("fetch_langdetect"):
+        language = detect_language(text)
 
     return {
         "url": url,
@@ -86,3 +325,126 @@ def fetch_page(url: str) -> dict:
         "reason": None,
         "elapsed_sec": round(time.time() - start, 2),
     }
+
+def fetch_page(url: str, timeout: float = 15) -> dict:
+    """
+    Fetches and parses a page. Usable pages are cached per URL: a fresh hit
+    skips the network and all parsing, an expired entry is revalidated with a
+    conditional GET (ETag / Last-Modified) and reused on 304. Unusable pages
+    go to the short-lived negative cache (_get_failed_cache).
+    """
+    with span("fetch_page"):
+        return _fetch_page(url, timeout)
+
+def _fetch_page(url: str, timeout: float) -> dict:
+    start = time.time()
+    cache = _get_page_cache()
+    failed_cache = _get_failed_cache()
+    stale = None
+    cond_headers = {}
+    if cache is not None:
+        hit = cache.get(url)
+        if hit is not None:
+            PAGES.inc(result="cache_hit")
+            return dict(hit["page"])
+        failed = failed_cache.get(url)
+        if failed is not None:
+            count_page_failure(failed["reason"], cache_hit=True)
+            return dict(failed)
+        stale = cache.get_stale(url)
+        if stale is not None:
+            if stale[0].get("etag"):
+                cond_headers["If-None-Match"] = stale[0]["etag"]
+            if stale[0].get("last_modified"):
+                cond_headers["If-Modified-Since"] = stale[0]["last_modified"]
+
+    domain = domain_of(url)
+    if not domain_allowed(domain, probe_sec=timeout):
+        count_page_failure("circuit_open")
+        return _failed_page(url, "circuit_open")
+    timeout = domain_timeout(domain, timeout)
+
+    t0 = time.monotonic()
+    try:
+        with span("fetch_network"):
+            r = _http_get(url, timeout=timeout, headers=cond_headers or None)
+    except requests.RequestException as e:
+        count_page_failure("network_error")
+        latency = time.monotonic() - t0 if isinstance(e, requests.HTTPError) else None
+        record_fetch(domain, False, _network_failure(e), latency)
+        return _failed_page(url, f"network_error: {e}")
+    except PageRejected as e:
+        # says nothing about the domain's health, but the URL won't change
+        count_page_failure(e.reason)
+        record_fetch(domain, False, e.reason, time.monotonic() - t0, breaker=False)
+        page = _failed_page(url, str(e))
+        if failed_cache is not None:
+            failed_cache.set(url, page)
+        return page
+    latency = time.monotonic() - t0
+
+    if r.status_code == 304 and stale is not None:
+        PAGES.inc(result="revalidated")
+        record_fetch(domain, True, None, latency)
+        cache.set(url, stale[0])
+        return dict(stale[0]["page"])
+
+    page = _parse_page(url, decode_body(r), start)
+    record_fetch(domain, page["ok"], page["reason"], latency)
+    if not page["ok"]:
+        count_page_failure(page["reason"])
+        if failed_cache is not None:
+            failed_cache.set(url, page)
+        return page
+    PAGES.inc(result="fetched")
+    if cache is not None:
+        cache.set(url, {
+            "page": page,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+        })
+    return page
+
+def iter_fetch_pages(urls: list[str], max_workers: int = 8, deadline_sec: float | None = None,
+                     timeout: float = 15):
+    """
+    Fetches pages in parallel on a bounded thread pool and yields (index, page)
+    as each one completes. Pages still running when deadline_sec expires are
+    dropped and yielded last as ok=False, reason="deadline_exceeded".
+    """
+    if not urls:
+        return
+    if deadline_sec is not None:
+        timeout = min(timeout, deadline_sec)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))), thread_name_prefix="fetch")
+    try:
+        futures = {pool.submit(fetch_page, u, timeout): i for i, u in enumerate(urls)}
+        pending = set(futures)
+        try:
+            for fut in as_completed(futures, timeout=deadline_sec):
+                pending.discard(fut)
+                i = futures[fut]
+                try:
+                    yield i, fut.result()
+                except Exception as e:
+                    count_page_failure("error")
+                    yield i, _failed_page(urls[i], f"error: {e}")
+        except FuturesTimeout:
+            pass
+        for fut in sorted(pending, key=futures.__getitem__):
+            count_page_failure("deadline_exceeded")
+            record_fetch(domain_of(urls[futures[fut]]), False, "deadline_exceeded", breaker=False)
+            yield futures[fut], _failed_page(urls[futures[fut]], "deadline_exceeded")
+    finally:
+        # don't block on stragglers; their own socket timeout ends them
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_pages(urls: list[str], max_workers: int = 8, deadline_sec: float | None = None,
+                timeout: float = 15) -> list[dict]:
+    """
+    Same as iter_fetch_pages but returns all pages in the order of urls.
+    """
+    pages: list[dict | None] = [None] * len(urls)
+    for i, page in iter_fetch_pages(urls, max_workers, deadline_sec, timeout):
+        pages[i] = page
+    return pages
@@ -1,10 +1,19 @@
 import os
+import threading
 import requests
 from urllib.parse import urlparse
 from dotenv import load_dotenv
+from core.cache import TTLCache
+from core.config import get_cfg
+from core.metrics import cache_samples, register_collector
+from core.utils import normalize_text_key
 
 load_dotenv()
 _SERPER_KEY = os.getenv("SERPER_API_KEY")
+_SERPER_URL = "https://google.serper.dev/search"
+
+_cache: TTLCache | None = None
+_cache_lock = threading.Lock()
 
 class SearchError(Exception):
     pass
@@ -15,7 +24,28 @@ def _domain_of(url: str) -> str:
     except Exception:
         return ""
 
-def search_serper(query: str, k: int = 8) -> list[dict]:
+def _get_cache() -> TTLCache | None:
+    global _cache
+    cfg = get_cfg()
+    if not bool(cfg.get("SEARCH_CACHE_ENABLED", True)):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTLCache(
+                    "search",
+                    max_items=int(cfg.get("SEARCH_CACHE_MAX_ITEMS", 2048)),
+                    ttl_sec=float(cfg.get("SEARCH_CACHE_TTL_SEC", 3600)),
+                    db_path=cfg.get("SEARCH_CACHE_DB_PATH") or None,
+                )
+    return _cache
+
+def search_cache_stats() -> dict:
+    return _cache.stats() if _cache is not None else {"enabled": False}
+
+register_collector(lambda: cache_samples("search", search_cache_stats()))
+
+def _serper_request(query: str) -> dict:
     if not _SERPER_KEY:
         raise SearchError("Missing SERPER_API_KEY in .env")
 
@@ -23,14 +53,32 @@ def search_serper(query: str, k: int = 8) -> list[dict]:
     payload = {"q": query}
 
     try:
-        r = requests.post("https://google.serper.dev/search", headers=headers, json=payload, timeout=15)
+        r = requests.post(_SERPER_URL, headers=headers, json=payload, timeout=15)
     except requests.RequestException as e:
         raise SearchError(f"Network error: {e}") from e
 
     if r.status_code != 200:
         raise SearchError(f"Serper error {r.status_code}: {r.text}")
 
-    data = r.json()
+    return r.json()
+
+def search_serper(query: str, k: int = 8) -> list[dict]:
+    """
+    Serper search, cached on the normalized query (case, whitespace, punctuation).
+    """
+    cache = _get_cache()
+    key = f"{k}:{normalize_text_key(query)}"
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return [dict(r) for r in hit]
+
+    results = _parse_serper(_serper_request(query), k)
+    if cache is not None:
+        cache.set(key, results)
+    return [dict(r) for r in results]
+
+def _parse_serper(data: dict, k: int) -> list[dict]:
     organic = data.get("organic", []) or []
 
     results = []
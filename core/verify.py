@@ -1,11 +1,24 @@
-from typing import List, Dict, Any
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Any
 from datetime import datetime, timezone
 
 from core.search import search_serper
-from core.scrape import fetch_page
+from core.fetch_plan import aiter_fetch_planned, iter_fetch_planned, plan_fetches, select_planned
+from core.metrics import SIZE_BUCKETS, counter, histogram, span, STAGE_SECONDS
+from core.chunking import top_chunks
 from core.utils import select_top_chunks, keywords_from_claim, score_chunk_by_keywords
-from core.config import get_cfg
-from core.nli import nli_support_contradict
+from core.retrieval import retrieve_chunks
+from core.config import Config, get_cfg
+from core.nli import nli_support_contradict_batch, memo_stats, premise_windows
+from core.evidence import build_evidence_record, save_evidence_record
+
+NLI_REQUEST_BATCH = histogram("factcheck_nli_request_batch_size", "Chunks per NLI call from the pipeline", SIZE_BUCKETS)
+NLI_CHUNKS = counter("factcheck_nli_chunks_total", "Eligible chunks per claim, by outcome (evaluated/skipped)")
+CLAIMS = counter("factcheck_claims_total", "Claims verified, by pipeline mode")
 
 def _parse_date(dt: str | None) -> datetime | None:
     if not dt:
@@ -19,33 +32,17 @@ def _parse_date(dt: str | None) -> datetime | None:
             continue
     return None
 
-def _domain_weight(domain: str, cfg: Dict[str, Any]) -> float:
-    if not domain:
-        return 1.0
-    dmap = cfg.get("DOMAIN_WEIGHTS", {})
-    if domain in dmap:
-        return float(dmap[domain])
-    for suffix, val in cfg.get("SUFFIX_DEFAULTS", {}).items():
-        if domain.endswith(suffix):
-            return float(val)
-    return 1.0
-
-def _recency_weight(published_at: str | None, cfg: Dict[str, Any]) -> float:
+def _domain_weight(domain: str, cfg: Config) -> float:
+    return cfg.domain_weight(domain)
+
+def _recency_weight(published_at: str | None, cfg: Config, now: datetime | None = None) -> float:
     d = _parse_date(published_at)
     if not d:
         return 1.0
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
     d_naive = d.replace(tzinfo=None)
     days = (now - d_naive).days
-    for item in cfg.get("RECENCY_BUCKETS", []):
-        try:
-            limit, w = int(item[0]), float(item[1])
-        except Exception:
-            continue
-        if days <= limit:
-            return w
-    buckets = cfg.get("RECENCY_BUCKETS", [])
-    return float(buckets[-1][1]) if buckets else 1.0
+    return cfg.recency_weight_for_days(days)
 
 def _coverage_bucket_factor(unique_domains: int, cfg: Dict[str, Any]) -> tuple[float, str]:
     low_th  = int(cfg.get("COVERAGE_LOW_THRESHOLD", 4))
@@ -59,7 +56,8 @@ def _coverage_bucket_factor(unique_domains: int, cfg: Dict[str, Any]) -> tuple[f
         return mid_f, "mid"
     return high_f, "high"
 
-def _heuristic_score(evidence: List[Dict[str, Any]], cfg: Dict[str, Any]) -> tuple[float, float, str]:
+def _heuristic_score(evidence: List[Dict[str, Any]], cfg: Config, dbg: bool = False,
+                     now: datetime | None = None) -> tuple[float, float, str]:
     domains_seen = {ev["domain"] for ev in evidence}
     factor, bucket = _coverage_bucket_factor(len(domains_seen), cfg)
     base = float(cfg.get("BASE_SCORE", 45.0)) * factor
@@ -68,13 +66,12 @@ def _heuristic_score(evidence: List[Dict[str, Any]], cfg: Dict[str, Any]) -> tup
     dscale = float(cfg.get("BONUS_DOMAIN_SCALE", 6.0))
     rscale = float(cfg.get("BONUS_RECENCY_SCALE", 5.0))
 
-    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
     if dbg:
         print(f"[HEUR] domains={len(domains_seen)} bucket={bucket} factor={factor}")
 
     for ev in evidence:
         w = _domain_weight(ev["domain"], cfg)
-        r = _recency_weight(ev.get("published_at"), cfg)
+        r = _recency_weight(ev.get("published_at"), cfg, now)
         bonus += dscale * (w - 1.0)
         bonus += rscale * (r - 1.0)
         if dbg:
@@ -86,102 +83,113 @@ def _heuristic_score(evidence: List[Dict[str, Any]], cfg: Dict[str, Any]) -> tup
         print(f"[HEUR] base={base:.1f} bonus={bonus:.1f} total={raw:.1f}")
     return raw, factor, bucket
 
-def verify_claim_pipeline(
-    claim: str,
-    search_k: int = 20,
-    fetch_k: int = 6,
-    chunks_per_page: int = 3
-) -> Dict[str, Any]:
-    cfg = get_cfg()
-    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
-    if dbg:
-        print(f"[CLAIM] {claim}")
+def _add_nli_result(per_source: Dict[str, Dict[str, Any]], item: Dict[str, Any],
+                    ent: float, contra: float, neut: float, dbg: bool = False) -> Dict[str, Any]:
+    u = item["url"]
+    rec = per_source.setdefault(u, {
+        "domain": item["domain"],
+        "url": u,
+        "max_entail": 0.0,
+        "max_contra": 0.0,
+        "neutral": 0.0,
+        "nli_evaluated": True,
+        "best_ent_chunk": "",
+        "best_contra_chunk": "",
+        "chunk_probs": []
+    })
+    rec["chunk_probs"].append((item["chunk"], ent, contra, neut))
+
+    if ent > rec["max_entail"]:
+        rec["max_entail"] = ent
+        rec["best_ent_chunk"] = item["chunk"]
+
+    if contra > rec["max_contra"]:
+        rec["max_contra"] = contra
+        rec["best_contra_chunk"] = item["chunk"]
+
+    rec["neutral"] = max(rec["neutral"], neut)
 
-    # 1. search
-    search_results = search_serper(claim, k=search_k)
-    picked = search_results[:fetch_k]
     if dbg:
-        print(f"[SEARCH] total={len(search_results)} picked={len(picked)}")
-
-    evidence: List[Dict[str, Any]] = []
-    all_chunks: List[Dict[str, Any]] = []
-
-    # 2. keywords for pre-filter
-    kws = keywords_from_claim(claim)
-    kw_min = int(cfg.get("NLI_MIN_KEYWORD_MATCH", 2))
-    if dbg:
-        print(f"[KWS] {kws} min_match={kw_min}")
-
-    # 3. fetch pages + take top chunks
-    for res in picked:
-        page = fetch_page(res["link"])
-        if not page.get("ok"):
-            continue
-
-        chunks = select_top_chunks(page["text"], claim, top_n=chunks_per_page)
-
-        ev = {
-            "url": page["url"],
-            "domain": page["domain"],
-            "title": page["title"],
-            "published_at": page["published_at"],
-            "language": page["language"],
-            "chunks": chunks
-        }
-        evidence.append(ev)
-
-        # keyword gate for NLI
-        for ch in chunks:
-            score = score_chunk_by_keywords(ch, kws)
-            if score >= kw_min:
-                all_chunks.append({
-                    "domain": page["domain"],
-                    "url": page["url"],
-                    "chunk": ch
-                })
-            elif dbg:
-                print(f"[FILTER] domain={page['domain']} kw_score={score} -> skip")
+        print(f"[NLI] domain={item['domain']} entail={ent:.3f} contra={contra:.3f} neut={neut:.3f}")
+    return rec
+
+def _source_nli_value(rec: Dict[str, Any], cfg: Dict[str, Any]) -> tuple[float | None, str]:
+    """
+    NLI score component of one evaluated source, or (None, gate) when it fails
+    a gate ("min_conf": no strong side, "importance": entail+contra too low).
+    """
+    supp_scale   = float(cfg.get("NLI_SUPPORT_SCALE", 80.0))
+    cont_pen     = float(cfg.get("NLI_CONTRADICT_PENALTY", 50.0))
+    neutral_as   = float(cfg.get("INCLUDE_NEUTRAL_AS", 0.0))
+    min_conf     = float(cfg.get("NLI_MIN_SOURCE_CONF", 0.20))
+    min_import   = float(cfg.get("NLI_SOURCE_MIN_IMPORTANCE", 0.4))
 
-    if dbg:
-        print(f"[CHUNKS] eligible_for_nli={len(all_chunks)}")
+    # gate 1: require at least one strong side
+    if max(rec["max_entail"], rec["max_contra"]) < min_conf:
+        return None, "min_conf"
+
+    # gate 2: require overall importance
+    if rec["max_entail"] + rec["max_contra"] < min_import:
+        return None, "importance"
+
+    # passed both gates, include in NLI score
+    s_val = supp_scale * rec["max_entail"] - cont_pen * rec["max_contra"]
+    if neutral_as != 0.0:
+        s_val += neutral_as * rec["neutral"]
+    return s_val, ""
+
+def _nli_confident(per_source: Dict[str, Dict[str, Any]], cfg: Dict[str, Any]) -> bool:
+    """
+    True once the 95% confidence interval of the mean per-source NLI component
+    is narrower than NLI_ADAPTIVE_CI_HALF_WIDTH (score points).
+    """
+    min_sources = int(cfg.get("NLI_ADAPTIVE_MIN_SOURCES", 3))
+    target = float(cfg.get("NLI_ADAPTIVE_CI_HALF_WIDTH", 10.0))
+    vals = [v for v, _ in (_source_nli_value(rec, cfg) for rec in per_source.values()) if v is not None]
+    n = len(vals)
+    if n < max(2, min_sources):
+        return False
+    mean = sum(vals) / n
+    sd = math.sqrt(sum((v - mean) ** 2 for v in vals) / (n - 1))
+    return 1.96 * sd / math.sqrt(n) <= target
+
+def _plan_nli(all_chunks: List[Dict[str, Any]], cfg: Config, dbg: bool = False) -> List[Dict[str, Any]]:
+    """
+    Chunks that go to NLI, in evaluation order. Default: search-rank order capped
+    at NLI_MAX_CHUNKS_TOTAL. Adaptive mode orders by expected value
+    (domain weight x keyword score) so early exit drops the least useful chunks.
+    """
+    planned = all_chunks
+    if bool(cfg.get("NLI_ADAPTIVE", False)):
+        planned = sorted(
+            all_chunks,
+            key=lambda item: _domain_weight(item["domain"], cfg) * item["kw_score"],
+            reverse=True,
+        )
 
-    # 4. safety cap on NLI volume
+    # safety cap on NLI volume
     max_total = int(cfg.get("NLI_MAX_CHUNKS_TOTAL", 30))
-    if len(all_chunks) > max_total:
+    if len(planned) > max_total:
         if dbg:
-            print(f"[LIMIT] chunks {len(all_chunks)} -> {max_total}")
-        all_chunks = all_chunks[:max_total]
-
-    # 5. run NLI and aggregate per source (url)
-    per_source: Dict[str, Dict[str, Any]] = {}
-    for item in all_chunks:
-        ent, contra, neut = nli_support_contradict(item["chunk"], claim)
-
-        u = item["url"]
-        rec = per_source.setdefault(u, {
-            "domain": item["domain"],
-            "url": u,
-            "max_entail": 0.0,
-            "max_contra": 0.0,
-            "neutral": 0.0,
-            "nli_evaluated": True,
-            "best_ent_chunk": "",
-            "best_contra_chunk": ""
-        })
-
-        if ent > rec["max_entail"]:
-            rec["max_entail"] = ent
-            rec["best_ent_chunk"] = item["chunk"]
-
-        if contra > rec["max_contra"]:
-            rec["max_contra"] = contra
-            rec["best_contra_chunk"] = item["chunk"]
-
-        rec["neutral"] = max(rec["neutral"], neut)
-
-        if dbg:
-            print(f"[NLI] domain={item['domain']} entail={ent:.3f} contra={contra:.3f} neut={neut:.3f}")
+            print(f"[LIMIT] chunks {len(planned)} -> {max_total}")
+        planned = planned[:max_total]
+    return planned
 
+def _score_sources(
+    claim: str,
+    evidence: List[Dict[str, Any]],
+    per_source: Dict[str, Dict[str, Any]],
+    cfg: Config,
+    dbg: bool = False,
+    now: datetime | None = None
+) -> Dict[str, Any]:
+    """
+    Steps 6-12: heuristic score, NLI gating, final blend and source ranking.
+    Mutates per_source (adds not-evaluated sources and nli_included flags).
+    Only depends on its arguments (recency is measured from now, default: the
+    current time), so core/rescore.py can replay it on stored evidence.
+    cfg is a Config (get_cfg / as_config), built once per pipeline run.
+    """
     # 6. add sources we saw but didn't evaluate via NLI
     evaluated_urls = set(per_source.keys())
     for ev in evidence:
@@ -201,13 +209,9 @@ def verify_claim_pipeline(
                 print(f"[NLI] domain={ev['domain']} not_evaluated")
 
     # 7. heuristic score (authority, coverage, recency...)
-    score_h, coverage_factor, coverage_bucket = _heuristic_score(evidence, cfg)
+    score_h, coverage_factor, coverage_bucket = _heuristic_score(evidence, cfg, dbg, now)
 
     # 8. NLI scoring with stricter filtering
-    supp_scale   = float(cfg.get("NLI_SUPPORT_SCALE", 80.0))
-    cont_pen     = float(cfg.get("NLI_CONTRADICT_PENALTY", 50.0))
-    neutral_as   = float(cfg.get("INCLUDE_NEUTRAL_AS", 0.0))
-    min_conf     = float(cfg.get("NLI_MIN_SOURCE_CONF", 0.20))
     min_import   = float(cfg.get("NLI_SOURCE_MIN_IMPORTANCE", 0.4))
 
     nli_vals: List[float] = []
@@ -219,30 +223,21 @@ def verify_claim_pipeline(
             # cannot use this source in NLI score
             continue
 
-        # gate 1: require at least one strong side
-        if max(rec["max_entail"], rec["max_contra"]) < min_conf:
-            if dbg:
+        s_val, skip = _source_nli_value(rec, cfg)
+        if s_val is None:
+            if dbg and skip == "min_conf":
                 print(
                     f"[SRC] domain={rec['domain']} skipped(min_conf) "
                     f"entail={rec['max_entail']:.2f} contra={rec['max_contra']:.2f}"
                 )
-            continue
-
-        # gate 2: require overall importance
-        importance = rec["max_entail"] + rec["max_contra"]
-        if importance < min_import:
-            if dbg:
+            elif dbg:
                 print(
                     f"[SRC] domain={rec['domain']} skipped(importance<{min_import}) "
-                    f"entail={rec['max_entail']:.2f} contra={rec['max_contra']:.2f} sum={importance:.2f}"
+                    f"entail={rec['max_entail']:.2f} contra={rec['max_contra']:.2f} "
+                    f"sum={rec['max_entail'] + rec['max_contra']:.2f}"
                 )
             continue
 
-        # passed both gates, include in NLI score
-        s_val = supp_scale * rec["max_entail"] - cont_pen * rec["max_contra"]
-        if neutral_as != 0.0:
-            s_val += neutral_as * rec["neutral"]
-
         rec["nli_included"] = True
         rec["nli_score_component"] = s_val  # save for later debugging/sorting
         nli_vals.append(s_val)
@@ -324,3 +319,490 @@ def verify_claim_pipeline(
             "Full set used internally for scoring."
         )
     }
+
+def _page_evidence(
+    page: Dict[str, Any],
+    chunks: List[str],
+    kws: List[str],
+    kw_min: int,
+    dbg: bool = False
+) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Evidence record for a fetched page plus its chunks that pass the keyword gate for NLI.
+    """
+    ev = {
+        "url": page["url"],
+        "domain": page["domain"],
+        "title": page["title"],
+        "published_at": page["published_at"],
+        "language": page["language"],
+        "chunks": chunks
+    }
+
+    # keyword gate for NLI
+    eligible: List[Dict[str, Any]] = []
+    for ch in chunks:
+        score = score_chunk_by_keywords(ch, kws)
+        if score >= kw_min:
+            eligible.append({
+                "domain": page["domain"],
+                "url": page["url"],
+                "chunk": ch,
+                "kw_score": score
+            })
+        elif dbg:
+            print(f"[FILTER] domain={page['domain']} kw_score={score} -> skip")
+    return ev, eligible
+
+def _token_chunking(cfg: Dict[str, Any]) -> bool:
+    return str(cfg.get("CHUNKING_MODE", "chars")).lower() == "tokens"
+
+def _token_chunks(text: str, claim: str, cfg: Dict[str, Any]) -> List[tuple[int, int]]:
+    return premise_windows(text, claim, int(cfg.get("CHUNK_MAX_TOKENS", 0)))
+
+def _select_chunks(text: str, claim: str, top_n: int, cfg: Dict[str, Any]) -> List[str]:
+    """
+    select_top_chunks; with CHUNKING_MODE="tokens" over token windows sized
+    to the NLI model instead of 500-char chunks.
+    """
+    if not _token_chunking(cfg):
+        return select_top_chunks(text, claim, top_n=top_n)
+    return top_chunks(text, keywords_from_claim(claim), top_n=top_n, spans=_token_chunks(text, claim, cfg))
+
+def _retrieve_evidence(
+    pages: List[Dict[str, Any]],
+    claim: str,
+    chunks_per_page: int,
+    cfg: Dict[str, Any],
+    dbg: bool = False
+) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    CHUNK_RETRIEVER="bm25": evidence records and NLI candidates for all fetched
+    pages at once. Each page keeps its best chunks_per_page chunks; only the
+    global RETRIEVER_TOP_K above RETRIEVER_MIN_SCORE become NLI candidates.
+    """
+    with span("chunk_select"):
+        page_chunks = None
+        if _token_chunking(cfg):
+            page_chunks = [[page["text"][s:e] for s, e in _token_chunks(page["text"], claim, cfg)] for page in pages]
+        picks = retrieve_chunks(
+            claim,
+            [page["text"] for page in pages],
+            top_k=int(cfg.get("RETRIEVER_TOP_K", 8)),
+            per_page=chunks_per_page,
+            min_score=float(cfg.get("RETRIEVER_MIN_SCORE", 1.0)),
+            page_chunks=page_chunks,
+        )
+    evidence: List[Dict[str, Any]] = []
+    all_chunks: List[Dict[str, Any]] = []
+    for page, ranked in zip(pages, picks):
+        evidence.append({
+            "url": page["url"],
+            "domain": page["domain"],
+            "title": page["title"],
+            "published_at": page["published_at"],
+            "language": page["language"],
+            "chunks": [ch for ch, _, _ in ranked]
+        })
+        for ch, score, selected in ranked:
+            if selected:
+                all_chunks.append({
+                    "domain": page["domain"],
+                    "url": page["url"],
+                    "chunk": ch,
+                    "kw_score": round(score, 3)
+                })
+            elif dbg:
+                print(f"[FILTER] domain={page['domain']} bm25={score:.2f} -> skip")
+    return evidence, all_chunks
+
+def _nli_step(cfg: Dict[str, Any]) -> int:
+    """
+    Chunks per NLI call: NLI_ADAPTIVE_STEP rounds in adaptive mode, else
+    NLI_BATCH_SIZE slices of the plan (so the async path can start a slice
+    as soon as its chunks exist).
+    """
+    if bool(cfg.get("NLI_ADAPTIVE", False)):
+        return max(1, int(cfg.get("NLI_ADAPTIVE_STEP", 4)))
+    return max(1, int(cfg.get("NLI_BATCH_SIZE", 16)))
+
+def _run_nli_batch(batch: List[Dict[str, Any]], claim: str) -> List[tuple[float, float, float]]:
+    NLI_REQUEST_BATCH.observe(len(batch))
+    with span("nli"):
+        return nli_support_contradict_batch([item["chunk"] for item in batch], claim)
+
+def _fold_nli_batch(
+    batch: List[Dict[str, Any]],
+    nli_results: List[tuple[float, float, float]],
+    per_source: Dict[str, Dict[str, Any]],
+    dbg: bool = False
+) -> List[str]:
+    touched: List[str] = []
+    for item, (ent, contra, neut) in zip(batch, nli_results):
+        _add_nli_result(per_source, item, ent, contra, neut, dbg)
+        if item["url"] not in touched:
+            touched.append(item["url"])
+    return touched
+
+def _iter_nli_rounds(
+    planned: List[Dict[str, Any]],
+    claim: str,
+    per_source: Dict[str, Dict[str, Any]],
+    cfg: Dict[str, Any],
+    dbg: bool = False
+) -> Iterator[tuple[List[str], int]]:
+    """
+    Runs NLI over planned chunks in _nli_step slices and folds results into
+    per_source, yielding (urls touched, chunks evaluated so far) after every
+    slice. Adaptive mode stops once the aggregate is tight enough or the
+    time budget is spent.
+    """
+    adaptive = bool(cfg.get("NLI_ADAPTIVE", False))
+    step = _nli_step(cfg)
+    budget = float(cfg.get("NLI_TIME_BUDGET_SEC", 8.0))
+    t0 = time.monotonic()
+
+    evaluated = 0
+    while evaluated < len(planned):
+        batch = planned[evaluated:evaluated + step]
+        nli_results = _run_nli_batch(batch, claim)
+        evaluated += len(batch)
+        yield _fold_nli_batch(batch, nli_results, per_source, dbg), evaluated
+
+        if adaptive and evaluated < len(planned):
+            if _nli_confident(per_source, cfg):
+                if dbg:
+                    print(f"[ADAPTIVE] confident after {evaluated}/{len(planned)} chunks")
+                break
+            if time.monotonic() - t0 > budget:
+                if dbg:
+                    print(f"[ADAPTIVE] time budget spent after {evaluated}/{len(planned)} chunks")
+                break
+
+def _final_result(
+    claim: str,
+    evidence: List[Dict[str, Any]],
+    per_source: Dict[str, Dict[str, Any]],
+    all_chunks: List[Dict[str, Any]],
+    evaluated: int,
+    cfg: Config,
+    dbg: bool = False
+) -> Dict[str, Any]:
+    if dbg:
+        ms = memo_stats()
+        if "hits" in ms:
+            print(f"[NLI_MEMO] hits={ms['hits'] + ms['disk_hits']} misses={ms['misses']} hit_rate={ms['hit_rate']:.2f}")
+    # compact record for core/rescore.py, taken before scoring adds unevaluated sources
+    now = datetime.now(timezone.utc)
+    record = build_evidence_record(claim, evidence, per_source, len(all_chunks), now)
+    with span("scoring"):
+        result = _score_sources(claim, evidence, per_source, cfg, dbg, now)
+    record["score"] = result["score"]
+    save_evidence_record(record, cfg)
+    NLI_CHUNKS.inc(evaluated, outcome="evaluated")
+    NLI_CHUNKS.inc(len(all_chunks) - evaluated, outcome="skipped")
+    result["nli_chunks_evaluated"] = evaluated
+    result["nli_chunks_skipped"] = len(all_chunks) - evaluated
+    result["verified_at"] = record["verified_at"]
+    return result
+
+def _provisional_score(claim: str, evidence: List[Dict[str, Any]],
+                       per_source: Dict[str, Dict[str, Any]], cfg: Config) -> float:
+    snapshot = {u: dict(rec) for u, rec in per_source.items()}
+    return _score_sources(claim, evidence, snapshot, cfg)["score"]
+
+def _search_event(search_results: List[Dict[str, Any]], candidates: List[Dict[str, Any]],
+                  fetch_k: int) -> Dict[str, Any]:
+    return {
+        "event": "search",
+        "total": len(search_results),
+        "results": [
+            {"title": r["title"], "link": r["link"], "domain": r["domain"], "rank": r["rank"]}
+            for r in candidates[:fetch_k]
+        ],
+    }
+
+def _page_event(page: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event": "page",
+        "url": page["url"],
+        "domain": page["domain"],
+        "title": page["title"],
+        "ok": bool(page.get("ok")),
+        "reason": page.get("reason"),
+    }
+
+def _nli_events(touched: List[str], claim: str, evidence: List[Dict[str, Any]],
+                per_source: Dict[str, Dict[str, Any]], cfg: Config) -> Iterator[Dict[str, Any]]:
+    for u in touched:
+        rec = per_source[u]
+        yield {
+            "event": "nli",
+            "url": rec["url"],
+            "domain": rec["domain"],
+            "max_entail": round(rec["max_entail"], 3),
+            "max_contra": round(rec["max_contra"], 3),
+            "provisional_score": _provisional_score(claim, evidence, per_source, cfg),
+        }
+
+def _plan_candidates(search_results: List[Dict[str, Any]], claim: str, fetch_k: int,
+                     cfg: Dict[str, Any], dbg: bool = False) -> List[Dict[str, Any]]:
+    candidates = plan_fetches(search_results, claim, fetch_k, cfg)
+    if dbg:
+        print(f"[SEARCH] total={len(search_results)} candidates={len(candidates)} need={fetch_k}")
+        for r in candidates:
+            print(f"[PLAN] domain={r['domain']} rank={r['rank']} priority={r.get('priority', 0.0):.2f}")
+    return candidates
+
+def iter_verify_claim_pipeline(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3,
+    progress: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Runs the verification pipeline and yields stage events as they happen:
+    "search", one "page" per fetched url and a final "result" event that
+    holds the same payload verify_claim_pipeline returns. With progress
+    (the streaming route) there is also one "nli" event per evaluated
+    source with a running provisional score, which rescores the claim each
+    time.
+    """
+    t_start = time.perf_counter()
+    cfg = get_cfg()
+    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
+    if dbg:
+        print(f"[CLAIM] {claim}")
+
+    # 1. search
+    with span("search"):
+        search_results = search_serper(claim, k=search_k)
+    candidates = _plan_candidates(search_results, claim, fetch_k, cfg, dbg)
+    yield _search_event(search_results, candidates, fetch_k)
+
+    # 2. keywords for pre-filter
+    kws = keywords_from_claim(claim)
+    kw_min = int(cfg.get("NLI_MIN_KEYWORD_MATCH", 2))
+    bm25 = str(cfg.get("CHUNK_RETRIEVER", "keyword")).lower() == "bm25"
+    if dbg:
+        print(f"[KWS] {kws} min_match={kw_min} retriever={'bm25' if bm25 else 'keyword'}")
+
+    # 3. fetch pages in plan order (bounded by a per-claim deadline), replacing
+    # failures until fetch_k pages are usable, + take top chunks. Pages are
+    # reported as they arrive but kept in plan order for scoring.
+    page_slots: Dict[int, Dict[str, Any]] = {}
+    chunk_slots: Dict[int, List[str]] = {}
+    for idx, page in iter_fetch_planned(
+        [res["link"] for res in candidates],
+        need=fetch_k,
+        max_workers=int(cfg.get("FETCH_MAX_WORKERS", 8)),
+        deadline_sec=float(cfg.get("FETCH_DEADLINE_SEC", 20.0)),
+        timeout=float(cfg.get("FETCH_TIMEOUT_SEC", 15.0)),
+        spare=int(cfg.get("FETCH_PLAN_SPARE", 2)),
+    ):
+        yield _page_event(page)
+        page_slots[idx] = page
+        if not page.get("ok"):
+            if dbg:
+                print(f"[FETCH] domain={page['domain']} failed reason={str(page['reason']).split(':')[0]}")
+            continue
+        if not bm25:
+            with span("chunk_select"):
+                chunk_slots[idx] = _select_chunks(page["text"], claim, chunks_per_page, cfg)
+
+    fetched = select_planned(page_slots, fetch_k)
+    if bm25:
+        evidence, all_chunks = _retrieve_evidence([page for _, page in fetched], claim, chunks_per_page, cfg, dbg)
+    else:
+        evidence, all_chunks = [], []
+        for idx, page in fetched:
+            ev, eligible = _page_evidence(page, chunk_slots[idx], kws, kw_min, dbg)
+            evidence.append(ev)
+            all_chunks.extend(eligible)
+
+    if dbg:
+        print(f"[CHUNKS] eligible_for_nli={len(all_chunks)}")
+
+    # 4. plan NLI: order + safety cap on NLI volume
+    planned = _plan_nli(all_chunks, cfg, dbg)
+
+    # 5. run NLI (batched) and aggregate per source (url)
+    per_source: Dict[str, Dict[str, Any]] = {}
+    evaluated = 0
+    for touched, evaluated in _iter_nli_rounds(planned, claim, per_source, cfg, dbg):
+        if progress:
+            yield from _nli_events(touched, claim, evidence, per_source, cfg)
+
+    # 6-12. gating, blend and ranking
+    result = _final_result(claim, evidence, per_source, all_chunks, evaluated, cfg, dbg)
+    CLAIMS.inc(mode="sync")
+    STAGE_SECONDS.observe(time.perf_counter() - t_start, stage="pipeline")
+    yield {"event": "result", "result": result}
+
+def verify_claim_pipeline(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for event in iter_verify_claim_pipeline(claim, search_k, fetch_k, chunks_per_page):
+        if event["event"] == "result":
+            result = event["result"]
+    return result
+
+_io_pool: ThreadPoolExecutor | None = None
+_io_pool_lock = threading.Lock()
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        with _io_pool_lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="verify-io")
+    return _io_pool
+
+async def averify_claim_pipeline(
+    claim: str,
+    search_k: int = 20,
+    fetch_k: int = 6,
+    chunks_per_page: int = 3,
+    on_event: Callable[[Dict[str, Any]], None] | None = None
+) -> Dict[str, Any]:
+    """
+    asyncio version of verify_claim_pipeline with overlapping stages: pages
+    download concurrently, and chunking for a page starts as soon as that page
+    and every page ahead of it in the fetch plan are resolved, while later
+    pages are still downloading. In search-rank NLI order (the default) each
+    NLI_BATCH_SIZE slice of the plan is scored as soon as its chunks exist,
+    so inference for page 1 runs while later pages download. Adaptive NLI
+    order and CHUNK_RETRIEVER="bm25" rank chunks across all pages, so there
+    NLI starts after the last page. Search/fetch run on an I/O pool, chunking
+    and model calls on the default executor. Pages, chunks and NLI batches
+    are the same as on the sync path, so the result is identical.
+
+    on_event, when given, is called on the event loop with the stage events
+    iter_verify_claim_pipeline(progress=True) yields ("search", "page" per
+    fetched url in arrival order, "nli" per evaluated source), for the
+    streaming route.
+    """
+    t_start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    io_pool = _get_io_pool()
+    cfg = get_cfg()
+    dbg = bool(cfg.get("DEBUG_NUMERIC_ONLY", False))
+    if dbg:
+        print(f"[CLAIM] {claim}")
+
+    # 1. search
+    t0 = time.perf_counter()
+    search_results = await loop.run_in_executor(io_pool, search_serper, claim, search_k)
+    STAGE_SECONDS.observe(time.perf_counter() - t0, stage="search")
+    candidates = _plan_candidates(search_results, claim, fetch_k, cfg, dbg)
+    if on_event is not None:
+        on_event(_search_event(search_results, candidates, fetch_k))
+
+    # 2. keywords for pre-filter
+    kws = keywords_from_claim(claim)
+    kw_min = int(cfg.get("NLI_MIN_KEYWORD_MATCH", 2))
+    bm25 = str(cfg.get("CHUNK_RETRIEVER", "keyword")).lower() == "bm25"
+    if dbg:
+        print(f"[KWS] {kws} min_match={kw_min} retriever={'bm25' if bm25 else 'keyword'}")
+
+    # NLI slices of the plan; in rank order (_plan_nli without NLI_ADAPTIVE)
+    # the plan is a prefix of all_chunks, so a slice is final once it is full
+    rank_order = not bm25 and not bool(cfg.get("NLI_ADAPTIVE", False))
+    step = _nli_step(cfg)
+    max_total = int(cfg.get("NLI_MAX_CHUNKS_TOTAL", 30))
+    slices: List[tuple[List[Dict[str, Any]], asyncio.Future]] = []
+
+    def submit_slices(chunks: List[Dict[str, Any]], limit: int) -> None:
+        start = len(slices) * step
+        while start < limit:
+            end = min(start + step, limit)
+            if end > len(chunks):
+                return
+            batch = chunks[start:end]
+            slices.append((batch, loop.run_in_executor(None, _run_nli_batch, batch, claim)))
+            start = end
+
+    # 3. fetch with the same planner as the sync path; a page is consumed once
+    # it and every page ahead of it in plan order are resolved, until fetch_k
+    # are usable (the same pages select_planned picks)
+    evidence: List[Dict[str, Any]] = []
+    all_chunks: List[Dict[str, Any]] = []
+    fetched: List[Dict[str, Any]] = []
+    page_slots: Dict[int, Dict[str, Any]] = {}
+    cursor = 0
+    used = 0
+    async for idx, page in aiter_fetch_planned(
+        [res["link"] for res in candidates],
+        need=fetch_k,
+        max_workers=int(cfg.get("FETCH_MAX_WORKERS", 8)),
+        deadline_sec=float(cfg.get("FETCH_DEADLINE_SEC", 20.0)),
+        timeout=float(cfg.get("FETCH_TIMEOUT_SEC", 15.0)),
+        spare=int(cfg.get("FETCH_PLAN_SPARE", 2)),
+        executor=io_pool,
+    ):
+        if on_event is not None:
+            on_event(_page_event(page))
+        page_slots[idx] = page
+        if not page.get("ok") and dbg:
+            print(f"[FETCH] domain={page['domain']} failed reason={str(page['reason']).split(':')[0]}")
+        while cursor in page_slots and used < fetch_k:
+            page = page_slots[cursor]
+            cursor += 1
+            if not page.get("ok"):
+                continue
+            used += 1
+            if bm25:
+                # global retrieval needs every page first
+                fetched.append(page)
+                continue
+
+            t0 = time.perf_counter()
+            chunks = await loop.run_in_executor(None, _select_chunks, page["text"], claim, chunks_per_page, cfg)
+            STAGE_SECONDS.observe(time.perf_counter() - t0, stage="chunk_select")
+            ev, eligible = _page_evidence(page, chunks, kws, kw_min, dbg)
+            evidence.append(ev)
+            all_chunks.extend(eligible)
+            if rank_order:
+                submit_slices(all_chunks, max_total)
+
+    if bm25:
+        evidence, all_chunks = await loop.run_in_executor(
+            None, _retrieve_evidence, fetched, claim, chunks_per_page, cfg, dbg
+        )
+    if dbg:
+        print(f"[CHUNKS] eligible_for_nli={len(all_chunks)}")
+
+    # 4-5. NLI and per-source aggregation: the same plan and batches as the sync path
+    per_source: Dict[str, Dict[str, Any]] = {}
+    planned = _plan_nli(all_chunks, cfg, dbg)
+    if rank_order:
+        submit_slices(planned, len(planned))
+        # the slices already run concurrently; folding them in plan order
+        # keeps per_source identical to the sync path
+        for batch, fut in slices:
+            touched = _fold_nli_batch(batch, await fut, per_source, dbg)
+            if on_event is not None:
+                for event in _nli_events(touched, claim, evidence, per_source, cfg):
+                    on_event(event)
+        evaluated = len(planned)
+    else:
+        def run_rounds() -> int:
+            evaluated = 0
+            for touched, evaluated in _iter_nli_rounds(planned, claim, per_source, cfg, dbg):
+                if on_event is not None:
+                    for event in _nli_events(touched, claim, evidence, per_source, cfg):
+                        loop.call_soon_threadsafe(on_event, event)
+            return evaluated
+
+        evaluated = await loop.run_in_executor(None, run_rounds)
+
+    # 6-12. gating, blend and ranking
+    result = _final_result(claim, evidence, per_source, all_chunks, evaluated, cfg, dbg)
+    CLAIMS.inc(mode="async")
+    STAGE_SECONDS.observe(time.perf_counter() - t_start, stage="pipeline")
+    return result
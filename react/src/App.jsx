@@ -2,7 +2,7 @@
 // Minimal UI: enter a claim, send to backend, show result & sources.
 
 import { useState } from "react";
-import { verifyClaim } from "./api.js";
+import { verifyClaimStream } from "./api.js";
 import Gauge from "./components/Gauge.jsx";
 import SourceCard from "./components/SourceCard.jsx";
 
@@ -12,6 +12,7 @@ export default function App() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
   const [result, setResult] = useState(null);
+  const [progress, setProgress] = useState(null);
 
   // Normalize backend score for the gauge display (0-100%)
   function normalizeScoreForGauge(raw) {
@@ -26,22 +27,55 @@ export default function App() {
     return Math.round(clamped);
   }
 
+  // "verified N minutes ago" from the backend's verified_at timestamp
+  function verifiedAgo(iso) {
+    const t = Date.parse(iso);
+    if (!Number.isFinite(t)) {
+      return "";
+    }
+    const min = Math.max(0, Math.round((Date.now() - t) / 60000));
+    if (min < 1) return "verified just now";
+    if (min < 60) return `verified ${min} minute${min === 1 ? "" : "s"} ago`;
+    const h = Math.round(min / 60);
+    return `verified ${h} hour${h === 1 ? "" : "s"} ago`;
+  }
+
   // Handle the submit event
   async function onSubmit(e) {
     e.preventDefault();           // Prevent full page reload
     setError("");
     setResult(null);
+    setProgress(null);
     setLoading(true);
     try {
-      const data = await verifyClaim(claim); // Call backend
-      setResult(data);                       // Save server response
+      const data = await verifyClaimStream(claim, onStreamEvent); // Call backend
+      setResult(data);                                           // Save final response
     } catch (err) {
       setError(err.message || "Unexpected error");
     } finally {
       setLoading(false);
+      setProgress(null);
     }
   }
 
+  // Track partial progress while the backend streams stage events
+  function onStreamEvent(event) {
+    setProgress((prev) => {
+      const p = prev || { planned: 0, fetched: 0, scored: 0, score: null };
+      switch (event.event) {
+        case "search":
+          return { ...p, planned: event.results.length };
+        case "page":
+          // failed pages are replaced from the plan, so only usable ones count
+          return event.ok ? { ...p, fetched: p.fetched + 1 } : p;
+        case "nli":
+          return { ...p, scored: p.scored + 1, score: event.provisional_score };
+        default:
+          return p;
+      }
+    });
+  }
+
   // Compute the gaugeValue directly from the backend result
   const gaugeValue = normalizeScoreForGauge(result?.score);
 
@@ -84,7 +118,10 @@ export default function App() {
 
             {loading && (
               <span className="text-sm text-gray-600">
-                Checking sources and running NLI...
+                {progress
+                  ? `Fetched ${progress.fetched}/${progress.planned} sources, analyzed ${progress.scored}` +
+                    (progress.score !== null ? ` — provisional score ${progress.score}` : "")
+                  : "Searching sources..."}
               </span>
             )}
           </div>
@@ -136,6 +173,13 @@ export default function App() {
                 </div>
               )}
 
+              {result.verified_at && (
+                <div className="text-xs text-gray-500">
+                  {verifiedAgo(result.verified_at)}
+                  {result.cached ? " (cached result)" : ""}
+                </div>
+              )}
+
               {"unique_domains" in result && (
                 <div>
                   <span className="font-semibold">number of domains:</span>{" "}
@@ -17,4 +17,55 @@ export async function verifyClaim(claim) {
     throw new Error(`HTTP ${res.status} ${res.statusText} — ${txt.slice(0, 300)}`);
   }
   return res.json();
-}
\ No newline at end of file
+}
+
+// Streams pipeline events (NDJSON) from /api/verify/stream.
+// onEvent is called for every event; resolves with the final result payload.
+export async function verifyClaimStream(claim, onEvent) {
+  if (typeof claim !== "string" || !claim.trim()) {
+    throw new Error("Claim must be a non-empty string");
+  }
+
+  const res = await fetch("/api/verify/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ claim })
+  });
+
+  if (!res.ok || !res.body) {
+    const txt = await res.text().catch(() => "");
+    throw new Error(`HTTP ${res.status} ${res.statusText} — ${txt.slice(0, 300)}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line);
+    if (event.event === "error") {
+      throw new Error(event.detail || "Verification failed");
+    }
+    if (event.event === "result") {
+      result = event.result;
+    }
+    if (onEvent) onEvent(event);
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer + decoder.decode());
+
+  if (!result) {
+    throw new Error("Stream ended without a result");
+  }
+  return result;
+}
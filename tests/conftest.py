@@ -0,0 +1,27 @@
+import json
+import os
+
+import pytest
+
+from core.config import get_cfg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def use_config(tmp_path, monkeypatch):
+    """
+    use_config(KEY=value, ...) points FACTCHECK_CONFIG at a copy of the repo's
+    config.json with those keys overridden (get_cfg reloads on path change).
+    """
+    monkeypatch.setenv("FACTCHECK_CONFIG", os.path.join(ROOT, "config.json"))
+    base = dict(get_cfg())
+    n = 0
+
+    def apply(**overrides):
+        nonlocal n
+        n += 1
+        path = tmp_path / f"config-{n}.json"
+        path.write_text(json.dumps({**base, **overrides}), encoding="utf-8")
+        monkeypatch.setenv("FACTCHECK_CONFIG", str(path))
+        return get_cfg()
+    return apply
@@ -0,0 +1,82 @@
+import types
+
+import pytest
+
+pytest.importorskip("torch")  # core.verify imports core.nli, which loads the model runtime
+
+from core import fetch_plan, verify
+from tests import test_verify_async as fake
+
+ADAPTIVE = dict(NLI_ADAPTIVE=True, NLI_ADAPTIVE_STEP=2, NLI_ADAPTIVE_MIN_SOURCES=3, NLI_ADAPTIVE_CI_HALF_WIDTH=10.0,
+                NLI_TIME_BUDGET_SEC=8.0, NLI_SUPPORT_SCALE=100.0, NLI_CONTRADICT_PENALTY=0.0, INCLUDE_NEUTRAL_AS=0,
+                NLI_MIN_SOURCE_CONF=0.2, NLI_SOURCE_MIN_IMPORTANCE=0.2, DEBUG_NUMERIC_ONLY=False)
+
+def _sources(entails):
+    return {f"u{i}": {"max_entail": e, "max_contra": 0.0, "neutral": 0.0} for i, e in enumerate(entails)}
+
+def _chunks(n):
+    # one chunk per source, so every round adds sources
+    return [{"url": f"https://d{i}.example.com/a", "domain": f"d{i}.example.com", "chunk": f"chunk {i}",
+             "kw_score": 2} for i in range(n)]
+
+def _stub_nli(monkeypatch, entails, clock=None, step_sec=0.0):
+    """
+    Model stub scoring the k-th chunk it sees entails[k]; advances clock by step_sec per call.
+    """
+    seen = []
+
+    def nli(premises, hypothesis):
+        if clock is not None:
+            clock[0] += step_sec
+        out = [(entails[len(seen) + j], 0.0, 0.1) for j in range(len(premises))]
+        seen.extend(premises)
+        return out
+
+    monkeypatch.setattr(verify, "nli_support_contradict_batch", nli)
+    return seen
+
+def test_confidence_interval(use_config):
+    cfg = use_config(**ADAPTIVE)
+    # 95% CI half-width 1.96 * sd / sqrt(n) of the per-source NLI values (100 x entail here)
+    assert verify._nli_confident(_sources([0.80, 0.82, 0.78]), cfg)        # sd 2 -> 2.3 points
+    assert not verify._nli_confident(_sources([0.30, 0.90, 0.60]), cfg)    # sd 30 -> 33.9 points
+    assert not verify._nli_confident(_sources([0.80, 0.80]), cfg)          # fewer than 3 sources
+    assert verify._nli_confident(_sources([0.80, 0.82, 0.78, 0.05]), cfg)   # 0.05 fails min_conf: not counted
+
+def test_early_exit_once_confident(monkeypatch, use_config):
+    cfg = use_config(**ADAPTIVE)
+    seen = _stub_nli(monkeypatch, [0.8, 0.81, 0.79, 0.8] + [0.1] * 8)
+    per_source = {}
+    rounds = [n for _, n in verify._iter_nli_rounds(_chunks(12), fake.CLAIM, per_source, cfg)]
+    assert rounds == [2, 4] and len(seen) == 4
+
+def test_time_budget_cuts_scoring_off(monkeypatch, use_config):
+    cfg = use_config(**ADAPTIVE)
+    clock = [0.0]
+    monkeypatch.setattr(verify, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+    # never confident: values alternate between the extremes
+    seen = _stub_nli(monkeypatch, [0.9, 0.25] * 6, clock, step_sec=3.0)
+    rounds = [n for _, n in verify._iter_nli_rounds(_chunks(12), fake.CLAIM, {}, cfg)]
+    assert rounds == [2, 4, 6] and len(seen) == 6  # 9 s > 8 s after the third round
+
+def test_not_adaptive_scores_everything(monkeypatch, use_config):
+    cfg = use_config(**{**ADAPTIVE, "NLI_ADAPTIVE": False, "NLI_BATCH_SIZE": 4})
+    seen = _stub_nli(monkeypatch, [0.8] * 12)
+    rounds = [n for _, n in verify._iter_nli_rounds(_chunks(12), fake.CLAIM, {}, cfg)]
+    assert rounds == [4, 8, 12] and len(seen) == 12
+
+def test_result_counts_evaluated_and_skipped(monkeypatch, use_config):
+    monkeypatch.setattr(verify, "search_serper", fake.fake_search)
+    monkeypatch.setattr(fetch_plan, "fetch_page", fake.fake_fetch)
+    use_config(**{**ADAPTIVE, "NLI_ADAPTIVE": False}, NLI_MAX_CHUNKS_TOTAL=100,
+               EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False)
+    seen = _stub_nli(monkeypatch, [0.8] * 100)
+    full = verify.verify_claim_pipeline(fake.CLAIM, 12, 6, 4)
+    total = len(seen)
+    assert (full["nli_chunks_evaluated"], full["nli_chunks_skipped"]) == (total, 0)
+
+    use_config(**ADAPTIVE, NLI_MAX_CHUNKS_TOTAL=100, EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False)
+    seen = _stub_nli(monkeypatch, [0.8] * 100)
+    early = verify.verify_claim_pipeline(fake.CLAIM, 12, 6, 4)
+    assert early["nli_chunks_evaluated"] == len(seen) < total
+    assert early["nli_chunks_evaluated"] + early["nli_chunks_skipped"] == total
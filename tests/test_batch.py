@@ -0,0 +1,23 @@
+import json
+
+from core import batch
+
+def test_torn_last_line_is_dropped_before_resuming(tmp_path):
+    out = tmp_path / "results.jsonl"
+    done = json.dumps({"id": "1", "claim": "a", "score": 50.0}, ensure_ascii=False) + "\n"
+    torn = json.dumps({"id": "2", "claim": "חצבת", "score": 40.0}, ensure_ascii=False).encode("utf-8")
+    # cut inside a multibyte character
+    out.write_bytes(done.encode("utf-8") + torn[:torn.index("ח".encode("utf-8")) + 1])
+    batch.drop_torn_line(str(out))
+    assert out.read_text(encoding="utf-8") == done
+    assert batch.done_ids(str(out)) == {"1"}
+
+    batch.drop_torn_line(str(out))
+    assert out.read_text(encoding="utf-8") == done
+
+def test_single_torn_line_empties_the_file(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_bytes(b'{"id": "1", "sco')
+    batch.drop_torn_line(str(out))
+    assert out.read_bytes() == b""
+    batch.drop_torn_line(str(tmp_path / "missing.jsonl"))
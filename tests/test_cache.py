@@ -0,0 +1,32 @@
+from core.cache import TTLCache
+
+def test_zero_ttl_stores_nothing(tmp_path):
+    for ttl in (0, -1):
+        cache = TTLCache("zero", ttl_sec=ttl, db_path=str(tmp_path / "cache.sqlite3"))
+        cache.set("k", {"v": 1})
+        assert cache.get("k") is None
+        assert cache.get_stale("k") is None
+        assert cache.stats()["size"] == 0 and cache.stats()["misses"] == 1
+
+def test_no_ttl_keeps_entries_until_evicted():
+    cache = TTLCache("forever", max_items=2, ttl_sec=None)
+    for k in "abc":
+        cache.set(k, k)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, "b", "c")
+
+def test_disk_tier_keeps_the_newest_bytes(tmp_path):
+    cache = TTLCache("capped", max_items=1000, db_path=str(tmp_path / "cache.sqlite3"), db_max_bytes=1000)
+    for i in range(100):  # pruned on the 100th set
+        cache.set(f"k{i:03d}", "x" * 98)  # 100 bytes as JSON
+    keys = [k for (k,) in cache._conn().execute("SELECT key FROM cache WHERE name = 'capped' ORDER BY key")]
+    assert keys == [f"k{i:03d}" for i in range(90, 100)]
+
+def test_set_many_writes_one_transaction(tmp_path):
+    cache = TTLCache("many", db_path=str(tmp_path / "cache.sqlite3"))
+    statements = []
+    cache._conn().set_trace_callback(statements.append)
+    cache.set_many([(f"k{i}", {"entailment": i / 64}) for i in range(64)])
+    assert [s for s in statements if s.upper().startswith("COMMIT")] == ["COMMIT"]
+    cache._data.clear()  # read back from the disk tier
+    assert cache.get("k32") == {"entailment": 0.5}
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,67 @@
+import random
+import re
+
+from bench import bench_chunking
+from core.chunking import token_windows
+from core.utils import select_top_chunks, split_to_chunks
+
+def _words(text):
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
+    return [s for s, _ in spans], [e for _, e in spans]
+
+def _windows(text, max_tokens):
+    return [text[s:e] for _, (s, e) in token_windows(text, *_words(text), max_tokens)]
+
+def test_sentences_are_packed_up_to_the_budget():
+    text = "One two three. Four five. Six seven eight nine."
+    assert _windows(text, 5) == ["One two three. Four five.", "Six seven eight nine."]
+    assert _windows(text, 9) == [text]
+
+def test_long_sentence_is_cut_at_the_budget():
+    text = "Short one. " + " ".join(f"w{i}" for i in range(10)) + ". Tail here."
+    assert _windows(text, 4) == ["Short one.", "w0 w1 w2 w3", "w4 w5 w6 w7", "w8 w9. Tail here."]  # the remainder packs on
+
+def test_every_token_is_in_exactly_one_window():
+    text = "Alpha beta.\n\nGamma delta epsilon zeta eta.  Theta.\nIota kappa lambda."
+    starts, ends = _words(text)
+    ranges = [r for r, _ in token_windows(text, starts, ends, 3)]
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(starts)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(0 < hi - lo <= 3 for lo, hi in ranges)
+
+def test_no_tokens_no_windows():
+    assert token_windows("", [], [], 8) == []
+    assert token_windows("text", [0], [4], 0) == []
+
+EDGE_TEXTS = [
+    "",
+    "   \n\n  ",
+    "No terminal punctuation at all",
+    "Version 3.5 of who.int data. Next sentence!  And a question?\tTabbed. ",
+    "Line one\nLine two\n\n\nLine three.\r\nWindows line. Dots... then more?! Yes.",
+    "Quote \"ends.\" Next. Non-breaking space. After. Here.",
+    "x" * 700 + ". Short one. " + "y" * 480 + ". " + "z" * 30 + ".",
+    "מספר מקרי החצבת ירד. לאחר מבצע החיסונים!\nשורה חדשה.",
+]
+
+def _random_text(rng):
+    words = "flu vaccine hospital admissions adults 3.5 who.int e.g. study Mr. data חיסון".split()
+    ends = [". ", "! ", "? ", "\n", "\n\n", ".\n", " ", ".", ".\t", "... "]
+    return "".join(" ".join(rng.choice(words) for _ in range(rng.randint(1, 60))) + rng.choice(ends)
+                   for _ in range(rng.randint(0, 40)))
+
+def _texts():
+    rng = random.Random(7)
+    return EDGE_TEXTS + [_random_text(rng) for _ in range(200)] + [bench_chunking._page_texts()]
+
+def test_split_matches_the_string_implementation():
+    for text in _texts():
+        for max_chars in (40, 500):
+            assert split_to_chunks(text, max_chars) == bench_chunking.legacy_split_to_chunks(text, max_chars)
+
+def test_selection_matches_the_string_implementation():
+    claims = bench_chunking.CLAIMS + ["flu vaccine study data", "nothing matches here", ""]
+    for text in _texts():
+        for claim in claims:
+            for top_n in (1, 3, 8):
+                assert select_top_chunks(text, claim, top_n) == bench_chunking.legacy_select_top_chunks(text, claim, top_n)
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("torch")  # core.verify imports core.nli, which loads the model runtime
+
+from core import claim_cache
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """
+    Slow fake pipeline that counts its runs.
+    """
+    runs = []
+
+    async def fake_pipeline(claim, search_k, fetch_k, chunks_per_page, on_event=None):
+        runs.append(claim)
+        if on_event is not None:
+            on_event({"event": "search", "results": 1})
+        await asyncio.sleep(0.05)
+        return {"claim": claim, "score": 42.0, "sources": [{"url": "https://a.example.org"}]}
+
+    monkeypatch.setattr(claim_cache, "averify_claim_pipeline", fake_pipeline)
+    monkeypatch.setattr(claim_cache, "_cache", None)
+    return runs
+
+async def _verify_twice(claim):
+    return await asyncio.gather(claim_cache.averify_claim_cached(claim), claim_cache.averify_claim_cached(claim))
+
+def test_coalesced_requests_are_not_cache_hits(pipeline, use_config):
+    use_config(CLAIM_CACHE_ENABLED=True, CLAIM_CACHE_DB_PATH="", CLAIM_CACHE_TTL_SEC=60)
+    leader, waiter = asyncio.run(_verify_twice("Flu shots work"))
+    assert pipeline == ["Flu shots work"]
+    assert (leader["cached"], leader["coalesced"]) == (False, False)
+    assert (waiter["cached"], waiter["coalesced"]) == (False, True)
+    assert claim_cache.claim_cache_stats()["hits"] == 0
+
+    hit = asyncio.run(claim_cache.averify_claim_cached("flu shots work!"))
+    assert (hit["cached"], hit["coalesced"]) == (True, False)
+    assert pipeline == ["Flu shots work"]
+    assert claim_cache.claim_cache_stats()["hits"] == 1
+
+def test_zero_ttl_disables_the_cache(pipeline, use_config):
+    use_config(CLAIM_CACHE_ENABLED=True, CLAIM_CACHE_DB_PATH="", CLAIM_CACHE_TTL_SEC=0)
+    asyncio.run(claim_cache.averify_claim_cached("Flu shots work"))
+    again = asyncio.run(claim_cache.averify_claim_cached("Flu shots work"))
+    assert len(pipeline) == 2 and again["cached"] is False
+    stats = claim_cache.claim_cache_stats()
+    assert (stats["enabled"], stats["size"], stats["hits"]) == (False, 0, 0)
+
+@pytest.fixture
+def stream(monkeypatch):
+    """
+    Fake streaming pipeline: one progress event, then the result.
+    """
+    runs = []
+
+    def fake_stream(claim, search_k, fetch_k, chunks_per_page, progress=False):
+        runs.append(claim)
+        yield {"event": "search", "results": 1}
+        yield {"event": "result", "result": {"claim": claim, "score": 42.0, "sources": [{"url": "https://a.example.org"}]}}
+
+    monkeypatch.setattr(claim_cache, "iter_verify_claim_pipeline", fake_stream)
+    monkeypatch.setattr(claim_cache, "_cache", None)
+    return runs
+
+def test_waiter_of_a_stalled_leader_runs_the_claim_itself(stream, use_config):
+    use_config(CLAIM_CACHE_ENABLED=False, CLAIM_COALESCE_TIMEOUT_SEC=0.2)
+    leader = claim_cache.iter_verify_claim_cached("Flu shots work")
+    next(leader)  # the leader's client stops reading here
+    events = list(claim_cache.iter_verify_claim_cached("Flu shots work"))
+    assert [e["event"] for e in events] == ["search", "result"]
+    assert (events[-1]["result"]["cached"], events[-1]["result"]["coalesced"]) == (False, False)
+    assert len(stream) == 2
+    leader.close()
+
+def test_async_waiter_of_a_stalled_leader_runs_the_claim_itself(stream, pipeline, use_config):
+    use_config(CLAIM_CACHE_ENABLED=False, CLAIM_COALESCE_TIMEOUT_SEC=0.2)
+    leader = claim_cache.iter_verify_claim_cached("Flu shots work")
+    next(leader)
+    result = asyncio.run(claim_cache.averify_claim_cached("Flu shots work"))
+    assert (result["cached"], result["coalesced"]) == (False, False)
+    assert pipeline == ["Flu shots work"]
+    # the timed-out waiter did not cancel the leader's future
+    assert not claim_cache._inflight[claim_cache.claim_key("Flu shots work", 20, 6, 3)].done()
+    leader.close()
+
+def test_closing_the_leader_early_releases_the_waiters(stream, use_config):
+    use_config(CLAIM_CACHE_ENABLED=False)
+    leader = claim_cache.iter_verify_claim_cached("Flu shots work")
+    next(leader)
+    key = claim_cache.claim_key("Flu shots work", 20, 6, 3)
+    fut = claim_cache._inflight[key]
+    leader.close()
+    assert key not in claim_cache._inflight
+    with pytest.raises(RuntimeError, match="abandoned"):
+        fut.result(timeout=0)
+
+async def _stream(claim):
+    return [e async for e in claim_cache.aiter_verify_claim_cached(claim)]
+
+def test_async_stream_yields_stage_events_then_result(pipeline, use_config):
+    use_config(CLAIM_CACHE_ENABLED=True, CLAIM_CACHE_DB_PATH="", CLAIM_CACHE_TTL_SEC=60)
+    events = asyncio.run(_stream("Flu shots work"))
+    assert [e["event"] for e in events] == ["search", "result"]
+    assert (events[-1]["result"]["score"], events[-1]["result"]["cached"]) == (42.0, False)
+    hit = asyncio.run(_stream("Flu shots work"))
+    assert [e["event"] for e in hit] == ["result"] and hit[0]["result"]["cached"] is True
+    assert pipeline == ["Flu shots work"]
+
+def test_closing_the_async_stream_releases_the_waiters(pipeline, use_config):
+    use_config(CLAIM_CACHE_ENABLED=False)
+    key = claim_cache.claim_key("Flu shots work", 20, 6, 3)
+
+    async def disconnect():
+        stream = claim_cache.aiter_verify_claim_cached("Flu shots work")
+        assert (await stream.__anext__())["event"] == "search"
+        fut = claim_cache._inflight[key]
+        await stream.aclose()
+        await asyncio.sleep(0)  # let the cancelled run unwind
+        return fut
+
+    fut = asyncio.run(disconnect())
+    assert key not in claim_cache._inflight
+    with pytest.raises(RuntimeError, match="abandoned"):
+        fut.result(timeout=0)
+
+class _RecordingCache:
+    """
+    Remembers which thread each cache call ran on.
+    """
+    def __init__(self):
+        self.threads = []
+        self.items = {}
+
+    def get_with_age(self, key):
+        self.threads.append(("get", threading.get_ident()))
+        return (self.items[key], 0.0) if key in self.items else None
+
+    def set(self, key, value):
+        self.threads.append(("set", threading.get_ident()))
+        self.items[key] = value
+
+def test_cache_io_stays_off_the_event_loop(pipeline, use_config, monkeypatch):
+    use_config(CLAIM_CACHE_ENABLED=True)
+    cache = _RecordingCache()
+    monkeypatch.setattr(claim_cache, "_cache", cache)
+
+    async def verify_twice():
+        loop_thread = threading.get_ident()
+        first = await claim_cache.averify_claim_cached("Flu shots work")
+        second = await claim_cache.averify_claim_cached("Flu shots work")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(verify_twice())
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert [op for op, _ in cache.threads] == ["get", "set", "get"]
+    assert all(thread != loop_thread for _, thread in cache.threads)
@@ -0,0 +1,51 @@
+import json
+import os
+import random
+
+from core.config import Config, get_cfg
+
+def _linear_domain_weight(domain, cfg):
+    # the scan the suffix trie replaced
+    if not domain:
+        return 1.0
+    if domain in cfg["DOMAIN_WEIGHTS"]:
+        return float(cfg["DOMAIN_WEIGHTS"][domain])
+    for suffix, val in cfg["SUFFIX_DEFAULTS"].items():
+        if domain.endswith(suffix):
+            return float(val)
+    return 1.0
+
+def test_suffix_trie_matches_the_linear_scan():
+    rng = random.Random(7)
+    labels = ["gov", "il", "ac", "co", "uk", "edu", "news", "www", "a"]
+    for _ in range(50):
+        suffixes = {}
+        for _ in range(rng.randint(1, 6)):
+            parts = [rng.choice(labels) for _ in range(rng.randint(1, 3))]
+            # mostly ".x.y" rules, some without the leading dot
+            suffix = ("." if rng.random() < 0.8 else "") + ".".join(parts)
+            suffixes[suffix] = round(rng.uniform(0.5, 1.5), 2)
+        exact = {"www.who.int": 1.3, "news.ac.il": 1.05}
+        cfg = Config({"DOMAIN_WEIGHTS": exact, "SUFFIX_DEFAULTS": suffixes, "RECENCY_BUCKETS": []})
+        domains = list(exact) + ["", "gov", "il"] + [
+            ".".join(rng.choice(labels) for _ in range(rng.randint(1, 4))) for _ in range(40)
+        ]
+        for domain in domains:
+            assert cfg.domain_weight(domain) == _linear_domain_weight(domain, cfg), (domain, suffixes)
+
+def test_reloads_on_change_and_keeps_the_last_good_config(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"BASE_SCORE": 45}), encoding="utf-8")
+    monkeypatch.setenv("FACTCHECK_CONFIG", str(path))
+    first = get_cfg()
+    assert first["BASE_SCORE"] == 45.0
+    assert get_cfg() is first  # unchanged file: no re-read
+
+    path.write_text(json.dumps({"BASE_SCORE": 50}), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))  # same size, newer mtime
+    second = get_cfg()
+    assert second is not first and second["BASE_SCORE"] == 50.0
+
+    path.write_text("{not json", encoding="utf-8")
+    assert get_cfg() is second
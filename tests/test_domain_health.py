@@ -0,0 +1,72 @@
+import types
+
+from core import domain_health
+from core.domain_health import DomainHealth
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+def _health(monkeypatch, **kw):
+    clock = _Clock()
+    monkeypatch.setattr(domain_health, "time", types.SimpleNamespace(time=clock.time, monotonic=clock.monotonic))
+    return DomainHealth(refresh_sec=0, breaker_failures=3, cooldown_sec=60, **kw), clock
+
+def test_breaker_opens_probes_and_closes(monkeypatch):
+    health, clock = _health(monkeypatch)
+    for _ in range(2):
+        health.record("slow.example", False, "timeout")
+    assert health.state("slow.example")["breaker"] == "closed"
+    assert health.allow("slow.example")
+
+    health.record("slow.example", False, "timeout")
+    assert health.state("slow.example")["breaker"] == "open"
+    assert not health.allow("slow.example")
+    assert health.open_count() == 1
+
+    clock.now += 61
+    assert health.state("slow.example")["breaker"] == "half_open"
+    assert health.allow("slow.example")       # the one probe
+    assert not health.allow("slow.example")   # everyone else waits for it
+
+    health.record("slow.example", True, latency=0.5)
+    state = health.state("slow.example")
+    assert state["breaker"] == "closed" and state["consecutive_failures"] == 0
+    assert state["opened_total"] == 1
+    assert health.allow("slow.example")
+
+def test_failed_probe_reopens(monkeypatch):
+    health, clock = _health(monkeypatch)
+    for _ in range(3):
+        health.record("down.example", False, "http_503")
+    clock.now += 61
+    assert health.allow("down.example")
+    health.record("down.example", False, "http_503")
+    assert health.state("down.example")["breaker"] == "open"
+    assert not health.allow("down.example")
+    assert health.state("down.example")["failure_reasons"] == {"http_503": 4}
+
+def test_deadline_cuts_stay_out_of_the_breaker(monkeypatch):
+    health, _ = _health(monkeypatch)
+    for _ in range(5):
+        health.record("busy.example", False, "deadline", breaker=False)
+    assert health.state("busy.example")["breaker"] == "closed"
+    assert health.success_rate("busy.example") < 0.8
+
+def test_timeout_follows_p90_latency(monkeypatch):
+    health, _ = _health(monkeypatch, window=10, timeout_min_samples=5, timeout_multiplier=2.0, timeout_min_sec=3.0)
+    for lat in (1.0, 1.5, 2.0, 2.5):
+        health.record("fast.example", True, latency=lat)
+    assert health.timeout("fast.example", cap=15.0) == 15.0   # not enough samples yet
+    health.record("fast.example", True, latency=3.0)
+    assert health.timeout("fast.example", cap=15.0) == 6.0    # 2 x p90
+    assert health.timeout("fast.example", cap=4.0) == 4.0
+    for _ in range(10):
+        health.record("fast.example", True, latency=0.1)
+    assert health.timeout("fast.example", cap=15.0) == 3.0    # slow samples left the window; floor
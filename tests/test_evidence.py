@@ -0,0 +1,29 @@
+import json
+
+from core.evidence import flush_evidence_store, iter_evidence_records, save_evidence_record
+
+def _record(claim, score):
+    return {"v": 1, "claim": claim, "score": score, "evidence": [], "nli": []}
+
+def test_store_is_off_by_default(tmp_path):
+    path = tmp_path / "evidence.jsonl"
+    save_evidence_record(_record("a", 1.0), {"EVIDENCE_STORE_PATH": str(path)})
+    flush_evidence_store()
+    assert not path.exists()
+
+def test_store_rotates_and_reads_backups(tmp_path):
+    path = tmp_path / "evidence.jsonl"
+    line = len(json.dumps(_record("claim 00", 0.0))) + 1
+    cfg = {"EVIDENCE_STORE_ENABLED": True, "EVIDENCE_STORE_PATH": str(path),
+           "EVIDENCE_STORE_MAX_MB": 3.5 * line / (1024 * 1024), "EVIDENCE_STORE_BACKUPS": 2}
+    for i in range(10):
+        save_evidence_record(_record(f"claim {i:02d}", float(i)), cfg)
+    flush_evidence_store()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["evidence.jsonl", "evidence.jsonl.1", "evidence.jsonl.2"]
+    assert all(len(p.read_text().splitlines()) <= 3 for p in tmp_path.iterdir())
+    # the oldest records were rotated out; the rest come back oldest first
+    scores = [r["score"] for r in iter_evidence_records(str(path), latest_only=False)]
+    assert scores == [float(i) for i in range(10 - len(scores), 10)]
+    assert len(scores) >= 7
@@ -0,0 +1,230 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from core import scrape
+from core.fetch_plan import iter_fetch_planned, select_planned
+
+ARTICLE = "<html><head><title>Stub {n}</title></head><body><article>{body}</article></body></html>"
+PARAGRAPH = "<p>Seasonal influenza vaccination lowered hospital admissions among adults over sixty-five in the study {n}.</p>"
+
+class _Handler(BaseHTTPRequestHandler):
+    barrier = None  # ?barrier requests wait here until that many are in flight
+    conditional = []  # (If-None-Match, If-Modified-Since) of every /versioned request
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if "barrier" in query:
+            try:
+                self.barrier.wait()
+            except threading.BrokenBarrierError:
+                return self._send(503, b"not concurrent")
+        delay = float(query.get("delay", ["0"])[0])
+        time.sleep(delay)
+        if url.path == "/missing":
+            return self._send(404, b"not found")
+        if url.path == "/short":
+            return self._send(200, b"<html><body><p>Too short.</p></body></html>")
+        if url.path == "/versioned":
+            tags = (self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since"))
+            self.conditional.append(tags)
+            if tags[0] == '"v1"':
+                return self._send(304, b"")
+            body = ARTICLE.format(n="v1", body="".join(PARAGRAPH.format(n="v1") for _ in range(12)))
+            return self._send(200, body.encode("utf-8"),
+                              extra={"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 08:00:00 GMT"})
+        if url.path == "/report.pdf":
+            return self._send(200, b"%PDF-1.7" + b"0" * 4096, ctype="application/pdf")
+        if url.path == "/teaser":
+            # a short related-story card ahead of the story, no <main>, a long tail after it
+            story = "".join(PARAGRAPH.format(n=i) for i in range(30))
+            body = (f"<html><head><title>Teaser first</title></head><body>"
+                    f"<article><h2>Related</h2><p>Another story you may like.</p></article>"
+                    f"<div><article><h1>Story</h1>{story}<p>Final paragraph of the story.</p></article></div>"
+                    f"<footer>{'<p>footer link</p>' * 20000}</footer></body></html>")
+            return self._send(200, body.encode("utf-8"), length="nolength" not in url.query)
+        if url.path == "/custom-tags":
+            # hyphenated custom elements in the header are not <main> / <article>
+            story = "".join(PARAGRAPH.format(n=i) for i in range(30))
+            body = (f"<html><head><title>Custom tags</title></head><body>"
+                    f"<header><main-nav><a href='/'>Home</a></main-nav><article-card>Top story</article-card></header>"
+                    f"<aside>{'<p>trending link</p>' * 10000}</aside>"
+                    f"<article><h1>Story</h1>{story}<p>Final paragraph of the story.</p></article>"
+                    f"<footer>{'<p>footer link</p>' * 20000}</footer></body></html>")
+            return self._send(200, body.encode("utf-8"))
+        n = url.path.rsplit("/", 1)[-1]
+        body = ARTICLE.format(n=n, body="".join(PARAGRAPH.format(n=n) for _ in range(12)))
+        self._send(200, body.encode("utf-8"))
+
+    def _send(self, status, body, ctype="text/html; charset=utf-8", length=True, extra=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        if length:  # without it the body ends when the connection closes
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(use_config):
+    use_config(PAGE_CACHE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def _failures(reason):
+    return sum(v for k, v in scrape.PAGES_FAILED.snapshot().items() if ("reason", reason) in k)
+
+def test_fetches_in_parallel_and_keeps_order(server):
+    # all four must be in flight at once to pass the barrier; later urls answer first
+    urls = [f"{server}/page/{i}?barrier=1&delay={0.4 - 0.1 * i:.1f}" for i in range(4)]
+    _Handler.barrier = threading.Barrier(4, timeout=5)
+    done = [(i, page["ok"]) for i, page in scrape.iter_fetch_pages(urls, max_workers=4)]
+    assert all(ok for _, ok in done)
+    assert sorted(i for i, _ in done) == [0, 1, 2, 3] and [i for i, _ in done] != [0, 1, 2, 3]
+
+    _Handler.barrier = threading.Barrier(4, timeout=5)
+    pages = scrape.fetch_pages(urls, max_workers=4)
+    assert [p["url"] for p in pages] == urls
+    assert all(p["ok"] for p in pages)
+    assert pages[2]["title"] == "Stub 2"
+
+def test_deadline_drops_stragglers(server):
+    urls = [f"{server}/page/fast", f"{server}/page/slow?delay=2"]
+    before = _failures("deadline_exceeded")
+    timeouts = _failures("network_error")
+    t0 = time.monotonic()
+    pages = scrape.fetch_pages(urls, max_workers=2, deadline_sec=0.5)
+    assert time.monotonic() - t0 < 1.5
+    assert pages[0]["ok"]
+    assert not pages[1]["ok"] and pages[1]["reason"] == "deadline_exceeded"
+    assert _failures("deadline_exceeded") == before + 1
+    # the dropped download still ends on its own socket timeout (capped at the deadline)
+    while _failures("network_error") == timeouts and time.monotonic() - t0 < 3:
+        time.sleep(0.05)
+    assert _failures("network_error") == timeouts + 1
+
+def test_failure_reasons(server):
+    closed = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    refused = f"http://127.0.0.1:{closed.server_address[1]}/page/x"
+    closed.server_close()
+    before = _failures("network_error")
+    pages = scrape.fetch_pages([f"{server}/missing", f"{server}/short", refused], max_workers=3)
+    assert pages[0]["reason"].startswith("network_error") and "404" in pages[0]["reason"]
+    assert pages[1]["reason"] == "too_short"
+    assert pages[2]["reason"].startswith("network_error")
+    assert not any(p["ok"] for p in pages)
+    assert _failures("network_error") == before + 2
+
+def test_planned_fetch_replaces_failures(server):
+    urls = [f"{server}/missing", f"{server}/page/a", f"{server}/short", f"{server}/page/b", f"{server}/page/c"]
+    pages = dict(iter_fetch_planned(urls, need=2, max_workers=4))
+    picked = select_planned(pages, 2)
+    assert [i for i, _ in picked] == [1, 3]
+
+def _cut(reason):
+    return sum(v for k, v in scrape.DOWNLOADS_CUT.snapshot().items() if ("reason", reason) in k)
+
+def test_download_stops_after_the_story_not_the_teaser(server):
+    before = _cut("content_end")
+    r = scrape._http_get(f"{server}/teaser")
+    html = scrape.decode_body(r)
+    assert "Final paragraph of the story." in html
+    assert len(r.content) < 400_000  # the footer is not read to the end
+    assert _cut("content_end") == before + 1
+
+    page = scrape.fetch_page(f"{server}/teaser")
+    assert page["ok"] and "Final paragraph of the story." in page["text"]
+
+def test_custom_elements_do_not_end_the_download(server):
+    before = _cut("content_end")
+    r = scrape._http_get(f"{server}/custom-tags")
+    assert "Final paragraph of the story." in scrape.decode_body(r)
+    assert len(r.content) < 400_000
+    assert _cut("content_end") == before + 1
+
+def test_download_is_capped(server, use_config):
+    use_config(PAGE_CACHE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, FETCH_STOP_AT_CONTENT_END=False, FETCH_MAX_BYTES=100_000)
+    assert len(scrape._http_get(f"{server}/teaser?nolength=1").content) == 100_000
+    use_config(PAGE_CACHE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, FETCH_MAX_BYTES=1000)
+    page = scrape.fetch_page(f"{server}/page/long")  # Content-Length above the cap: nothing is read
+    assert page["reason"].startswith("too_large")
+
+def test_rejected_pages_keep_a_bounded_label_set(server, use_config, monkeypatch):
+    use_config(PAGE_CACHE_ENABLED=True, PAGE_CACHE_DB_PATH="", DOMAIN_HEALTH_ENABLED=False)
+    monkeypatch.setattr(scrape, "_page_cache", None)
+    monkeypatch.setattr(scrape, "_failed_cache", None)
+    before = _failures("content_type")
+    first = scrape.fetch_page(f"{server}/report.pdf")
+    cached = scrape.fetch_page(f"{server}/report.pdf")
+    assert first == cached and first["reason"] == "content_type: application/pdf"
+    assert _failures("content_type") == before + 2
+    labels = {dict(k).get("reason") for k in scrape.PAGES_FAILED.snapshot()}
+    assert not any(":" in label for label in labels)
+
+def _pages(result):
+    return sum(v for k, v in scrape.PAGES.snapshot().items() if ("result", result) in k)
+
+def test_expired_page_is_revalidated_and_reused(server, use_config, monkeypatch):
+    use_config(PAGE_CACHE_ENABLED=True, PAGE_CACHE_DB_PATH="", PAGE_CACHE_TTL_SEC=0.2, DOMAIN_HEALTH_ENABLED=False)
+    monkeypatch.setattr(scrape, "_page_cache", None)
+    monkeypatch.setattr(scrape, "_failed_cache", None)
+    monkeypatch.setattr(_Handler, "conditional", [])
+    url = f"{server}/versioned"
+    first = scrape.fetch_page(url)
+    assert first["ok"] and first["title"] == "Stub v1"
+
+    hits, revalidated = _pages("cache_hit"), _pages("revalidated")
+    assert scrape.fetch_page(url) == first  # fresh: no request at all
+    assert _pages("cache_hit") == hits + 1 and len(_Handler.conditional) == 1
+
+    time.sleep(0.3)
+    assert scrape.fetch_page(url) == first  # expired: conditional GET, 304, cached record reused
+    assert _pages("revalidated") == revalidated + 1
+    assert _Handler.conditional == [(None, None), ('"v1"', "Mon, 05 Oct 2026 08:00:00 GMT")]
+    assert scrape.fetch_page(url) == first and _pages("cache_hit") == hits + 2  # fresh again
+
+def test_failed_pages_are_cached_briefly(server, use_config, monkeypatch):
+    use_config(PAGE_CACHE_ENABLED=True, PAGE_CACHE_DB_PATH="", PAGE_CACHE_FAILED_TTL_SEC=0.2,
+               DOMAIN_HEALTH_ENABLED=False)
+    monkeypatch.setattr(scrape, "_page_cache", None)
+    monkeypatch.setattr(scrape, "_failed_cache", None)
+    url = f"{server}/short"
+    failed = _failures("too_short")
+    assert scrape.fetch_page(url)["reason"] == "too_short"
+    assert scrape.fetch_page(url)["reason"] == "too_short"
+    assert scrape.failed_page_cache_stats()["hits"] == 1
+    assert scrape.page_cache_stats()["size"] == 0  # never in the page cache or its disk tier
+
+    time.sleep(0.3)
+    assert scrape.fetch_page(url)["reason"] == "too_short"  # expired: fetched again
+    assert scrape.failed_page_cache_stats()["hits"] == 1
+    assert _failures("too_short") == failed + 3
+
+@pytest.mark.parametrize("encoding, text", [
+    ("cp1251", "Сезонная вакцинация против гриппа снизила число госпитализаций среди пожилых людей. " * 4),
+    ("shift_jis", "季節性インフルエンザの予防接種により、高齢者の入院が減少しました。" * 4),
+], ids=["cp1251", "shift_jis"])
+def test_undeclared_charset_is_detected(encoding, text):
+    html = f"<html><body><p>{text}</p></body></html>"
+    d = scrape.Download("https://example.org/", 200, CaseInsensitiveDict({"Content-Type": "text/html"}),
+                        html.encode(encoding))
+    assert scrape.decode_body(d) == html
+
+def test_cut_multibyte_character_is_dropped():
+    body = "<p>Größe</p>".encode("utf-8")
+    d = scrape.Download("https://example.org/", 200, CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"}),
+                        body[:-6])  # the size cap cut "ß" in half
+    assert scrape.decode_body(d) == "<p>Grö"
@@ -0,0 +1,46 @@
+from core import fetch_plan
+from core.fetch_plan import plan_fetches
+
+CLAIM = "flu vaccine reduces hospital admissions"
+
+def _results(domains, snippets=None):
+    return [{"title": "", "link": f"https://{d}/{i}", "snippet": (snippets or {}).get(i, ""),
+             "domain": d, "rank": i + 1} for i, d in enumerate(domains)]
+
+def _cfg(use_config, **overrides):
+    return use_config(DOMAIN_HEALTH_ENABLED=False, DOMAIN_WEIGHTS={"www.who.int": 1.3},
+                      SUFFIX_DEFAULTS={".gov": 1.2}, **overrides)
+
+def test_trusted_late_result_is_fetched_before_weak_earlier_ones(use_config):
+    cfg = _cfg(use_config)
+    domains = [f"blog{i}.example.com" for i in range(20)]
+    domains[14] = "www.who.int"
+    plan = plan_fetches(_results(domains), CLAIM, 6, cfg)
+    # rank 15 + 2.0 x (1.3 - 1) ties with rank 3 (which wins the tie) and beats rank 4
+    assert [r["rank"] for r in plan[:5]] == [1, 2, 3, 15, 4]
+    assert plan[3]["domain"] == "www.who.int"
+    assert len(plan) == 16  # FETCH_PLAN_MAX_FETCHES: spares to replace failures
+
+def test_snippet_overlap_moves_a_result_up(use_config):
+    cfg = _cfg(use_config)
+    plan = plan_fetches(_results(["a.example.com", "b.example.com"], {1: "Flu vaccine reduces hospital admissions"}),
+                        CLAIM, 2, cfg)
+    assert [r["rank"] for r in plan] == [2, 1]
+
+def test_repeated_domains_are_spread_out(use_config):
+    cfg = _cfg(use_config, FETCH_PLAN_MAX_FETCHES=4)
+    domains = ["a.example.com"] * 4 + ["b.example.com", "c.example.com"]
+    plan = plan_fetches(_results(domains), CLAIM, 4, cfg)
+    # each earlier pick of a domain costs FETCH_PLAN_REPEAT_PENALTY
+    assert [r["rank"] for r in plan] == [1, 2, 5, 6]
+
+def test_open_breakers_are_left_out(use_config, monkeypatch):
+    cfg = _cfg(use_config)
+    monkeypatch.setattr(fetch_plan, "domain_open", lambda d: d == "down.example.com")
+    plan = plan_fetches(_results(["down.example.com", "up.example.com"]), CLAIM, 2, cfg)
+    assert [r["domain"] for r in plan] == ["up.example.com"]
+
+def test_disabled_plan_is_search_order(use_config):
+    cfg = _cfg(use_config, FETCH_PLAN_ENABLED=False)
+    results = _results(["x.example.com", "y.example.com", "www.who.int"])
+    assert plan_fetches(results, CLAIM, 2, cfg) == results[:2]
@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+pytest.importorskip("torch")  # app.routes imports core.nli, which loads the model runtime
+from fastapi.testclient import TestClient
+
+from app.main import app
+from core import nli
+
+class _Backend:
+    def predict(self, feats):
+        return [[0.3, 0.3, 0.4] for _ in feats]
+
+@pytest.fixture
+def client(monkeypatch, use_config):
+    """
+    A client on a model that has not been warmed up yet. The lifespan (and its
+    background warm-up) only runs inside `with TestClient(...)`, so tests drive
+    warmup_nli themselves.
+    """
+    use_config(NLI_SERVER_ADDRESS="", NLI_WARMUP_ON_STARTUP=True)
+    monkeypatch.setattr(nli, "_ready", threading.Event())
+    monkeypatch.setattr(nli, "_warmup_error", None)
+    monkeypatch.setattr(nli, "load_nli", lambda: None)
+    monkeypatch.setattr(nli, "_tokenizer", lambda text, pair, **kw: {"input_ids": [0, 1, 2]})
+    monkeypatch.setattr(nli, "_backend", _Backend())
+    return TestClient(app)
+
+def test_ready_only_after_warmup(client):
+    r = client.get("/api/health/ready")
+    assert r.status_code == 503 and r.json() == {"status": "warming_up"}
+    assert client.get("/api/health/live").status_code == 200
+
+    nli.warmup_nli(seq_lengths=(8,), batch_size=2)
+    r = client.get("/api/health/ready")
+    assert r.status_code == 200 and r.json() == {"status": "ready"}
+    assert client.get("/api/health/live").json() == {"status": "alive"}
+
+def test_failed_warmup_stays_unready(client, monkeypatch):
+    def broken():
+        raise RuntimeError("no weights")
+    monkeypatch.setattr(nli, "load_nli", broken)
+    with pytest.raises(RuntimeError):
+        nli.warmup_nli(seq_lengths=(8,))
+    r = client.get("/api/health/ready")
+    assert r.status_code == 503 and r.json() == {"status": "failed", "detail": "no weights"}
+    assert client.get("/api/health/live").status_code == 200
+
+def test_ready_without_startup_warmup(client, use_config):
+    use_config(NLI_WARMUP_ON_STARTUP=False)
+    assert client.get("/api/health/ready").status_code == 200
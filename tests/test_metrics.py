@@ -0,0 +1,31 @@
+from core import metrics
+
+def test_snapshot_is_a_copy():
+    c = metrics.Counter("test_snapshot_counter_total", "test")
+    h = metrics.Histogram("test_snapshot_seconds", "test", buckets=(0.1, 1.0))
+    c.inc(reason="r0")
+    h.observe(0.05, stage="s0")
+    counts, rows = c.snapshot(), h.snapshot()
+
+    c.inc(reason="r0")
+    c.inc(reason="r1")
+    h.observe(0.5, stage="s0")
+    assert counts == {(("reason", "r0"),): 1.0}
+    assert rows == {(("stage", "s0"),): [1.0, 1.0, 0.05, 1.0]}
+
+def test_render_reads_the_snapshot():
+    c = metrics.Counter("test_render_counter_total", "test")
+    c.inc(reason="r1")
+    c.inc(reason="r0")
+    assert c.render()[2:] == [
+        'test_render_counter_total{reason="r0"} 1',
+        'test_render_counter_total{reason="r1"} 1',
+    ]
+    h = metrics.Histogram("test_render_seconds", "test", buckets=(0.1,))
+    h.observe(0.05, stage="s0")
+    assert h.render()[2:] == [
+        'test_render_seconds_bucket{stage="s0",le="0.1"} 1',
+        'test_render_seconds_bucket{stage="s0",le="+Inf"} 1',
+        'test_render_seconds_sum{stage="s0"} 0.050000',
+        'test_render_seconds_count{stage="s0"} 1',
+    ]
@@ -0,0 +1,111 @@
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("torch")  # core.nli_backends imports the model runtime
+
+import torch
+
+from core import nli_backends
+
+LABELS = {0: "entailment", 1: "neutral", 2: "contradiction"}
+
+class _Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.classifier = torch.nn.Linear(4, 3)
+        self.config = types.SimpleNamespace(id2label=LABELS)
+
+@pytest.fixture
+def hf(monkeypatch):
+    """
+    Stands in for the HF model download; returns the model names requested.
+    """
+    loaded = []
+
+    class _Auto:
+        @staticmethod
+        def from_pretrained(name):
+            loaded.append(name)
+            return _Model()
+
+    monkeypatch.setattr(nli_backends, "AutoModelForSequenceClassification", _Auto)
+    return loaded
+
+@pytest.fixture
+def ort(monkeypatch):
+    """
+    A fake onnxruntime; export and quantization write marker files so the
+    tests can see which graph the session was opened on.
+    """
+    sessions = []
+
+    class _Session:
+        def __init__(self, path, sess_options=None, providers=None):
+            self.path = path
+            self.options = sess_options
+            sessions.append(self)
+
+        def get_inputs(self):
+            return [types.SimpleNamespace(name="input_ids"), types.SimpleNamespace(name="attention_mask")]
+
+    def quantize_dynamic(src, dst, weight_type=None):
+        with open(dst, "w") as f:
+            f.write(f"int8 of {src}")
+
+    def export(model_name, tokenizer, path):
+        with open(path, "w") as f:
+            f.write(model_name)
+
+    runtime = types.ModuleType("onnxruntime")
+    runtime.SessionOptions = types.SimpleNamespace
+    runtime.InferenceSession = _Session
+    quantization = types.ModuleType("onnxruntime.quantization")
+    quantization.QuantType = types.SimpleNamespace(QInt8="QInt8")
+    quantization.quantize_dynamic = quantize_dynamic
+    runtime.quantization = quantization
+    monkeypatch.setitem(sys.modules, "onnxruntime", runtime)
+    monkeypatch.setitem(sys.modules, "onnxruntime.quantization", quantization)
+    monkeypatch.setattr(nli_backends, "_export_onnx", export)
+    import transformers
+    monkeypatch.setattr(transformers.AutoConfig, "from_pretrained",
+                        staticmethod(lambda name: types.SimpleNamespace(id2label=LABELS)))
+    return sessions
+
+def test_torch_backends(hf):
+    full = nli_backends.make_backend("torch", "some/model", tokenizer=None)
+    assert type(full) is nli_backends.TorchBackend and full.name == "torch"
+    assert type(full.model.classifier) is torch.nn.Linear
+
+    int8 = nli_backends.make_backend("TORCH_INT8", "some/model", tokenizer=None, device="cuda")
+    assert int8.name == "torch_int8" and int8.device == "cpu"
+    assert type(int8.model.classifier) is not torch.nn.Linear  # swapped for a quantized Linear
+    assert int8.id2label == LABELS and hf == ["some/model", "some/model"]
+
+def test_default_backend_is_torch(hf):
+    assert nli_backends.make_backend("", "some/model", tokenizer=None).name == "torch"
+
+def test_onnx_backends(ort, tmp_path):
+    onnx = nli_backends.make_backend("onnx", "org/model", tokenizer=None, onnx_dir=str(tmp_path),
+                                     intra_op_threads=3)
+    assert type(onnx) is nli_backends.OnnxBackend and onnx.name == "onnx"
+    assert ort[-1].path == str(tmp_path / "org_model.onnx")
+    assert ort[-1].options.intra_op_num_threads == 3
+    assert onnx.input_names == ["input_ids", "attention_mask"] and onnx.id2label == LABELS
+
+    int8 = nli_backends.make_backend("onnx_int8", "org/model", tokenizer=None, onnx_dir=str(tmp_path))
+    assert int8.name == "onnx_int8"
+    assert ort[-1].path == str(tmp_path / "org_model-int8.onnx")
+    assert (tmp_path / "org_model-int8.onnx").read_text() == f"int8 of {tmp_path / 'org_model.onnx'}"
+
+@pytest.mark.parametrize("kind", ["onnx", "onnx_int8"])
+def test_onnx_without_onnxruntime(monkeypatch, hf, kind):
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)  # import raises ImportError
+    with pytest.raises(RuntimeError, match="requires the onnxruntime package"):
+        nli_backends.make_backend(kind, "some/model", tokenizer=None)
+    assert hf == []  # failed before exporting anything
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown NLI_BACKEND 'tensorrt'"):
+        nli_backends.make_backend("tensorrt", "some/model", tokenizer=None)
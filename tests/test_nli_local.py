@@ -0,0 +1,154 @@
+import re
+
+import pytest
+
+pytest.importorskip("torch")  # core.nli loads the model runtime at import
+
+from core import nli
+from core.cache import TTLCache
+
+CLAIM = "Flu shots work"
+SENTENCES = [
+    "Alpha bravo charlie delta echo foxtrot golf hotel.",
+    "India juliet kilo lima mike november oscar papa.",
+    "Quebec romeo sierra tango uniform victor whiskey xray.",
+    "Yankee zulu alpha bravo charlie delta echo foxtrot.",
+]
+
+class _Tokenizer:
+    """
+    Word-level stand-in. Like a leading-space marker, the first word of every
+    text costs one extra token, so a window re-tokenized on its own is longer
+    than its slice of the page's tokens.
+    """
+    def __init__(self):
+        self.encoded = []  # every text passed to __call__
+
+    def _encode(self, text):
+        ids, offsets = [], []
+        for n, m in enumerate(re.finditer(r"\S+", text)):
+            s, e = m.span()
+            if n == 0 and e - s > 1:
+                ids += [1, e - s]
+                offsets += [(s, s + 1), (s + 1, e)]
+            else:
+                ids.append(e - s)
+                offsets.append((s, e))
+        return ids, offsets
+
+    @staticmethod
+    def _pair(a, b):
+        return [0] + list(a) + [2] + list(b) + [2]
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def prepare_for_model(self, ids, pair_ids, **kwargs):
+        return {"input_ids": self._pair(ids, pair_ids)}
+
+    def __call__(self, text, text_pair=None, add_special_tokens=True, return_offsets_mapping=False, **kwargs):
+        texts = text if isinstance(text, list) else [text]
+        self.encoded.extend(texts)
+        enc = [self._encode(t) for t in texts]
+        if text_pair is not None:
+            return {"input_ids": [self._pair(ids, self._encode(h)[0]) for (ids, _), h in zip(enc, text_pair)]}
+        out = {"input_ids": [ids for ids, _ in enc]}
+        if return_offsets_mapping:
+            out["offset_mapping"] = [offsets for _, offsets in enc]
+        return out if isinstance(text, list) else {k: v[0] for k, v in out.items()}
+
+class _Backend:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, feats):
+        self.batches.append(feats)
+        return [[0.7, 0.2, 0.1] for _ in feats]
+
+@pytest.fixture
+def model(monkeypatch, use_config):
+    """
+    Fake tokenizer + backend in place of the loaded model; returns (tokenizer, backend).
+    """
+    cfg = use_config(NLI_TOKENIZER_NAME="fake/tokenizer", NLI_SERVER_ADDRESS="")
+    tok, backend = _Tokenizer(), _Backend()
+    monkeypatch.setattr(nli, "_tokenizer", tok)
+    monkeypatch.setattr(nli, "_tokenizer_name", "fake/tokenizer")
+    monkeypatch.setattr(nli, "_model_name", nli._names(cfg)[0])
+    monkeypatch.setattr(nli, "_backend", backend)
+    monkeypatch.setattr(nli, "_label_map", {"entailment": 0, "neutral": 1, "contradiction": 2})
+    monkeypatch.setattr(nli, "_premise_ids", TTLCache("premise_ids", max_items=64))
+    nli._hypothesis_ids.cache_clear()
+    return tok, backend
+
+def test_windows_fit_on_their_own_tokens(model):
+    tok, _ = model
+    text = " ".join(SENTENCES)
+    windows = [text[s:e] for s, e in nli.premise_windows(text, CLAIM, max_tokens=16)]
+    # two sentences are 16 tokens of the page but 17 on their own: cut again
+    assert windows == SENTENCES
+    assert all(len(tok._encode(w)[0]) <= 16 for w in windows)
+
+def test_window_ids_are_not_tokenized_again(model):
+    tok, backend = model
+    text = " ".join(SENTENCES)
+    windows = [text[s:e] for s, e in nli.premise_windows(text, CLAIM, max_tokens=16)]
+    tok.encoded.clear()
+    unseen = "An unseen premise here."
+    scores = nli._local_scores_pairs([(w, CLAIM) for w in windows] + [(unseen, CLAIM)])
+    assert scores == [{"entailment": 0.7, "neutral": 0.2, "contradiction": 0.1}] * 5
+    assert tok.encoded == [unseen]  # the windows reused their ids
+    fed = sorted(f["input_ids"] for batch in backend.batches for f in batch)
+    claim_ids = tok._encode(CLAIM)[0]
+    assert fed == sorted(tok._pair(tok._encode(p)[0], claim_ids) for p in windows + [unseen])
+
+def test_ids_are_keyed_on_model_and_tokenizer(model, monkeypatch):
+    tok, _ = model
+    text = " ".join(SENTENCES)
+    nli.premise_windows(text, CLAIM, max_tokens=16)
+    tok.encoded.clear()
+    monkeypatch.setattr(nli, "_tokenizer_name", "other/tokenizer")
+    nli._local_scores_pairs([(SENTENCES[0], CLAIM)])
+    assert tok.encoded == [SENTENCES[0]]
+
+def test_ids_go_to_the_nli_server(model, monkeypatch, use_config):
+    tok, _ = model
+    text = " ".join(SENTENCES)
+    nli.premise_windows(text, CLAIM, max_tokens=16)
+    use_config(NLI_TOKENIZER_NAME="fake/tokenizer", NLI_SERVER_ADDRESS="/tmp/nli-test.sock")
+    monkeypatch.setattr(nli, "_local_only", False)
+    sent = []
+
+    def fake_remote(address, pairs, batch_size=None, timeout=60.0, **kwargs):
+        sent.append(kwargs)
+        return [{"entailment": 1.0} for _ in pairs]
+
+    monkeypatch.setattr(nli, "remote_scores_pairs", fake_remote)
+    nli.nli_scores_pairs([(SENTENCES[1], CLAIM), ("Not a window.", CLAIM)])
+    assert sent == [{"premise_ids": [tok._encode(SENTENCES[1])[0], None],
+                     "model": nli._model_name, "tokenizer": "fake/tokenizer"}]
+
+class _EchoBackend(_Backend):
+    # probabilities that identify the pair: entailment from its length, contradiction from its ids
+    def predict(self, feats):
+        self.batches.append(feats)
+        return [[len(f["input_ids"]) / 1000, 0.0, sum(f["input_ids"]) / 10000] for f in feats]
+
+def test_pairs_come_back_in_input_order(model, monkeypatch, use_config):
+    tok, _ = model
+    use_config(NLI_TOKENIZER_NAME="fake/tokenizer", NLI_SERVER_ADDRESS="", NLI_MEMO_ENABLED=False,
+               NLI_SCHEDULER_ENABLED=False)
+    backend = _EchoBackend()
+    monkeypatch.setattr(nli, "_backend", backend)
+    lengths = [7, 1, 12, 3, 3, 9, 2, 15, 5]
+    pairs = [(" ".join(["word"] * n + [f"w{i}"]), CLAIM if i % 2 else "Another claim") for i, n in enumerate(lengths)]
+    out = nli.nli_support_contradict_pairs(pairs, batch_size=2)
+
+    expected = []
+    for p, h in pairs:
+        ids = tok._pair(tok._encode(p)[0], tok._encode(h)[0])
+        expected.append((len(ids) / 1000, sum(ids) / 10000, 0.0))
+    assert out == expected
+    # the micro-batches really were sorted by length, not input order
+    fed = [len(f["input_ids"]) for batch in backend.batches for f in batch]
+    assert fed == sorted(fed) and len(backend.batches) == 5
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("torch")  # core.nli loads the model runtime at import
+
+from core import nli
+
+@pytest.fixture
+def scored(monkeypatch):
+    """
+    Replaces the model with a fake that tags scores with the configured backend.
+    """
+    calls = []
+
+    def fake_scores_pairs(pairs, batch_size=None):
+        backend = nli.get_cfg().get("NLI_BACKEND")
+        calls.extend(pairs)
+        return [{"entailment": 0.5, "backend": backend} for _ in pairs]
+
+    monkeypatch.setattr(nli, "nli_scores_pairs", fake_scores_pairs)
+    monkeypatch.setattr(nli, "_memo", None)
+    return calls
+
+def test_memo_is_keyed_on_backend_model_and_tokenizer(scored, use_config):
+    pair = [("Flu shots cut hospital stays.", "The flu vaccine works")]
+    common = dict(NLI_MEMO_ENABLED=True, NLI_MEMO_DB_PATH="", NLI_SCHEDULER_ENABLED=False)
+
+    use_config(NLI_BACKEND="torch", **common)
+    assert nli.nli_scores_pairs_cached(pair)[0]["backend"] == "torch"
+    assert nli.nli_scores_pairs_cached(pair)[0]["backend"] == "torch"
+    assert len(scored) == 1
+
+    use_config(NLI_BACKEND="onnx_int8", **common)
+    assert nli.nli_scores_pairs_cached(pair)[0]["backend"] == "onnx_int8"
+    assert len(scored) == 2
+
+    use_config(NLI_BACKEND="onnx_int8", NLI_MODEL_NAME="another/model", **common)
+    nli.nli_scores_pairs_cached(pair)
+    assert len(scored) == 3
+
+    use_config(NLI_BACKEND="onnx_int8", NLI_MODEL_NAME="another/model", NLI_TOKENIZER_NAME="another/tokenizer", **common)
+    nli.nli_scores_pairs_cached(pair)
+    assert len(scored) == 4
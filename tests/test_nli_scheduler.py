@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from core.nli_scheduler import NLIScheduler
+
+def test_batches_pairs_of_concurrent_callers():
+    sched = NLIScheduler(lambda pairs: [{"n": len(pairs)} for _ in pairs], max_batch=8, max_wait_ms=50)
+    try:
+        futures = sched.submit([("a", "h"), ("b", "h")]) + sched.submit([("c", "h")])
+        assert [f.result(timeout=5) for f in futures] == [{"n": 3}] * 3
+    finally:
+        sched.stop()
+
+def test_stop_fails_queued_futures():
+    release = threading.Event()
+
+    def run(pairs):
+        release.wait(5)
+        return [{} for _ in pairs]
+
+    sched = NLIScheduler(run, max_batch=1, max_wait_ms=0)
+    first = sched.submit([("a", "h")])[0]
+    queued = sched.submit([("b", "h")])[0]
+    while not first.running():
+        time.sleep(0.01)
+    sched.stop(timeout=0.1)
+    release.set()
+    assert first.result(timeout=5) == {}
+    with pytest.raises(RuntimeError, match="stopped"):
+        queued.result(timeout=1)
+
+def test_no_second_worker_while_the_first_is_stopping():
+    release = threading.Event()
+
+    def run(pairs):
+        release.wait(5)
+        return [{} for _ in pairs]
+
+    sched = NLIScheduler(run, max_batch=1, max_wait_ms=0)
+    first = sched.submit([("a", "h")])[0]
+    while not first.running():
+        time.sleep(0.01)
+    sched.stop(timeout=0.1)  # the worker is busy: the join times out
+    with pytest.raises(RuntimeError, match="still stopping"):
+        sched.submit([("b", "h")])
+    release.set()
+    assert first.result(timeout=5) == {}
+    sched.stop()
+    try:
+        assert sched.submit([("c", "h")])[0].result(timeout=5) == {}
+        assert sum(t.name == "nli-scheduler" for t in threading.enumerate()) == 1
+    finally:
+        sched.stop()
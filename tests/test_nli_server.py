@@ -0,0 +1,89 @@
+import json
+import signal
+import time
+from multiprocessing import Pipe
+
+import pytest
+
+pytest.importorskip("torch")  # core.nli loads the model runtime at import
+
+from core import nli, nli_server
+
+@pytest.fixture
+def scored(monkeypatch):
+    """
+    Replaces the model call; returns the (pairs, batch_size, premise_ids) each call received.
+    """
+    calls = []
+
+    def fake_scores(pairs, batch_size=None, premise_ids=None):
+        calls.append((pairs, batch_size, premise_ids))
+        return [{"entailment": 1.0} for _ in pairs]
+
+    monkeypatch.setattr(nli, "_local_scores_pairs", fake_scores)
+    return calls
+
+def _serve(request):
+    server, client = Pipe()
+    client.send_bytes(json.dumps(request).encode("utf-8"))
+    nli_server._handle(server, timeout=1.0)
+    return json.loads(client.recv_bytes())
+
+def test_server_uses_ids_of_its_own_tokenizer(scored, monkeypatch):
+    monkeypatch.setattr(nli, "_model_name", "some/model")
+    monkeypatch.setattr(nli, "_tokenizer_name", "some/tokenizer")
+    request = {"pairs": [["premise", "h"], ["other", "h"]], "batch_size": 8,
+               "premise_ids": [[1, 2, 3], None], "model": "some/model", "tokenizer": "some/tokenizer"}
+    assert _serve(request) == {"scores": [{"entailment": 1.0}] * 2}
+    assert _serve({**request, "tokenizer": "other/tokenizer"}) == {"scores": [{"entailment": 1.0}] * 2}
+    assert _serve({**request, "premise_ids": [[1, 2, 3]]}) == {"scores": [{"entailment": 1.0}] * 2}
+    pairs = [("premise", "h"), ("other", "h")]
+    # ids from another tokenizer, or not one per pair, are dropped: the worker tokenizes the text
+    assert scored == [(pairs, 8, [[1, 2, 3], None]), (pairs, 8, None), (pairs, 8, None)]
+
+@pytest.mark.parametrize("authkey", [None, "secret"])
+def test_silent_client_is_dropped(scored, monkeypatch, authkey):
+    if authkey:
+        monkeypatch.setenv("NLI_SERVER_AUTHKEY", authkey)
+    else:
+        monkeypatch.delenv("NLI_SERVER_AUTHKEY", raising=False)
+    server, client = Pipe()
+    t0 = time.monotonic()
+    with pytest.raises(nli_server._ClientTimeout):
+        nli_server._handle(server, timeout=0.2)
+    assert time.monotonic() - t0 < 2
+    assert scored == []
+
+def test_default_threads_split_the_cores(monkeypatch):
+    monkeypatch.setattr(nli.os, "cpu_count", lambda: 8)
+    assert nli.per_process_threads(0, 2) == 4
+    assert nli.per_process_threads(0, 16) == 1
+    assert nli.per_process_threads(3, 2) == 3
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert nli.per_process_threads(0, nli._api_processes()) == 2
+    monkeypatch.setattr(nli, "_threads", None)
+    monkeypatch.setattr(nli.torch, "set_num_threads", lambda n: None)
+    assert nli.configure_api_threads() == (2, 4)
+
+class _Stop(Exception):
+    pass
+
+@pytest.mark.parametrize("forked, expected", [(False, signal.default_int_handler), (True, signal.SIG_IGN)])
+def test_only_forked_workers_ignore_ctrl_c(monkeypatch, forked, expected):
+    for name in ("set_threads", "load_nli", "warmup_nli"):
+        monkeypatch.setattr(nli, name, lambda *a, **k: None)
+    seen = []
+
+    class Listener:
+        def accept(self):
+            seen.append(signal.getsignal(signal.SIGINT))
+            raise _Stop
+
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    try:
+        with pytest.raises(_Stop):
+            nli_server._worker(Listener(), 1, 0, forked=forked)
+    finally:
+        signal.signal(signal.SIGINT, handlers[0])
+        signal.signal(signal.SIGTERM, handlers[1])
+    assert seen == [expected]
@@ -0,0 +1,50 @@
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("torch")  # core.verify imports core.nli, which loads the model runtime
+
+from core import fetch_plan, rescore, verify
+from core.config import Config, get_cfg
+from core.evidence import flush_evidence_store, iter_evidence_records
+from tests import test_verify_async as fake
+
+@pytest.fixture
+def stored(monkeypatch, use_config, tmp_path):
+    """
+    One claim verified with fake search, fetch and model and written to an
+    evidence store; returns (path, result). Later model calls fail.
+    """
+    path = tmp_path / "evidence.jsonl"
+    use_config(EVIDENCE_STORE_ENABLED=True, EVIDENCE_STORE_PATH=str(path),
+               DOMAIN_HEALTH_ENABLED=False, DEBUG_NUMERIC_ONLY=False)
+    monkeypatch.setattr(verify, "search_serper", fake.fake_search)
+    monkeypatch.setattr(fetch_plan, "fetch_page", fake.fake_fetch)
+    monkeypatch.setattr(verify, "nli_support_contradict_batch", fake.fake_nli)
+    result = verify.verify_claim_pipeline(fake.CLAIM, 12, 6, 4)
+    flush_evidence_store()
+
+    def no_nli(premises, hypothesis):
+        raise AssertionError("rescoring ran the model")
+    monkeypatch.setattr(verify, "nli_support_contradict_batch", no_nli)
+    return path, result
+
+def test_rescore_reproduces_the_stored_verdict(stored):
+    path, result = stored
+    [record] = list(iter_evidence_records(str(path)))
+    replayed = rescore.rescore(record, get_cfg())
+    result.pop("verified_at")
+    assert replayed == result
+
+def test_cli_rescores_under_overrides(stored, tmp_path, monkeypatch):
+    path, result = stored
+    out = tmp_path / "rescored.jsonl"
+    monkeypatch.setattr(sys, "argv", ["rescore", "--evidence", str(path), "--set", "FINAL_BLEND_ALPHA=0.0",
+                                      "--out", str(out)])
+    rescore.main()
+    [row] = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    [record] = list(iter_evidence_records(str(path)))
+    assert row["score_before"] == result["score"]
+    assert row["score"] == rescore.rescore(record, Config({**get_cfg(), "FINAL_BLEND_ALPHA": 0.0}))["score"]
+    assert row["score"] != result["score"]
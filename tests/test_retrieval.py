@@ -0,0 +1,52 @@
+import math
+
+import pytest
+
+from core.retrieval import bm25_scores, query_terms, retrieve_chunks, tokenize
+
+def _bm25(terms, docs, k1=1.5, b=0.75):
+    # textbook Okapi BM25, one doc and term at a time
+    n = len(docs)
+    avgdl = max(sum(map(len, docs)) / n, 1.0)
+    out = []
+    for doc in docs:
+        s = 0.0
+        for t in terms:
+            df = sum(1 for d in docs if t in d)
+            tf = doc.count(t)
+            idf = math.log1p((n - df + 0.5) / (df + 0.5))
+            s += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+        out.append(s)
+    return out
+
+def test_scores_match_the_textbook_formula():
+    docs = [tokenize(t) for t in (
+        "Flu vaccines reduce hospital admissions in older adults.",
+        "The vaccine was studied over five flu seasons; flu cases fell.",
+        "Coffee and tea are popular drinks.",
+        "",
+    )]
+    terms = query_terms("Flu vaccine reduces hospital admissions")
+    assert list(bm25_scores(terms, docs)) == pytest.approx(_bm25(terms, docs), rel=1e-5)
+    assert list(bm25_scores([], docs)) == [0.0] * 4
+
+def test_hebrew_prefixes_and_plurals_are_normalized():
+    assert tokenize("והחיסונים vaccines") == tokenize("חיסונים vaccine")
+
+def test_global_top_k_with_a_per_page_cap():
+    relevant = "Flu vaccination cut hospital admissions among older adults."
+    pages = [
+        [relevant, "Flu vaccination is offered every autumn.", "Hospital parking is free."],
+        ["Unrelated text about football.", "Flu vaccination and hospital admissions in a second study."],
+        ["Nothing to see here."],
+    ]
+    out = retrieve_chunks("flu vaccination hospital admissions", [""] * 3, top_k=2, per_page=2,
+                          min_score=0.0, page_chunks=pages)
+    assert [len(p) for p in out] == [2, 2, 1]  # per_page caps every page
+    assert out[0][0][0] == relevant
+    picked = [ch for page in out for ch, _, selected in page if selected]
+    assert len(picked) == 2 and relevant in picked
+    # within a page, chunks come back best first
+    assert all(page[i][1] >= page[i + 1][1] for page in out for i in range(len(page) - 1))
+    # nothing scores above the floor for the unrelated page
+    assert not out[2][0][2]
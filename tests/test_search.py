@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from core import search
+from core.metrics import cache_samples
+
+ORGANIC = [
+    {"title": "A", "link": "https://News.Example.org/a", "snippet": "first", "date": "2 days ago"},
+    {"title": "B", "link": "https://news.example.org/b", "snippet": "same domain"},
+    {"title": "C", "link": "https://blog.example.net/c", "snippet": "third", "source": "Blog"},
+    {"title": "D", "link": "", "snippet": "no link"},
+]
+
+class _Response:
+    def __init__(self, status, data):
+        self.status_code = status
+        self._data = data
+        self.text = str(data)
+
+    def json(self):
+        return self._data
+
+@pytest.fixture
+def serper(monkeypatch):
+    """
+    Mocked Serper endpoint: records the queries it receives.
+    """
+    calls = []
+
+    def post(url, headers=None, json=None, timeout=None):
+        assert url == search._SERPER_URL and headers["X-API-KEY"] == "test-key"
+        calls.append(json["q"])
+        if json["q"] == "broken":
+            return _Response(500, {"message": "upstream"})
+        return _Response(200, {"organic": ORGANIC})
+
+    monkeypatch.setattr(search, "_SERPER_KEY", "test-key")
+    monkeypatch.setattr(search.requests, "post", post)
+    monkeypatch.setattr(search, "_cache", None)
+    return calls
+
+def test_results_are_normalized_and_deduped_by_domain(serper, use_config):
+    use_config(SEARCH_CACHE_ENABLED=False)
+    results = search.search_serper("flu vaccine", k=5)
+    assert [r["link"] for r in results] == ["https://News.Example.org/a", "https://blog.example.net/c"]
+    first, second = results
+    assert first["domain"] == "news.example.org" and first["source"] == "news.example.org"
+    assert first["rank"] == 1 and first["date"] == "2 days ago"
+    assert second["rank"] == 3 and second["source"] == "Blog" and second["date"] is None
+
+def test_errors_raise_search_error(serper, use_config, monkeypatch):
+    use_config(SEARCH_CACHE_ENABLED=False)
+    with pytest.raises(search.SearchError, match="500"):
+        search.search_serper("broken")
+    monkeypatch.setattr(search, "_SERPER_KEY", None)
+    with pytest.raises(search.SearchError, match="SERPER_API_KEY"):
+        search.search_serper("flu vaccine")
+
+def test_cache_hits_on_normalized_query(serper, use_config):
+    use_config(SEARCH_CACHE_ENABLED=True, SEARCH_CACHE_DB_PATH="")
+    first = search.search_serper("Flu vaccine", k=5)
+    first[0]["title"] = "mutated by caller"
+    again = search.search_serper("  flu   VACCINE! ", k=5)
+    assert serper == ["Flu vaccine"]
+    assert again[0]["title"] == "A"
+    search.search_serper("flu vaccine", k=3)  # k is part of the key
+    assert len(serper) == 2
+
+    stats = search.search_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    samples = {name: value for name, _, _, _, value in cache_samples("search", stats)}
+    assert samples["factcheck_cache_hits_total"] == 1
+    assert samples["factcheck_cache_misses_total"] == 2
+
+def test_entries_expire_after_ttl(serper, use_config):
+    use_config(SEARCH_CACHE_ENABLED=True, SEARCH_CACHE_DB_PATH="", SEARCH_CACHE_TTL_SEC=0.2)
+    search.search_serper("flu vaccine")
+    search.search_serper("flu vaccine")
+    assert len(serper) == 1
+    time.sleep(0.3)
+    search.search_serper("flu vaccine")
+    assert len(serper) == 2
+
+def test_least_recently_used_entry_is_evicted(serper, use_config):
+    use_config(SEARCH_CACHE_ENABLED=True, SEARCH_CACHE_DB_PATH="", SEARCH_CACHE_MAX_ITEMS=2)
+    for q in ("a", "b", "a", "c"):  # "a" is refreshed, so "b" goes when "c" arrives
+        search.search_serper(q)
+    assert serper == ["a", "b", "c"]
+    search.search_serper("a")
+    search.search_serper("b")
+    assert serper == ["a", "b", "c", "b"]
+    assert search.search_cache_stats()["evictions"] >= 1
+
+def test_sqlite_tier_survives_restart(serper, use_config, tmp_path, monkeypatch):
+    use_config(SEARCH_CACHE_ENABLED=True, SEARCH_CACHE_DB_PATH=str(tmp_path / "search.sqlite3"))
+    before = search.search_serper("flu vaccine")
+    monkeypatch.setattr(search, "_cache", None)  # a fresh process: empty memory tier
+    after = search.search_serper("flu vaccine")
+    assert after == before
+    assert serper == ["flu vaccine"]
+    assert search.search_cache_stats()["disk_hits"] == 1
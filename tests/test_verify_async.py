@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("torch")  # core.verify imports core.nli, which loads the model runtime
+
+from core import fetch_plan, verify
+
+CLAIM = "flu vaccine reduces severe illness in older adults"
+WORDS = "vaccine flu adults reduces severe illness hospital study older people season winter".split()
+
+def fake_search(query, k=8):
+    return [{"title": f"t{i}", "link": f"https://d{i}.example.com/a", "snippet": "flu vaccine" if i % 2 else "",
+             "date": None, "source": "", "domain": f"d{i}.example.com", "rank": i + 1} for i in range(k)]
+
+def fake_fetch(url, timeout=15):
+    i = int(url.split("//d")[1].split(".")[0])
+    time.sleep(random.uniform(0, 0.03))  # completion order differs from plan order
+    if i in (2, 5):
+        return {"url": url, "domain": f"d{i}.example.com", "title": "", "published_at": None,
+                "language": None, "text": "", "ok": False, "reason": "too_short"}
+    rng = random.Random(i)
+    text = " ".join(" ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(40))
+    return {"url": url, "domain": f"d{i}.example.com", "title": f"T{i}", "published_at": "2024-01-01",
+            "language": "en", "text": text, "ok": True, "reason": None}
+
+def fake_nli(premises, hypothesis):
+    out = []
+    for p in premises:
+        h = hashlib.sha1(p.encode("utf-8")).digest()
+        out.append((h[0] / 255, h[1] / 255 * 0.5, 0.1))
+    return out
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """
+    Fake search, fetch and model; returns the list of NLI batches sent.
+    """
+    batches = []
+
+    def recording_nli(premises, hypothesis):
+        batches.append(list(premises))
+        return fake_nli(premises, hypothesis)
+
+    monkeypatch.setattr(verify, "search_serper", fake_search)
+    monkeypatch.setattr(fetch_plan, "fetch_page", fake_fetch)
+    monkeypatch.setattr(verify, "nli_support_contradict_batch", recording_nli)
+    return batches
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize("retriever", ["keyword", "bm25"])
+def test_async_matches_sync(pipeline, use_config, adaptive, retriever):
+    use_config(
+        NLI_ADAPTIVE=adaptive, CHUNK_RETRIEVER=retriever, NLI_MAX_CHUNKS_TOTAL=20,
+        RETRIEVER_MIN_SCORE=0.0,  # the fake pages share every term, so BM25 scores stay low
+        EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, DEBUG_NUMERIC_ONLY=False,
+    )
+    for _ in range(3):
+        pipeline.clear()
+        sync = verify.verify_claim_pipeline(CLAIM, 12, 6, 4)
+        sync_batches = pipeline[:]
+        pipeline.clear()
+        async_ = asyncio.run(verify.averify_claim_pipeline(CLAIM, 12, 6, 4))
+        sync.pop("verified_at")
+        async_.pop("verified_at")
+        # same model inputs batch for batch, so a real model scores them identically too
+        assert pipeline == sync_batches
+        assert async_ == sync
+        urls = {s["url"] for s in sync["sources"]}
+        assert urls and not urls & {"https://d2.example.com/a", "https://d5.example.com/a"}
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_async_events_match_sync_progress(pipeline, use_config, adaptive):
+    use_config(NLI_ADAPTIVE=adaptive, NLI_BATCH_SIZE=4, NLI_MAX_CHUNKS_TOTAL=20,
+               EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, DEBUG_NUMERIC_ONLY=False)
+    sync = list(verify.iter_verify_claim_pipeline(CLAIM, 12, 6, 4, progress=True))
+    events = []
+    result = asyncio.run(verify.averify_claim_pipeline(CLAIM, 12, 6, 4, on_event=events.append))
+
+    def by_kind(evs, kind):
+        return [e for e in evs if e["event"] == kind]
+
+    assert [e["event"] for e in events][0] == "search" and events[0] == sync[0]
+    # pages are reported in arrival order, and how many spares get fetched depends on timing
+    pages = by_kind(events, "page")
+    assert {tuple(e) for e in pages} == {tuple(e) for e in by_kind(sync, "page")}
+    assert {s["url"] for s in result["sources"]} <= {e["url"] for e in pages if e["ok"]}
+    assert len(by_kind(events, "nli")) > 1 and by_kind(events, "nli") == by_kind(sync, "nli")
+    assert by_kind(events, "nli")[-1]["provisional_score"] == result["score"]
+
+def test_provisional_scores_only_for_progress_streams(pipeline, use_config, monkeypatch):
+    use_config(EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, DEBUG_NUMERIC_ONLY=False)
+    scored = []
+    score_sources = verify._score_sources
+
+    def counting(*args, **kwargs):
+        scored.append(1)
+        return score_sources(*args, **kwargs)
+
+    monkeypatch.setattr(verify, "_score_sources", counting)
+    result = verify.verify_claim_pipeline(CLAIM, 12, 6, 4)
+    assert len(scored) == 1  # the final score only
+
+    scored.clear()
+    events = list(verify.iter_verify_claim_pipeline(CLAIM, 12, 6, 4, progress=True))
+    nli_events = [e for e in events if e["event"] == "nli"]
+    assert nli_events and len(scored) == len(nli_events) + 1
+    assert events[-1]["result"]["score"] == result["score"]
+
+def test_nli_starts_while_pages_download(pipeline, use_config, monkeypatch):
+    cfg = use_config(
+        NLI_BATCH_SIZE=2, EVIDENCE_STORE_ENABLED=False, DOMAIN_HEALTH_ENABLED=False, DEBUG_NUMERIC_ONLY=False,
+    )
+    first = fetch_plan.plan_fetches(fake_search(None, 12), CLAIM, 6, cfg)[0]["link"]
+    nli_started = threading.Event()
+    waited = []
+    record = verify.nli_support_contradict_batch
+
+    def signalling_nli(premises, hypothesis):
+        nli_started.set()
+        return record(premises, hypothesis)
+
+    def gated_fetch(url, timeout=15):
+        # every page but the first in plan order waits for NLI on page 1's chunks
+        if url != first:
+            waited.append(nli_started.wait(5))
+        return fake_fetch(url, timeout)
+
+    monkeypatch.setattr(verify, "nli_support_contradict_batch", signalling_nli)
+    monkeypatch.setattr(fetch_plan, "fetch_page", gated_fetch)
+    pipeline.clear()
+    result = asyncio.run(verify.averify_claim_pipeline(CLAIM, 12, 6, 4))
+    assert waited and all(waited)
+    assert all(len(batch) == 2 for batch in pipeline[:-1])
+    assert result["nli_chunks_evaluated"] == sum(len(batch) for batch in pipeline)